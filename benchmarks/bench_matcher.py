@@ -0,0 +1,91 @@
+# benchmarks/bench_matcher.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark: per-pair x per-channel x per-regex scanning vs ChannelMatcher
+on a synthetic daddylive-like source (100k entries by default).
+
+    python benchmarks/bench_matcher.py [--entries 100000] [--extra-channels 0] [--seed 1]
+
+Every wanted-channel alias from the m3u-update scripts is loaded into one
+matcher; both strategies must produce identical classifications.
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "m3u-update" / "scripts"))
+
+from channel_matcher import ChannelMatcher  # noqa: E402
+from fixtures import make_source  # noqa: E402
+from m3u_stream import iter_pairs  # noqa: E402
+import pull_channels_and_update as premier  # noqa: E402
+import pull_match_football_from_daddylive as football  # noqa: E402
+import update_bein_urls as bein  # noqa: E402
+import update_dazn_pt as dazn  # noqa: E402
+
+
+def all_aliases(extra: int = 0):
+    aliases = {}
+    for name, pats in premier.SOURCE_PATTERNS.items():
+        aliases[f"premier:{name}"] = pats
+    for name, pats in football.ALIASES.items():
+        aliases[f"football:{name}"] = pats
+    for name, num in dazn.WANTED.items():
+        aliases[f"dazn:{name}"] = dazn.source_patterns_for(num)
+    for name, pat in bein.MAP.items():
+        aliases[f"bein:{name}"] = [pat]
+    # synthetic extra wanted channels, to show the cost of growing the wanted list
+    for i in range(extra):
+        aliases[f"extra:{i}"] = [re.compile(rf"\bchannel\s*x{i}\b.*\b(hd|fhd)\b", re.I)]
+    return aliases
+
+
+def naive_classify(aliases, pairs):
+    out = {name: [] for name in aliases}
+    for extinf, url in pairs:
+        if not url:
+            continue
+        for name, pats in aliases.items():
+            if any(p.search(extinf) for p in pats):
+                out[name].append((extinf, url))
+    return out
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--entries", type=int, default=100_000)
+    ap.add_argument("--extra-channels", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    aliases = all_aliases(args.extra_channels)
+    src = make_source(args.entries, args.seed)
+    pairs = list(iter_pairs(src))
+
+    (matcher, t_build) = timed(ChannelMatcher, aliases)
+    naive, t_naive = timed(naive_classify, aliases, pairs)
+    fast, t_fast = timed(matcher.classify, pairs)
+    if naive != fast:
+        print("[x] ChannelMatcher result differs from naive scan")
+        return 1
+
+    hits = sum(len(v) for v in fast.values())
+    print(f"[i] entries={len(pairs)} channels={len(aliases)} "
+          f"aliases={sum(len(v) for v in aliases.values())} matches={hits}")
+    print(f"    naive scan      : {t_naive * 1000:9.1f} ms")
+    print(f"    ChannelMatcher  : {t_fast * 1000:9.1f} ms  (build {t_build * 1000:.2f} ms)")
+    print(f"    speedup         : {t_naive / t_fast:9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
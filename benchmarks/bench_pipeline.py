@@ -0,0 +1,262 @@
+# benchmarks/bench_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the playlist pipeline: parse -> match -> render for every
+m3u-update destination (parse = update_all's single streaming pass that keeps
+only the pairs some destination wants; match = each matcher over the whole
+source, to track matcher throughput), plus livetv event-page scraping (and link extraction
+with lxml vs the BeautifulSoup fallback), on synthetic
+fixtures from 1k to 1M entries (network replaced by local fixtures).
+
+    python benchmarks/bench_pipeline.py                      # 1k,10k,100k
+    python benchmarks/bench_pipeline.py --sizes 1k,1m
+    python benchmarks/bench_pipeline.py --check              # exit 1 on regression
+    python benchmarks/bench_pipeline.py --update-baseline
+
+Each stage is timed (best of --repeat runs) and memory-profiled (tracemalloc
+peak, separate run). --check compares with benchmarks/baseline.json: times are
+scaled up by a CPU calibration loop on slower machines, and a stage that looks
+regressed is measured again before it fails the run.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "m3u-update" / "scripts"))
+sys.path.insert(0, str(HERE.parent / "scripts"))
+
+from fixtures import make_dest, make_event_page, make_source  # noqa: E402
+from m3u_stream import iter_pairs  # noqa: E402
+import generate_livetv_playlist as livetv  # noqa: E402
+from livetv_http import Page  # noqa: E402
+import pull_channels_and_update as premier  # noqa: E402
+import pull_match_football_from_daddylive as football  # noqa: E402
+import update_all  # noqa: E402
+import update_bein_urls as bein  # noqa: E402
+import update_dazn_pt as dazn  # noqa: E402
+
+BASELINE = HERE / "baseline.json"
+TIME_TOLERANCE = 1.0      # 2x (shared CI runners jitter by ~50%)
+MEM_TOLERANCE = 0.25      # +25%
+MIN_DELTA_S = 0.005       # ignore regressions smaller than 5 ms
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s.rstrip("km")) * mult)
+
+
+def size_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def calibrate() -> float:
+    """Fixed pure-python workload; ratio to the baseline's value rescales times."""
+    best = float("inf")
+    for _ in range(15):
+        t0 = time.perf_counter()
+        acc = 0
+        for i in range(100_000):
+            acc += len(str(i)) ^ (i & 7)
+        "|".join(str(i) for i in range(25_000)).split("|")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@contextlib.contextmanager
+def quiet():
+    """Stages print/log progress; keep it out of the timings and the report."""
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def build_stages(n: int) -> List[Tuple[str, Callable[[], object]]]:
+    src = make_source(n)
+    pairs = list(iter_pairs(src))
+    dests = {
+        "premier": make_dest("premierleague.m3u", n),
+        "dazn": make_dest("dazn.m3u", n),
+        "football": make_dest("generalsports.m3u", n),
+        "bein": make_dest("bein.m3u", n),
+    }
+    with quiet():
+        picked = {
+            "premier": premier.pick_wanted(pairs),
+            "dazn": dazn.pick_from_source(pairs),
+            "football": football.pick_wanted_clean(pairs),
+            "bein": bein.pick_urls(pairs),
+        }
+
+    pages = max(10, n // 1000)   # event pages scraped per size
+    html = {f"https://livetv.sx/es/eventinfo/{i}/": make_event_page(i) for i in range(pages)}
+
+    # full async pipeline (XML -> workers -> playlist), pages served from memory, no cache
+    tmp = tempfile.TemporaryDirectory(prefix="bench-livetv-")
+    xml_path = Path(tmp.name) / "events.xml"
+    out_path = Path(tmp.name) / "events.m3u"
+    xml_path.write_text("<eventos>" + "".join(
+        f"<evento><url>{u}</url><nombre>Event {i}</nombre><hora>20:{i % 60:02d}</hora></evento>"
+        for i, u in enumerate(html)) + "</eventos>", encoding="utf-8")
+
+    async def fixture_get(session, url, limiter=None):
+        return Page(url, 200, html[url].encode("utf-8"), html[url])
+
+    def scrape_events():
+        orig = livetv.polite_get_async, livetv.LIVETV_CACHE_ENABLED
+        livetv.polite_get_async, livetv.LIVETV_CACHE_ENABLED = fixture_get, False
+        try:
+            asyncio.run(livetv.generate_playlist_from_xml_async(str(xml_path), str(out_path)))
+        finally:
+            livetv.polite_get_async, livetv.LIVETV_CACHE_ENABLED = orig
+        found = out_path.read_text(encoding="utf-8").count("#EXTINF")
+        assert found, "fixture pages must yield player links"
+        return tmp, found
+
+    return [
+        ("parse", lambda: update_all.source_candidates(src, update_all.DESTINATIONS)),
+        ("match.premier", lambda: premier.pick_wanted(pairs)),
+        ("match.dazn", lambda: dazn.pick_from_source(pairs)),
+        ("match.football", lambda: football.pick_wanted_clean(pairs)),
+        ("match.bein", lambda: bein.pick_urls(pairs)),
+        ("render.premier", lambda: premier.update_dest_urls_only(dests["premier"], picked["premier"])),
+        ("render.dazn", lambda: dazn.update_dest_urls_only(dests["dazn"], picked["dazn"])),
+        ("render.football", lambda: football.render_updated(dests["football"], picked["football"])),
+        ("render.bein", lambda: bein.update_dest(dests["bein"], picked["bein"])),
+        ("livetv.events", scrape_events),
+        ("livetv.extract.lxml", lambda: [livetv.extract_player_links_lxml(h) for h in html.values()]),
+        ("livetv.extract.bs4", lambda: [livetv.extract_player_links_bs4(h) for h in html.values()]),
+    ]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    with quiet():
+        for _ in range(repeat):
+            # GC pauses land on whichever stage happens to trigger them; keep them out
+            gc.collect()
+            gc.disable()
+            try:
+                t0 = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - t0)
+            finally:
+                gc.enable()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "peak_kb": peak / 1024}
+
+
+def regressions(key: str, r: Dict[str, float], baseline: Dict, cal: float) -> List[str]:
+    base = baseline.get("stages", {}).get(key)
+    if not base:
+        return []
+    out = []
+    # only ever loosen: a lucky-fast calibration must not tighten the budget
+    expected = base["seconds"] * max(1.0, cal / baseline.get("calibration_s", cal))
+    allowed = expected * (1 + TIME_TOLERANCE)
+    if r["seconds"] > allowed and r["seconds"] - expected > MIN_DELTA_S:
+        out.append(f"{key}: {r['seconds'] * 1000:.2f} ms > {allowed * 1000:.2f} ms allowed")
+    allowed_kb = base["peak_kb"] * (1 + MEM_TOLERANCE)
+    if r["peak_kb"] > allowed_kb and r["peak_kb"] - base["peak_kb"] > 64:
+        out.append(f"{key}: peak {r['peak_kb']:.0f} KiB > {allowed_kb:.0f} KiB allowed")
+    return out
+
+
+def run(sizes: List[int], repeat: int, baseline: Optional[Dict] = None,
+        cal: float = 0.0) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """Measure every stage; with a baseline, a stage that looks regressed is
+    measured again (3x the repeats) before it counts as a failure."""
+    results: Dict[str, Dict[str, float]] = {}
+    failures: List[str] = []
+    for n in sizes:
+        label = size_label(n)
+        print(f"[i] size={label}: building fixtures")
+        for stage, fn in build_stages(n):
+            key = f"{stage}@{label}"
+            r = measure(fn, repeat)
+            if baseline and regressions(key, r, baseline, cal):
+                again = measure(fn, repeat * 3)
+                r = {"seconds": min(r["seconds"], again["seconds"]), "peak_kb": min(r["peak_kb"], again["peak_kb"])}
+                failures += regressions(key, r, baseline, cal)
+            results[key] = r
+            print(f"    {stage:<22} {r['seconds'] * 1000:10.2f} ms  peak {r['peak_kb']:10.1f} KiB")
+    return results, failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default="1k,10k,100k", help="comma separated, e.g. 1k,10k,100k,1m")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--check", action="store_true", help="fail if a stage regresses past the baseline")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if args.check:
+        try:
+            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print("[x] No usable baseline:", e)
+            return 1
+
+    cal = calibrate()
+    print(f"[i] calibration: {cal * 1000:.1f} ms ({platform.python_implementation()} {platform.python_version()})")
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    results, failures = run(sizes, args.repeat, baseline, cal)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"calibration_s": cal, "stages": results}, indent=1), encoding="utf-8")
+
+    if args.update_baseline:
+        try:
+            old = json.loads(baseline_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            old = {}
+        old_cal = old.get("calibration_s", cal)
+        # keep stages not re-measured, rescaled to the new calibration
+        stages = {k: {"seconds": v["seconds"] * cal / old_cal, "peak_kb": v["peak_kb"]}
+                  for k, v in old.get("stages", {}).items()}
+        stages.update(results)
+        baseline_path.write_text(json.dumps({"calibration_s": cal, "stages": stages}, indent=1, sort_keys=True) + "\n",
+                                 encoding="utf-8")
+        print(f"[✓] Baseline written: {baseline_path}")
+
+    if args.check:
+        for f in failures:
+            print("[x] Regression:", f)
+        if failures:
+            return 1
+        print("[✓] No stage regressed past the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
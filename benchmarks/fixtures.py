@@ -0,0 +1,71 @@
+# benchmarks/fixtures.py
+# -*- coding: utf-8 -*-
+"""
+Synthetic, deterministic fixtures for the benchmarks (no network):
+
+- make_source(n): daddylive-like source playlist, ~1% wanted channels.
+- make_dest(path, n): a real destination playlist from m3u-update/ padded
+  with filler entries up to n entries.
+- make_event_page(i): a canned livetv.sx event page (broadcast table with
+  webplayer / acestream / sop links).
+"""
+
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+M3U_UPDATE = ROOT / "m3u-update"
+
+FILLER = [
+    "ESPN", "Fox Sports 1", "Canal+ Sport", "Eurosport 2", "Arena Sport 3", "Nova Sport",
+    "Star Sports Select", "Willow Cricket", "SuperSport Football", "Movistar LaLiga",
+    "Ziggo Sport", "TSN 4", "Sport TV 2", "Polsat Sport", "Setanta", "Astro Cricket",
+]
+WANTED_NAMES = [
+    "TNT Sports 1 UK", "TNT 2", "Sky Sports Main Event UK", "Sky Sports Premier League UK HD",
+    "MATCH! FOOTBALL 1 RUSSIA", "Match! Football 3 Russia", "DAZN ELEVEN 2 PORTUGAL",
+    "Eleven Sports 1 PT", "BEIN SPORTS 6", "beIN Sports MENA 8 HD",
+]
+
+
+def make_source(n: int, seed: int = 1, wanted_ratio: float = 0.01) -> str:
+    rnd = random.Random(seed)
+    lines = ["#EXTM3U"]
+    for i in range(n):
+        if rnd.random() < wanted_ratio:
+            name = rnd.choice(WANTED_NAMES)
+        else:
+            name = f"{rnd.choice(FILLER)} {rnd.randint(1, 9)}"
+        lines.append(f'#EXTINF:-1 tvg-id="ch{i}" tvg-logo="https://logo.example/{i}.png" '
+                     f'group-title="Live Events",{name} | Event {i}')
+        lines.append(f"https://cdn{i % 7}.example.com/hls/stream{i}.m3u8?md5=x&expires=1759161275")
+    return "\n".join(lines) + "\n"
+
+
+def make_dest(name: str, n: int, seed: int = 2) -> str:
+    """m3u-update/<name> + filler entries (total ~n entries), real entries first."""
+    real = (M3U_UPDATE / name).read_text(encoding="utf-8").rstrip("\n")
+    have = real.count("#EXTINF")
+    rnd = random.Random(seed)
+    extra = [f"#EXTINF:-1,{rnd.choice(FILLER)} {i}\nhttp://filler{i % 5}.example.com/live/{i}.m3u8"
+             for i in range(max(0, n - have))]
+    return "\n".join([real] + extra) + "\n"
+
+
+def make_event_page(i: int, links: int = 6) -> str:
+    rows = []
+    for j in range(links):
+        kind = j % 3
+        if kind == 0:
+            a = (f'<a href="/es/webplayer/{i}{j}/" '
+                 f'onclick="return cl(this, \'/es/webplayer2/{i}{j}/\')">web</a>')
+        elif kind == 1:
+            a = f'<a href="/es/showvideo/{i}{j}/">video</a>'
+        else:
+            a = f'<a href="acestream://{i:040x}">ace</a>'
+        rows.append(f'<tr><td class="lang">es</td><td class="live">{a}</td><td>{j * 500} kbps</td></tr>')
+    noise = "".join(f'<div class="cmt"><p>comment {k} on event {i}</p><a href="/es/user/{k}">u</a></div>'
+                    for k in range(40))
+    return (f'<html><head><title>Event {i}</title></head><body>'
+            f'<div id="menu">{"".join(f"<a href=/es/cat/{k}>c{k}</a>" for k in range(30))}</div>'
+            f'<table class="broadcast lnktbj">{"".join(rows)}</table>{noise}</body></html>')
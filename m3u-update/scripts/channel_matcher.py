@@ -0,0 +1,171 @@
+# scripts/channel_matcher.py
+# -*- coding: utf-8 -*-
+"""
+محرّك مطابقة يجمع كل aliases للقنوات المطلوبة بمرحلة وحدة:
+
+1) من كل regex نطلع الكلمات الحرفية الإجبارية (مثلاً tnt / eleven / football)
+   عبر محلّل re الداخلي (حتى داخل الأقواس والـalternation).
+2) لكل سطر: نحوّله lower مرة وحدة ونطلع أي كلمات موجودة بيه (prefilter)، و alias
+   ينفحص بس إذا كل كلماته الإجبارية موجودة، فالسطور اللي ما بيها شي تنرفض
+   بدون تشغيل أي regex.
+
+الـ aliases اللي ما نكدر نطلع منها كلمة (مثلاً alternation على مستوى أعلى)
+تنفحص على كل سطر، فالنتيجة دائماً مطابقة للفحص القديم regex-by-regex.
+"""
+
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Pattern, Sequence, Set, Tuple, Union
+
+try:  # Python 3.11+
+    import re._parser as _sre_parse  # type: ignore[import]
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+MIN_KEYWORD_LEN = 3
+
+Alias = Union[str, Pattern[str]]
+
+
+def _compile(alias: Alias) -> Pattern[str]:
+    return alias if isinstance(alias, re.Pattern) else re.compile(alias, re.I)
+
+
+def _op_name(op) -> str:
+    return getattr(op, "name", str(op))
+
+
+def _required(items) -> List[FrozenSet[str]]:
+    """
+    شروط إجبارية من شجرة الـregex: كل عنصر = مجموعة كلمات لازم وحدة منها على الأقل
+    تكون موجودة بالسطر (مجموعة بعنصر واحد = كلمة إجبارية).
+    """
+    out: List[FrozenSet[str]] = []
+    cur: List[str] = []
+
+    def flush() -> None:
+        if cur:
+            out.append(frozenset(["".join(cur)]))
+            cur.clear()
+
+    for op, av in items:
+        name = _op_name(op)
+        if name == "LITERAL":
+            cur.append(chr(av).lower())
+            continue
+        flush()
+        if name == "SUBPATTERN":
+            out.extend(_required(av[-1]))
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") and av[0] >= 1:
+            out.extend(_required(av[2]))
+        elif name == "BRANCH":
+            # كل فرع لازم يعطي كلمة، وإلا الـalternation ما يفيد كـprefilter
+            union: Set[str] = set()
+            for branch in av[1]:
+                opts = [o for o in _required(branch) if len(o) == 1]
+                if not opts:
+                    union = set()
+                    break
+                union |= max(opts, key=lambda o: len(next(iter(o))))
+            if union:
+                out.append(frozenset(union))
+    flush()
+    return [o for o in out if all(len(k.strip()) >= MIN_KEYWORD_LEN for k in o)]
+
+
+def required_keywords(pat: Pattern[str]) -> List[FrozenSet[str]]:
+    try:
+        parsed = _sre_parse.parse(pat.pattern, pat.flags)
+    except Exception:
+        return []
+    return _required(parsed)
+
+
+class ChannelMatcher:
+    """
+    aliases: {channel_name: [regex, ...]} بنفس ترتيب الأولوية.
+    match_all/first ترجع أسماء القنوات بنفس ترتيب aliases.
+    """
+
+    def __init__(self, aliases: Mapping[str, Sequence[Alias]]):
+        self.names: List[str] = list(aliases)
+        entries: List[Tuple[int, Pattern[str], List[FrozenSet[str]]]] = []
+        for idx, name in enumerate(self.names):
+            for alias in aliases[name]:
+                pat = _compile(alias)
+                entries.append((idx, pat, required_keywords(pat)))
+
+        # aliases بنفس الشروط (مثل TNT 1 / TNT 2) تنفحص شروطها مرة وحدة كمجموعة
+        self._aliases: List[Tuple[int, Pattern[str]]] = []
+        self._always: List[int] = []
+        groups: Dict[Tuple[FrozenSet[str], FrozenSet[FrozenSet[str]]], List[int]] = {}
+        for idx, pat, opts in entries:
+            aid = len(self._aliases)
+            self._aliases.append((idx, pat))
+            if not opts:
+                self._always.append(aid)
+                continue
+            must = frozenset(k for o in opts if len(o) == 1 for k in o)
+            multi = frozenset(o for o in opts if len(o) > 1)
+            groups.setdefault((must, multi), []).append(aid)
+
+        # كل مجموعة تتعلّق على "مرساة" وحدة: أطول كلمة إجبارية (أو كلمات شرط بديل)،
+        # فلكل سطر كل مجموعة تنفحص مرة وحدة بالكثير
+        self._groups: List[Tuple[FrozenSet[str], FrozenSet[FrozenSet[str]], Tuple[int, ...]]] = []
+        by_anchor: Dict[str, List[int]] = {}
+        for (must, multi), aids in groups.items():
+            gid = len(self._groups)
+            self._groups.append((must, multi, tuple(aids)))
+            anchors = [max(must, key=len)] if must else sorted(next(iter(multi)))
+            for kw in anchors:
+                by_anchor.setdefault(kw, []).append(gid)
+
+        self._by_anchor = by_anchor
+        self._keywords: Tuple[str, ...] = tuple(sorted(
+            {k for must, multi, _ in self._groups for k in must.union(*multi)}
+        ))
+
+    def _candidates(self, text: str) -> List[Tuple[int, Pattern[str]]]:
+        aids = list(self._always)
+        if self._keywords:
+            # النص ينحوّل lower مرة وحدة، وكل كلمة فحص substring بـC (أسرع من
+            # alternation بـre.I وما يفوّت الكلمات المتداخلة)
+            low = text.lower()
+            hits = {kw for kw in self._keywords if kw in low}
+            seen = set()
+            for kw in hits:
+                for gid in self._by_anchor.get(kw, ()):
+                    if gid in seen:
+                        continue
+                    seen.add(gid)
+                    must, multi, group_aids = self._groups[gid]
+                    # المجموعة تصير مرشحة بس إذا كل شروطها الإجبارية متحققة
+                    if must <= hits and all(o & hits for o in multi):
+                        aids.extend(group_aids)
+        if not aids:
+            return []
+        return [self._aliases[a] for a in sorted(aids)]
+
+    def match_all(self, text: str) -> List[str]:
+        hit = {idx for idx, pat in self._candidates(text) if pat.search(text)}
+        return [self.names[i] for i in sorted(hit)]
+
+    def first(self, text: str) -> Optional[str]:
+        best: Optional[int] = None
+        for idx, pat in self._candidates(text):
+            if (best is None or idx < best) and pat.search(text):
+                best = idx
+        return None if best is None else self.names[best]
+
+    def classify(
+        self,
+        pairs: Iterable[Tuple[str, Optional[str]]],
+        key: Optional[Callable[[str], str]] = None,
+    ) -> Dict[str, List[Tuple[str, str]]]:
+        """مرور واحد على (extinf, url): {channel: [(extinf, url), ...]} بترتيب الظهور."""
+        out: Dict[str, List[Tuple[str, str]]] = {name: [] for name in self.names}
+        for extinf, url in pairs:
+            if not url:
+                continue
+            for name in self.match_all(key(extinf) if key else extinf):
+                out[name].append((extinf, url))
+        return out
@@ -0,0 +1,172 @@
+# scripts/expiry_index.py
+# -*- coding: utf-8 -*-
+"""
+فهرس انتهاء صلاحية الروابط الموقّعة (md5=...&expires=<epoch>).
+
+- ExpiryIndex: قناة -> أقرب expires لروابطها، من أي playlist.
+- RefreshSchedule: لكل ملف وجهة نحفظ أقرب expires ووقت آخر تحديث على القرص؛
+  وقت التحديث الجاي = أقرب expires - EXPIRY_MARGIN. update_all يتخطّى الوجهات
+  اللي ما حان وقتها بدل ما يحدّث كلشي كل 5 دقائق. ملف بدون روابط موقّعة يبقى يتحدّث كل تشغيل (مثل قبل)،
+  وحتى الملفات الموقّعة تتحدّث كل EXPIRY_MAX_INTERVAL على الأقل.
+- تقرير الروابط القريبة من الانتهاء:
+
+    python scripts/expiry_index.py ALL.m3u tnt_sports.m3u --within 3600 [--json]
+
+FORCE_REFRESH=1 يتجاهل الجدول ويحدّث كل الوجهات.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from m3u_stream import iter_entries_from_file, iter_entries_from_text
+
+EXPIRY_MARGIN = int(os.getenv("EXPIRY_MARGIN", "600"))                # ثواني قبل الانتهاء
+EXPIRY_MAX_INTERVAL = int(os.getenv("EXPIRY_MAX_INTERVAL", "21600"))  # أقصى فترة بدون تحديث
+EXPIRY_SCHEDULE_FILE = os.getenv("EXPIRY_SCHEDULE_FILE", ".cache/expiry_schedule.json")
+FORCE_REFRESH = os.getenv("FORCE_REFRESH", "0") == "1"
+
+
+def url_expiry(url: Optional[str]) -> Optional[int]:
+    """قيمة expires (epoch) من query الرابط، أو None إذا الرابط مو موقّع."""
+    if not url or "expires=" not in url:
+        return None
+    values = parse_qs(urlsplit(url).query).get("expires")
+    if not values:
+        return None
+    try:
+        return int(values[0])
+    except ValueError:
+        return None
+
+
+class Expiring(NamedTuple):
+    channel: str
+    expires: int
+    url: str
+
+
+class ExpiryIndex:
+    """{channel: (أقرب expires, الرابط)} — القناة = اسم العرض بعد الفاصلة."""
+
+    def __init__(self):
+        self.channels: Dict[str, Tuple[int, str]] = {}
+        self.unsigned = 0
+
+    def add(self, channel: str, url: Optional[str]) -> None:
+        exp = url_expiry(url)
+        if exp is None:
+            if url:
+                self.unsigned += 1
+            return
+        cur = self.channels.get(channel)
+        if cur is None or exp < cur[0]:
+            self.channels[channel] = (exp, url)
+
+    @classmethod
+    def from_entries(cls, entries) -> "ExpiryIndex":
+        idx = cls()
+        for e in entries:
+            idx.add(e.title or e.tvg_id or e.extinf, e.url)
+        return idx
+
+    @classmethod
+    def from_text(cls, text: str) -> "ExpiryIndex":
+        return cls.from_entries(iter_entries_from_text(text))
+
+    @classmethod
+    def from_file(cls, path) -> "ExpiryIndex":
+        return cls.from_entries(iter_entries_from_file(path))
+
+    def earliest(self) -> Optional[int]:
+        return min((exp for exp, _ in self.channels.values()), default=None)
+
+    def expiring_within(self, seconds: int, now: Optional[float] = None) -> List[Expiring]:
+        """القنوات اللي تنتهي خلال seconds (أو انتهت فعلاً)، الأقرب أولاً."""
+        limit = (time.time() if now is None else now) + seconds
+        out = [Expiring(ch, exp, url) for ch, (exp, url) in self.channels.items() if exp <= limit]
+        return sorted(out, key=lambda x: x.expires)
+
+
+def next_refresh(earliest: Optional[float], refreshed_at: float) -> float:
+    """قبل أقرب انتهاء بـEXPIRY_MARGIN، وبحد أقصى EXPIRY_MAX_INTERVAL بعد آخر تحديث."""
+    if earliest is None:
+        return refreshed_at
+    return min(earliest - EXPIRY_MARGIN, refreshed_at + EXPIRY_MAX_INTERVAL)
+
+
+class RefreshSchedule:
+    """
+    {"<dest>": {"refreshed_at": epoch, "earliest": epoch|null, "channels": {name: expires}}}
+    محفوظ كـJSON. earliest=null => الملف فيه روابط غير موقّعة فيتحدّث كل تشغيل.
+    """
+
+    def __init__(self, path: str = EXPIRY_SCHEDULE_FILE):
+        self.path = Path(path)
+        try:
+            self._data: Dict[str, Dict] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    def is_due(self, key: str, now: Optional[float] = None) -> bool:
+        if FORCE_REFRESH:
+            return True
+        nxt = self.next_refresh(key)
+        return nxt is None or (time.time() if now is None else now) >= nxt
+
+    def next_refresh(self, key: str) -> Optional[float]:
+        entry = self._data.get(key)
+        if not entry:
+            return None
+        return next_refresh(entry.get("earliest"), entry.get("refreshed_at", 0))
+
+    def record(self, key: str, text: str, now: Optional[float] = None) -> None:
+        idx = ExpiryIndex.from_text(text)
+        self._data[key] = {
+            "refreshed_at": time.time() if now is None else now,
+            "earliest": None if idx.unsigned or not idx.channels else idx.earliest(),
+            "channels": {ch: exp for ch, (exp, _) in sorted(idx.channels.items())},
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._data, indent=1, sort_keys=True), encoding="utf-8")
+
+
+def fmt_ts(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(ts))
+
+
+def report(paths: Iterable[str], within: int, as_json: bool = False) -> int:
+    now = time.time()
+    rows = []
+    for p in paths:
+        for item in ExpiryIndex.from_file(p).expiring_within(within, now):
+            rows.append({"file": p, "channel": item.channel, "expires": item.expires,
+                         "in_seconds": int(item.expires - now), "url": item.url})
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=1))
+        return 0
+    for r in rows:
+        state = "EXPIRED" if r["in_seconds"] <= 0 else f"in {r['in_seconds']}s"
+        print(f"[!] {r['file']}: {r['channel']} -> {fmt_ts(r['expires'])} ({state})")
+    print(f"[i] {len(rows)} URL(s) expiring within {within}s")
+    return 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Report tokenized stream URLs that are about to expire.")
+    ap.add_argument("paths", nargs="+", help="M3U files")
+    ap.add_argument("--within", type=int, default=EXPIRY_MARGIN, help="seconds (default: EXPIRY_MARGIN)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+    return report(args.paths, args.within, args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# scripts/github_publish.py
+# -*- coding: utf-8 -*-
+"""
+الكتابة على GitHub بدون أي طلب إذا المحتوى ما تغيّر.
+
+upsert_github_file: ملف واحد عبر Contents API.
+BatchCommit: عدة ملفات بـcommit واحد عبر Git Data API (عدد طلبات ثابت).
+
+- نحسب git blob SHA للنص الناتج محليًا (sha1("blob <len>\\0" + bytes)) —
+  نفس الـsha اللي GitHub يرجّعه للملف.
+- نقارنه بآخر sha معروف للملف (كاش محلي على القرص): تطابق => لا GET ولا PUT.
+  إذا المستدعي عنده نص الوجهة اللي انجلب هسه (remote_content) فهو المرجع:
+  الكاش ما ينصدّق إلا إذا يطابقه، وإذا ما يطابقه (الملف تغيّر من برّا) ينشال.
+- بدون كاش: نقرأ الـsha الحالي من GitHub، وإذا يطابق نتخطّى الكتابة.
+- بعد كل كتابة ناجحة نحفظ الـsha الجديد.
+
+GITHUB_API_URL يغيّر عنوان الـAPI (GitHub Enterprise أو سيرفر محلي للتجربة).
+"""
+
+import base64
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+import requests
+
+from run_report import REPORT
+
+GITHUB_API = os.getenv("GITHUB_API_URL", "https://api.github.com")
+TIMEOUT = 25
+
+GITHUB_SHA_CACHE = os.getenv("GITHUB_SHA_CACHE", ".cache/github_shas.json")
+
+
+class GitHubError(RuntimeError):
+    """رد GitHub بخطأ، مع الـstatus والطلب حتى المستدعي يقرر بدون ما يقرا النص."""
+
+    def __init__(self, method: str, path: str, status: int, text: str):
+        super().__init__(f"GitHub {method} {path} failed: {status} {text}")
+        self.method = method
+        self.path = path
+        self.status = status
+        self.text = text
+
+    @property
+    def not_fast_forward(self) -> bool:
+        """الـPATCH على الـref انرفض لأن الفرع تحرّك (422 "Update is not a fast forward")."""
+        return (self.method == "PATCH" and self.path.startswith("git/refs/") and self.status == 422
+                and "fast forward" in self.text.lower())
+
+
+def git_blob_sha(content_bytes: bytes) -> str:
+    h = hashlib.sha1()
+    h.update(b"blob %d\0" % len(content_bytes))
+    h.update(content_bytes)
+    return h.hexdigest()
+
+
+class RemoteShaCache:
+    """{"<repo>@<branch>:<path>": "<blob sha>"} محفوظ كـJSON."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        try:
+            self._data: Dict[str, str] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    @staticmethod
+    def key(repo: str, branch: str, path_in_repo: str) -> str:
+        return f"{repo}@{branch}:{path_in_repo}"
+
+    def get(self, key: str) -> Optional[str]:
+        return self._data.get(key)
+
+    def set(self, key: str, sha: str) -> None:
+        if self._data.get(key) == sha:
+            return
+        self._data[key] = sha
+        self._save()
+
+    def drop(self, key: str) -> None:
+        if self._data.pop(key, None) is not None:
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._data, indent=1, sort_keys=True), encoding="utf-8")
+
+
+SHA_CACHE = RemoteShaCache(GITHUB_SHA_CACHE)
+
+
+def known_unchanged(cache_key: str, local_sha: str, remote_content: Optional[bytes] = None) -> bool:
+    """
+    True إذا نعرف بدون أي طلب إن الريموت عنده نفس المحتوى.
+    remote_content = نص الوجهة اللي انجلب بهذا التشغيل (إذا موجود)، يتقدّم على الكاش.
+    """
+    cached = SHA_CACHE.get(cache_key)
+    if remote_content is None:
+        return cached == local_sha
+    remote_sha = git_blob_sha(remote_content)
+    if cached is not None and cached != remote_sha:
+        # الكاش قديم (الملف انكتب من مكان ثاني): ما نعتمد عليه
+        SHA_CACHE.drop(cache_key)
+    return remote_sha == local_sha
+
+
+def upsert_github_file(repo: str, branch: str, path_in_repo: str, content_bytes: bytes, message: str, token: str,
+                       remote_content: Optional[bytes] = None):
+    """
+    يرجّع رد الـPUT، أو None إذا المحتوى مطابق للموجود (ما انكتب شي).
+    """
+    local_sha = git_blob_sha(content_bytes)
+    cache_key = RemoteShaCache.key(repo, branch, path_in_repo)
+    if known_unchanged(cache_key, local_sha, remote_content):
+        print(f"[i] Unchanged (blob {local_sha[:10]}), skipping GitHub write: {path_in_repo}")
+        return None
+
+    url = f"{GITHUB_API}/repos/{repo}/contents/{path_in_repo}"
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
+
+    # احصل على sha الحالي (إن الملف موجود)
+    sha = None
+    with REPORT.stage("publish", path_in_repo) as st:
+        st.api_calls += 1
+        get_res = requests.get(url, headers=headers, params={"ref": branch}, timeout=TIMEOUT)
+    if get_res.status_code == 200:
+        sha = get_res.json().get("sha")
+    if sha == local_sha:
+        SHA_CACHE.set(cache_key, sha)
+        print(f"[i] Remote already up-to-date (blob {local_sha[:10]}): {path_in_repo}")
+        return None
+
+    payload = {
+        "message": message,
+        "content": base64.b64encode(content_bytes).decode("utf-8"),
+        "branch": branch,
+    }
+    if sha:
+        payload["sha"] = sha
+
+    with REPORT.stage("publish", path_in_repo) as st:
+        st.api_calls += 1
+        st.bytes += len(content_bytes)
+        put_res = requests.put(url, headers=headers, json=payload, timeout=TIMEOUT)
+    if put_res.status_code not in (200, 201):
+        raise GitHubError("PUT", f"contents/{path_in_repo}", put_res.status_code, put_res.text)
+    res = put_res.json()
+    SHA_CACHE.set(cache_key, res.get("content", {}).get("sha") or local_sha)
+    return res
+
+
+class BatchCommit:
+    """
+    يجمع كل الملفات المتغيّرة بتشغيل واحد وينشرها كـcommit واحد عبر Git Data API:
+
+        GET  git/ref/heads/<branch>        -> commit الحالي
+        GET  git/commits/<sha>             -> tree الحالي
+        GET  git/trees/<tree>?recursive=1  -> shas الحالية (نتخطّى الملفات المطابقة)
+        POST git/trees                     -> tree جديد (المحتوى inline، بدون blobs منفصلة)
+        POST git/commits                   -> commit جديد
+        PATCH git/refs/heads/<branch>      -> تحريك الفرع (fast-forward فقط)
+
+    عدد الطلبات ثابت مهما كان عدد الملفات. إذا الفرع تحرّك بالنص (الـPATCH ينرفض
+    422 "not a fast forward") نعيد المحاولة من البداية؛ أي خطأ ثاني (حتى 422 على
+    tree/commit) يوصل للمستدعي مثل ما هو.
+    """
+
+    def __init__(self, repo: str, branch: str, token: str, message: str,
+                 api: Optional[str] = None, session: Optional[requests.Session] = None):
+        self.repo = repo
+        self.branch = branch
+        self.message = message
+        self.api = (api or GITHUB_API).rstrip("/")
+        self.session = session or requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"})
+        self.files: Dict[str, bytes] = {}
+        self.api_calls = 0
+
+    def add(self, path_in_repo: str, content_bytes: bytes, remote_content: Optional[bytes] = None) -> bool:
+        """يرجّع False إذا الملف مطابق للريموت (remote_content أو آخر sha معروف)، وما ينضاف."""
+        cache_key = RemoteShaCache.key(self.repo, self.branch, path_in_repo)
+        if known_unchanged(cache_key, git_blob_sha(content_bytes), remote_content):
+            print(f"[i] Unchanged (blob {'remote' if remote_content is not None else 'cache'}), skipping: {path_in_repo}")
+            return False
+        self.files[path_in_repo] = content_bytes
+        return True
+
+    def _call(self, method: str, path: str, **kwargs):
+        self.api_calls += 1
+        with REPORT.stage("publish", f"{self.repo}@{self.branch}") as st:
+            st.api_calls += 1
+            res = self.session.request(method, f"{self.api}/repos/{self.repo}/{path}", timeout=TIMEOUT, **kwargs)
+        if res.status_code >= 400:
+            raise GitHubError(method, path, res.status_code, res.text)
+        return res.json()
+
+    def _remember(self, paths) -> None:
+        for p in paths:
+            SHA_CACHE.set(RemoteShaCache.key(self.repo, self.branch, p), git_blob_sha(self.files[p]))
+
+    def commit(self, retries: int = 1) -> Optional[str]:
+        """sha الـcommit الجديد، أو None إذا ماكو شي يتغيّر."""
+        if not self.files:
+            return None
+        try:
+            head = self._call("GET", f"git/ref/heads/{self.branch}")["object"]["sha"]
+            base_tree = self._call("GET", f"git/commits/{head}")["tree"]["sha"]
+
+            remote = {e["path"]: e.get("sha") for e in
+                      self._call("GET", f"git/trees/{base_tree}", params={"recursive": "1"}).get("tree", [])}
+            changed = [p for p, data in self.files.items() if remote.get(p) != git_blob_sha(data)]
+            self._remember([p for p in self.files if p not in changed])
+            if not changed:
+                print(f"[i] {self.repo}@{self.branch}: remote already up-to-date")
+                return None
+
+            REPORT.get("publish", f"{self.repo}@{self.branch}").bytes += sum(len(self.files[p]) for p in changed)
+            tree = self._call("POST", "git/trees", json={
+                "base_tree": base_tree,
+                "tree": [{"path": p, "mode": "100644", "type": "blob",
+                          "content": self.files[p].decode("utf-8")} for p in changed],
+            })["sha"]
+            new_commit = self._call("POST", "git/commits", json={
+                "message": self.message, "tree": tree, "parents": [head],
+            })["sha"]
+            self._call("PATCH", f"git/refs/heads/{self.branch}", json={"sha": new_commit, "force": False})
+        except GitHubError as e:
+            if retries > 0 and e.not_fast_forward:
+                print("[!] Branch moved while committing, retrying:", e)
+                return self.commit(retries - 1)
+            raise
+
+        self._remember(changed)
+        print(f"[✓] {self.repo}@{self.branch}: {len(changed)} file(s) in commit {new_commit[:10]}"
+              f" ({self.api_calls} API calls)")
+        return new_commit
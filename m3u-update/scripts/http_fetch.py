@@ -0,0 +1,173 @@
+# scripts/http_fetch.py
+# -*- coding: utf-8 -*-
+"""
+طبقة تحميل async مشتركة (aiohttp):
+- كل الروابط تنحمّل بالتوازي، فزمن التشغيل = أبطأ تحميل مو مجموعهم.
+- جلسة وحدة بـconnection pool و keep-alive (handshake TCP/TLS مرة وحدة لكل host).
+- حد أعلى للاتصالات الكلي ولكل host.
+- كاش HTTP على القرص (ETag / Last-Modified): كل طلب يرسل If-None-Match /
+  If-Modified-Since، ورد 304 يرجّع النص المحفوظ مع not_modified=True حتى
+  المستدعي يتخطّى التحليل/المطابقة/الكتابة.
+
+الاستعمال من الكود المتزامن:
+    src_text, dest_text = fetch_texts(SOURCE_URL, DEST_RAW_URL)
+    if src_text.not_modified and dest_text.not_modified: ...  # ماكو شي جديد
+    ...
+    commit_cache()   # بعد ما التشغيل ينجح فقط
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import aiohttp
+
+from run_report import REPORT
+
+TIMEOUT = 25
+VERIFY_SSL = True
+
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "20"))                    # كل الاتصالات
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "4"))   # لكل host
+KEEPALIVE_TIMEOUT = 30
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".cache/http")
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+
+
+class FetchedText(str):
+    """نص الاستجابة (str عادي) + هل جا من الكاش بعد 304."""
+    not_modified: bool = False
+
+    def __new__(cls, text: str, not_modified: bool = False):
+        obj = super().__new__(cls, text)
+        obj.not_modified = not_modified
+        return obj
+
+
+FetchResult = Union[FetchedText, BaseException]
+
+
+class HttpCache:
+    """
+    <dir>/<sha1(url)>.json  -> {"url", "etag", "last_modified"}
+    <dir>/<sha1(url)>.body  -> آخر نص ناجح
+
+    الإدخالات الجديدة تبقى pending لحد commit()، حتى إذا التشغيل فشل بعد التحميل
+    ما نرجع نحصل 304 بالتشغيل الجاي ونتخطّى تحديث ما انكتب.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.dir = Path(directory)
+        self._pending: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def _key(self, url: str) -> Path:
+        return self.dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        base = self._key(url)
+        try:
+            meta = json.loads(base.with_suffix(".json").read_text(encoding="utf-8"))
+            meta["body"] = base.with_suffix(".body").read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("url") == url else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        meta = self.lookup(url)
+        headers: Dict[str, str] = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def stage(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if etag or last_modified:
+            self._pending[url] = {"url": url, "etag": etag, "last_modified": last_modified, "body": body}
+
+    def commit(self) -> None:
+        if not self._pending:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for url, entry in self._pending.items():
+            base = self._key(url)
+            base.with_suffix(".body").write_text(entry["body"] or "", encoding="utf-8")
+            meta = {k: entry[k] for k in ("url", "etag", "last_modified")}
+            base.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+        self._pending.clear()
+
+
+CACHE: Optional[HttpCache] = HttpCache(HTTP_CACHE_DIR) if HTTP_CACHE_ENABLED else None
+
+
+def commit_cache() -> None:
+    """يثبّت validators هذا التشغيل على القرص (ينادى بعد النجاح فقط)."""
+    if CACHE is not None:
+        CACHE.commit()
+
+
+def make_session(limit: int = HTTP_LIMIT, limit_per_host: int = HTTP_LIMIT_PER_HOST,
+                 timeout: float = TIMEOUT) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+        ssl=None if VERIFY_SSL else False,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+async def fetch_text_async(session: aiohttp.ClientSession, url: str,
+                           cache: Optional[HttpCache] = None) -> FetchedText:
+    headers = cache.conditional_headers(url) if cache is not None else {}
+    t0 = time.perf_counter()
+    async with session.get(url, headers=headers) as resp:
+        if resp.status == 304:
+            meta = cache.lookup(url) if cache is not None else None
+            if meta is not None:
+                REPORT.add("fetch", url, time.perf_counter() - t0)
+                return FetchedText(meta["body"], not_modified=True)
+            # 304 بدون نص محفوظ: نعيد الطلب بدون شروط
+            return await fetch_text_async(session, url, None)
+        resp.raise_for_status()
+        text = await resp.text(errors="replace")
+        REPORT.add("fetch", url, time.perf_counter() - t0, bytes=resp.content.total_bytes)
+        if cache is not None:
+            cache.stage(url, text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return FetchedText(text)
+
+
+async def fetch_all_async(urls: Iterable[str], return_exceptions: bool = False,
+                          session: Optional[aiohttp.ClientSession] = None,
+                          cache: Optional[HttpCache] = None) -> Dict[str, FetchResult]:
+    """{url: text} لكل رابط (المكرر ينحمّل مرة وحدة)."""
+    unique = list(dict.fromkeys(urls))
+    own = session is None
+    if own:
+        session = make_session()
+    try:
+        results = await asyncio.gather(
+            *(fetch_text_async(session, u, cache) for u in unique),
+            return_exceptions=return_exceptions,
+        )
+    finally:
+        if own:
+            await session.close()
+    return dict(zip(unique, results))
+
+
+def fetch_all(urls: Iterable[str], return_exceptions: bool = False) -> Dict[str, FetchResult]:
+    return asyncio.run(fetch_all_async(urls, return_exceptions=return_exceptions, cache=CACHE))
+
+
+def fetch_texts(*urls: str) -> List[FetchedText]:
+    """نفس ترتيب الروابط؛ أي خطأ HTTP/شبكة يوصل للمستدعي مثل requests.raise_for_status."""
+    res = fetch_all(urls)
+    return [res[u] for u in urls]
@@ -0,0 +1,311 @@
+# scripts/m3u_index.py
+# -*- coding: utf-8 -*-
+"""
+مواقع الأسطر بملفات M3U: مفتاح القناة -> مواقع سطر الـEXTINF وسطر الرابط.
+بدل splitlines + مرور regex على كل الأسطر + إعادة بناء الملف كله حتى نبدّل
+كم رابط، نبدّل المقاطع المتغيّرة بس (splice) وكل الباقي ينسخ كما هو.
+
+- scan_slots / patch_urls / apply_edits: على نص بالذاكرة (الوجهة اللي تنحمّل
+  بـHTTP)؛ تستعملها update_dest_urls_only و render_updated.
+- M3UIndex: لملف محلي كبير (www/lista.m3u, sports_channels_tv_chanelpopule.m3u؛
+  يستعمله patch_local_playlists). الفهرس ينحفظ sidecar (<file>.idx.json) مع
+  sha1 الملف، والقراءة/الكتابة عبر mmap:
+    * lookup(key) بدون ما نقرأ الملف كله.
+    * رابط جديد بنفس الطول => كتابة في مكانه على الـmmap.
+    * طول مختلف => نسخ الأجزاء بين التعديلات لملف مؤقت ثم os.replace، وتزحيح
+      المواقع بالفرق (بدون إعادة scan). الملف المسطّح ما ينكتب جزئيًا إذا الطول
+      تغيّر، بس ولا سطر ينقرا أو يتحلّل من جديد.
+  الفهرس ينبني من جديد فقط إذا hash الملف تغيّر (size/mtime أولاً كفحص سريع).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+from m3u_stream import parse_extinf
+
+Buffer = Union[str, bytes, mmap.mmap]
+KeyFunc = Callable[[str], Optional[Hashable]]
+
+
+class Slot(NamedTuple):
+    key: Hashable
+    extinf_start: int
+    extinf_end: int                 # نهاية السطر بدون \r\n
+    url_start: Optional[int]        # None = ماكو سطر رابط بعد الـEXTINF
+    url_end: Optional[int]
+
+
+def title_key(extinf: str) -> Optional[str]:
+    """المفتاح الافتراضي: اسم العرض بعد الفاصلة (lowercase)."""
+    return parse_extinf(extinf)[2].lower() or None
+
+
+def _line_end(buf: Buffer, pos: int, nl, cr) -> Tuple[int, int]:
+    """(end بدون \r\n, بداية السطر الجاي) للسطر اللي يبدأ بـpos."""
+    nxt = buf.find(nl, pos)
+    if nxt < 0:
+        nxt = len(buf)
+    end = nxt - 1 if nxt > pos and buf[nxt - 1:nxt] == cr else nxt
+    return end, nxt + 1
+
+
+def scan_slots(buf: Buffer, key: KeyFunc = title_key) -> List[Slot]:
+    """
+    مرور واحد: كل سطر يبدأ بـ#EXTINF وله مفتاح => Slot.
+    الرابط = السطر اللي بعده مباشرة إذا مو فارغ ومو تعليق (نفس قاعدة update_dest_urls_only).
+    نقفز بين علامات #EXTINF بـfind بدل المرور على كل الأسطر.
+    """
+    text = isinstance(buf, str)
+    marker, hash_, nl, cr = ("#EXTINF", "#", "\n", "\r") if text else (b"#EXTINF", b"#", b"\n", b"\r")
+    slots: List[Slot] = []
+    n = len(buf)
+    pos = 0
+    while pos < n:
+        i = buf.find(marker, pos)
+        if i < 0:
+            break
+        start = buf.rfind(nl, 0, i) + 1
+        if buf[start:i].strip():
+            # العلامة مو ببداية السطر
+            pos = i + len(marker)
+            continue
+        end, pos = _line_end(buf, start, nl, cr)
+        k = key(buf[start:end] if text else buf[start:end].decode("utf-8", "replace"))
+        if k is None:
+            continue
+        url_start = url_end = None
+        if pos < n:
+            ue, after = _line_end(buf, pos, nl, cr)
+            nxt = buf[pos:ue].strip()
+            if nxt and not nxt.startswith(hash_):
+                url_start, url_end = pos, ue
+                pos = after
+        slots.append(Slot(k, start, end, url_start, url_end))
+    return slots
+
+
+Edit = Tuple[int, int, str]   # (start, end, replacement)
+
+
+def url_edits(buf: Buffer, slots: List[Slot], new_urls: Dict[Hashable, str]) -> Tuple[List[Edit], List[Tuple[Hashable, str]]]:
+    """
+    تعديلات استبدال/إدراج سطر الرابط لكل slot مفتاحه بـnew_urls.
+    يرجّع (edits, [(key, "updated"|"same"|"inserted"), ...]) بترتيب الملف.
+    """
+    edits: List[Edit] = []
+    changes: List[Tuple[Hashable, str]] = []
+    for s in slots:
+        url = new_urls.get(s.key)
+        if url is None:
+            continue
+        if s.url_start is None:
+            edits.append((s.extinf_end, s.extinf_end, "\n" + url))
+            changes.append((s.key, "inserted"))
+            continue
+        old = buf[s.url_start:s.url_end]
+        if not isinstance(old, str):
+            old = old.decode("utf-8", "replace")
+        if old == url:
+            changes.append((s.key, "same"))
+        else:
+            edits.append((s.url_start, s.url_end, url))
+            changes.append((s.key, "updated"))
+    return edits, changes
+
+
+def apply_edits(text: str, edits: List[Edit]) -> str:
+    """يطبّق (start, end, replacement) مرتّبة وغير متداخلة على نص."""
+    if not edits:
+        return text
+    parts: List[str] = []
+    pos = 0
+    for start, end, rep in sorted(edits, key=lambda e: e[0]):
+        parts.append(text[pos:start])
+        parts.append(rep)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def patch_urls(text: str, new_urls: Dict[Hashable, str],
+               key: KeyFunc = title_key) -> Tuple[str, List[Tuple[Hashable, str]]]:
+    """النص بعد استبدال سطر الرابط فقط لكل قناة بـnew_urls + قائمة التغييرات."""
+    edits, changes = url_edits(text, scan_slots(text, key), new_urls)
+    return apply_edits(text, edits), changes
+
+
+def _file_sha1(mm: Union[mmap.mmap, bytes]) -> str:
+    return hashlib.sha1(mm).hexdigest()
+
+
+class M3UIndex:
+    """
+    فهرس sidecar لملف M3U محلي:
+        {"sha1", "size", "mtime_ns", "key": <اسم دالة المفتاح>,
+         "slots": [[key, extinf_start, extinf_end, url_start, url_end], ...]}
+    المفاتيح لازم تكون نصوص (تنحفظ JSON).
+    """
+
+    def __init__(self, path: Union[str, Path], key: KeyFunc = title_key, key_name: Optional[str] = None):
+        self.path = Path(path)
+        self.sidecar = self.path.with_name(self.path.name + ".idx.json")
+        self.key = key
+        self.key_name = key_name or getattr(key, "__name__", "key")
+        self.slots: List[Slot] = []
+        self.by_key: Dict[Hashable, List[int]] = {}
+        self.rebuilt = False
+        self._load_or_build()
+
+    # ----- بناء / تحميل -----
+
+    def _stat(self) -> Tuple[int, int]:
+        st = self.path.stat()
+        return st.st_size, st.st_mtime_ns
+
+    def _load_or_build(self) -> None:
+        size, mtime = self._stat()
+        try:
+            meta = json.loads(self.sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if meta and meta.get("key") == self.key_name:
+            fresh = meta.get("size") == size and meta.get("mtime_ns") == mtime
+            if not fresh and meta.get("size") == size:
+                # الملف انلمس بس يمكن المحتوى نفسه: نتأكد بالـhash
+                with self._map() as mm:
+                    fresh = _file_sha1(mm) == meta.get("sha1")
+                if fresh:
+                    meta["mtime_ns"] = mtime
+                    self.sidecar.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            if fresh:
+                self._set_slots([Slot(*s) for s in meta["slots"]])
+                return
+        self.rebuild()
+
+    def _map(self):
+        f = open(self.path, "rb")
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                return _EmptyMap()
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+
+    def _set_slots(self, slots: List[Slot]) -> None:
+        self.slots = slots
+        self.by_key = {}
+        for i, s in enumerate(slots):
+            self.by_key.setdefault(s.key, []).append(i)
+
+    def rebuild(self) -> None:
+        with self._map() as mm:
+            slots = scan_slots(mm, self.key)
+            sha = _file_sha1(mm)
+        self._set_slots(slots)
+        self._save(sha)
+        self.rebuilt = True
+
+    def _save(self, sha: str) -> None:
+        size, mtime = self._stat()
+        meta = {"sha1": sha, "size": size, "mtime_ns": mtime, "key": self.key_name,
+                "slots": [list(s) for s in self.slots]}
+        self.sidecar.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    # ----- قراءة -----
+
+    def keys(self) -> List[Hashable]:
+        return list(self.by_key)
+
+    def lookup(self, key: Hashable) -> List[Tuple[str, Optional[str]]]:
+        """[(extinf, url), ...] للقناة (مقاطع من الـmmap فقط)."""
+        out: List[Tuple[str, Optional[str]]] = []
+        if key not in self.by_key:
+            return out
+        with self._map() as mm:
+            for i in self.by_key[key]:
+                s = self.slots[i]
+                ext = mm[s.extinf_start:s.extinf_end].decode("utf-8", "replace")
+                url = None if s.url_start is None else mm[s.url_start:s.url_end].decode("utf-8", "replace")
+                out.append((ext, url))
+        return out
+
+    # ----- كتابة -----
+
+    def replace_urls(self, new_urls: Dict[Hashable, str]) -> List[Tuple[Hashable, str]]:
+        """يبدّل سطر الرابط فقط للقنوات المعطاة. يرجّع التغييرات مثل url_edits."""
+        picked = [self.slots[i] for k in new_urls for i in self.by_key.get(k, ())]
+        picked.sort(key=lambda s: s.extinf_start)
+        with self._map() as mm:
+            edits, changes = url_edits(mm, picked, new_urls)
+        if not edits:
+            return changes
+        raw = sorted(((a, b, r.encode("utf-8")) for a, b, r in edits), key=lambda e: e[0])
+        if all(len(r) == b - a for a, b, r in raw):
+            self._write_in_place(raw)
+        else:
+            self._write_spliced(raw)
+        return changes
+
+    def _write_in_place(self, raw: List[Tuple[int, int, bytes]]) -> None:
+        with open(self.path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+            for a, b, r in raw:
+                mm[a:b] = r
+            mm.flush()
+            sha = _file_sha1(mm)
+        self._save(sha)
+
+    def _write_spliced(self, raw: List[Tuple[int, int, bytes]]) -> None:
+        h = hashlib.sha1()
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out, self._map() as mm:
+                pos = 0
+                for a, b, r in raw:
+                    for chunk in (mm[pos:a], r):
+                        out.write(chunk)
+                        h.update(chunk)
+                    pos = b
+                tail = mm[pos:]
+                out.write(tail)
+                h.update(tail)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._set_slots([self._shift(s, raw) for s in self.slots])
+        self._save(h.hexdigest())
+
+    @staticmethod
+    def _shift(s: Slot, raw: List[Tuple[int, int, bytes]]) -> Slot:
+        """مواقع الـslot بعد التعديلات (بدون إعادة scan)."""
+        def moved(pos: int, is_end: bool = False) -> int:
+            # كل تعديل ينتهي قبل/عند pos يزحّه بفرق الطول؛ إدراج عند نهاية سطر يجي بعده
+            return pos + sum(len(r) - (b - a) for a, b, r in raw
+                             if b <= pos and not (is_end and a == b == pos))
+
+        url_start, url_end = s.url_start, s.url_end
+        if url_start is None:
+            inserted = next((r for a, b, r in raw if a == b == s.extinf_end), None)
+            if inserted is not None:
+                url_start = moved(s.extinf_end, True) + 1
+                url_end = url_start + len(inserted) - 1
+        else:
+            url_start, url_end = moved(url_start), moved(url_end, True)
+        return Slot(s.key, moved(s.extinf_start), moved(s.extinf_end, True), url_start, url_end)
+
+
+class _EmptyMap(bytes):
+    """mmap ما يقبل ملف فاضي؛ بديل bytes يدعم with."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
@@ -0,0 +1,90 @@
+# scripts/patch_local_playlists.py
+# -*- coding: utf-8 -*-
+"""
+يحدّث روابط القوائم المحلية الكبيرة (www/lista.m3u, sports_channels_tv_chanelpopule.m3u)
+من مصدر M3U (رابط أو ملف) فيه نفس القنوات بروابط أحدث:
+- القناة تنعرف بعنوانها (title_key). سطر الرابط بس يتبدّل؛ الـEXTINF والترتيب
+  ما يتغيّرون ولا قناة جديدة تنضاف.
+- العنوان المكرر (بالقائمة أو بالمصدر) ما نلمسه: ما نعرف أي رابط يروح لأي سطر.
+- التعديل عبر M3UIndex (m3u_index): الفهرس ينقرا من الـsidecar بدل تحليل القائمة
+  كل مرة، والرابط بنفس الطول ينكتب بمكانه.
+
+    python m3u-update/scripts/patch_local_playlists.py SOURCE [PLAYLIST ...]
+"""
+
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Set
+
+from http_fetch import commit_cache, fetch_texts
+from m3u_index import M3UIndex, title_key
+from m3u_stream import iter_entries_from_file, iter_entries_from_text
+from run_report import REPORT
+
+LOCAL_PLAYLISTS = [p for p in os.getenv(
+    "LOCAL_PLAYLISTS", "www/lista.m3u,sports_channels_tv_chanelpopule.m3u").split(",") if p.strip()]
+
+
+def unique_keys(idx: M3UIndex) -> Set[str]:
+    return {k for k, where in idx.by_key.items() if len(where) == 1}
+
+
+def source_urls(entries: Iterable, wanted: Set[str], stats=None) -> Dict[str, str]:
+    """عنوان -> رابط من المصدر، بس للعناوين المطلوبة واللي تجي مرة وحدة بالمصدر."""
+    urls: Dict[str, str] = {}
+    seen: Counter = Counter()
+    for e in entries:
+        if stats is not None:
+            stats.entries += 1
+        k = title_key(e.extinf)
+        if k not in wanted:
+            continue
+        seen[k] += 1
+        if e.url:
+            urls[k] = e.url
+    return {k: u for k, u in urls.items() if seen[k] == 1}
+
+
+def patch_playlists(source: str, playlists: List[str]) -> int:
+    """يرجّع عدد الروابط اللي تغيّرت بكل القوائم."""
+    indexes = [M3UIndex(p) for p in playlists]
+    for idx in indexes:
+        print(f"[i] {idx.path}: {len(idx.slots)} entries ({'rebuilt' if idx.rebuilt else 'sidecar'})")
+    wanted = set().union(*(unique_keys(idx) for idx in indexes))
+
+    with REPORT.stage("parse", source) as st:
+        if source.startswith(("http://", "https://")):
+            (text,) = fetch_texts(source)
+            entries = iter_entries_from_text(text)
+        else:
+            entries = iter_entries_from_file(source)
+        urls = source_urls(entries, wanted, st)
+    print(f"[i] Source: {st.entries} entries, {len(urls)} usable titles")
+
+    total = 0
+    for idx in indexes:
+        with REPORT.stage("render", str(idx.path)) as st:
+            changes = idx.replace_urls({k: urls[k] for k in unique_keys(idx) if k in urls})
+            updated = [k for k, status in changes if status != "same"]
+            st.matches += len(changes)
+        total += len(updated)
+        print(f"[✓] {idx.path}: {len(updated)} URL(s) updated, {len(changes) - len(updated)} already up-to-date")
+    return total
+
+
+def main(argv=None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        print("usage: patch_local_playlists.py SOURCE [PLAYLIST ...]")
+        return 2
+    patch_playlists(args[0], args[1:] or LOCAL_PLAYLISTS)
+    # التشغيل نجح: ثبّت ETag/Last-Modified حتى التشغيل الجاي يحصل 304
+    commit_cache()
+    return 0
+
+
+if __name__ == "__main__":
+    with REPORT.run("patch_local_playlists"):
+        rc = main()
+    sys.exit(rc)
@@ -14,10 +14,16 @@
 import os
 import re
 import sys
-import base64
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
-import requests
+from typing import Iterable, List, Tuple, Dict, Optional
+
+from channel_matcher import ChannelMatcher
+from github_publish import upsert_github_file
+from http_fetch import commit_cache, fetch_texts
+from m3u_index import patch_urls
+from m3u_stream import iter_pairs
+from run_report import REPORT, counted
+from stream_probe import pick_best
 
 # ===== إعدادات (بدون تغيير معلماتك) =====
 
@@ -39,9 +45,6 @@ COMMIT_MESSAGE = os.getenv("COMMIT_MESSAGE", "🔄 auto-update premierleague.m3u
 
 OUTPUT_LOCAL_PATH = os.getenv("OUTPUT_LOCAL_PATH", "./out/premierleague.m3u")
 
-TIMEOUT = 25
-VERIFY_SSL = True
-
 # ===== القنوات =====
 WANTED_CHANNELS = [
     "TNT 1",
@@ -76,70 +79,39 @@ DEST_EXTINF_PATTERNS: Dict[str, re.Pattern] = {
     ),
 }
 
+# كل الـregexات تنجمع بمطابق واحد (سطر واحد = مرور واحد)
+SOURCE_MATCHER = ChannelMatcher(SOURCE_PATTERNS)
+DEST_MATCHER = ChannelMatcher({name: [pat] for name, pat in DEST_EXTINF_PATTERNS.items()})
+
 UK_MARKERS = (" uk", "(uk", "[uk", " united kingdom", "🇬🇧")
 
 # ===== وظائف مساعدة =====
 
-def fetch_text(url: str) -> str:
-    r = requests.get(url, timeout=TIMEOUT, verify=VERIFY_SSL)
-    r.raise_for_status()
-    return r.text
-
-def parse_m3u_pairs(m3u_text: str) -> List[Tuple[str, Optional[str]]]:
-    """[(extinf_line, url_or_None), ...]"""
-    lines = [ln.rstrip("\n") for ln in m3u_text.splitlines()]
-    out: List[Tuple[str, Optional[str]]] = []
-    i = 0
-    while i < len(lines):
-        ln = lines[i].strip()
-        if ln.startswith("#EXTINF"):
-            url = None
-            if i + 1 < len(lines):
-                nxt = lines[i + 1].strip()
-                if nxt and not nxt.startswith("#"):
-                    url = nxt
-            out.append((lines[i], url))
-            i += 2
-            continue
-        i += 1
-    return out
+def wanted(extinf: str) -> bool:
+    """السطر يخص هذي الوجهة؟ (update_all يحتفظ بس بهالأزواج من المصدر)"""
+    return SOURCE_MATCHER.first(extinf) is not None
 
-def source_match(extinf_line: str, target: str) -> bool:
-    pats = SOURCE_PATTERNS.get(target, [])
-    return any(p.search(extinf_line) for p in pats)
-
-def pick_wanted(source_pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+def pick_wanted(source_pairs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, str]:
     """
     التقط أفضل URL من السورس لكل قناة مطلوبة (تفضيل UK/🇬🇧 و HD/FHD/UHD و EN).
+    مع PROBE_STREAMS=1 الترتيب حسب قياس المرايا (stream_probe) والاسم tiebreaker.
     """
-    candidates: Dict[str, List[Tuple[str, str]]] = {name: [] for name in WANTED_CHANNELS}
+    candidates = SOURCE_MATCHER.classify(source_pairs)
 
     def has_uk_tag(s: str) -> bool:
         s_low = s.lower()
         return any(tag in s_low for tag in UK_MARKERS) or "🇬🇧" in s
 
-    for extinf, url in source_pairs:
-        if not url:
-            continue
-        for name in WANTED_CHANNELS:
-            if source_match(extinf, name):
-                candidates[name].append((extinf, url))
-
-    picked: Dict[str, str] = {}
-    for name, lst in candidates.items():
-        if not lst:
-            continue
+    def score(item: Tuple[str, str]) -> int:
+        ext = item[0].lower()
+        sc = 0
+        if has_uk_tag(ext): sc += 5
+        if any(q in ext for q in (" uhd", " 4k", " fhd", " hd")): sc += 2
+        if re.search(r"\b(en|english)\b", ext): sc += 1
+        return sc
 
-        def score(item: Tuple[str, str]) -> int:
-            ext = item[0].lower()
-            sc = 0
-            if has_uk_tag(ext): sc += 5
-            if any(q in ext for q in (" uhd", " 4k", " fhd", " hd")): sc += 2
-            if re.search(r"\b(en|english)\b", ext): sc += 1
-            return sc
-
-        best = sorted(lst, key=score, reverse=True)[0]
-        picked[name] = best[1]
+    # PROBE_STREAMS=1: الأسرع فعليًا (TTFB/bitrate) والسكور يفصل التعادل
+    picked = pick_best(candidates, score)
 
     # لوج
     print("[i] Source candidates picked:")
@@ -149,93 +121,39 @@ def pick_wanted(source_pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]
 
 def update_dest_urls_only(dest_text: str, picked_urls: Dict[str, str]) -> Tuple[str, int]:
     """
-    يمر على الديستنيشن ويبدّل **سطر الرابط فقط** بعد كل EXTINF مطابق.
+    يبدّل **سطر الرابط فقط** بعد كل EXTINF مطابق (يدرجه إذا ناقص)، عبر مواقع
+    الأسطر (m3u_index) بدل تقسيم الملف كله وإعادة بناءه.
     يرجّع (النص النهائي، عدد التحديثات).
     """
-    lines = [ln.rstrip("\n") for ln in dest_text.splitlines()]
-    if not lines or not lines[0].strip().upper().startswith("#EXTM3U"):
-        lines = ["#EXTM3U"] + lines
+    if not dest_text.split("\n", 1)[0].strip().upper().startswith("#EXTM3U"):
+        dest_text = "#EXTM3U\n" + dest_text
 
-    out: List[str] = []
-    i = 0
+    updated, changes = patch_urls(dest_text, picked_urls, key=DEST_MATCHER.first)
     updates = 0
-
-    while i < len(lines):
-        ln = lines[i]
-        if ln.strip().startswith("#EXTINF"):
-            matched_name = None
-            for name, pat in DEST_EXTINF_PATTERNS.items():
-                if pat.search(ln):
-                    matched_name = name
-                    break
-
-            if matched_name and matched_name in picked_urls:
-                # إبقي الـEXTINF كما هو
-                out.append(ln)
-                new_url = picked_urls[matched_name]
-
-                # إذا السطر البعده URL (مو تعليق): بدّله، وإلا أدرجه
-                if i + 1 < len(lines) and lines[i + 1].strip() and not lines[i + 1].strip().startswith("#"):
-                    old_url = lines[i + 1]
-                    if old_url != new_url:
-                        updates += 1
-                        print(f"[i] Updated URL for: {matched_name}")
-                    else:
-                        print(f"[i] URL already up-to-date: {matched_name}")
-                    out.append(new_url)
-                    i += 2
-                    continue
-                else:
-                    updates += 1
-                    print(f"[i] Inserted URL for: {matched_name}")
-                    out.append(new_url)
-                    i += 1
-                    continue
-
-        out.append(ln)
-        i += 1
-
-    return ("\n".join(out).rstrip() + "\n", updates)
-
-def upsert_github_file(repo: str, branch: str, path_in_repo: str, content_bytes: bytes, message: str, token: str):
-    base = "https://api.github.com"
-    url = f"{base}/repos/{repo}/contents/{path_in_repo}"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
-
-    sha = None
-    get_res = requests.get(url, headers=headers, params={"ref": branch}, timeout=TIMEOUT)
-    if get_res.status_code == 200:
-        sha = get_res.json().get("sha")
-
-    payload = {
-        "message": message,
-        "content": base64.b64encode(content_bytes).decode("utf-8"),
-        "branch": branch,
-    }
-    if sha:
-        payload["sha"] = sha
-
-    put_res = requests.put(url, headers=headers, json=payload, timeout=TIMEOUT)
-    if put_res.status_code not in (200, 201):
-        raise RuntimeError(f"GitHub PUT failed: {put_res.status_code} {put_res.text}")
-    return put_res.json()
-
-def main():
-    # 1) حمّل المصدر والوجهة
-    src_text = fetch_text(SOURCE_URL)
-    dest_text = fetch_text(DEST_RAW_URL)
-
-    # 2) اختَر أفضل روابط من السورس
-    pairs = parse_m3u_pairs(src_text)
-    picked_urls = pick_wanted(pairs)
-
-    # 3) حدّث الديستنيشن (سطر URL فقط)
-    updated_text, updates = update_dest_urls_only(dest_text, picked_urls)
-
-    # 4) اكتب إلى GitHub أو محليًا
+    for name, status in changes:
+        if status == "same":
+            print(f"[i] URL already up-to-date: {name}")
+            continue
+        updates += 1
+        print(f"[i] {status.capitalize()} URL for: {name}")
+
+    return (updated.rstrip() + "\n", updates)
+
+def render(source_pairs: Iterable[Tuple[str, Optional[str]]], dest_text: str) -> Optional[str]:
+    """اختَر أفضل روابط من السورس وحدّث الديستنيشن (سطر URL فقط)."""
+    with REPORT.stage("match", DEST_REPO_PATH) as st:
+        picked_urls = pick_wanted(source_pairs)
+        st.matches += len(picked_urls)
+    with REPORT.stage("render", DEST_REPO_PATH) as st:
+        updated_text, updates = update_dest_urls_only(dest_text, picked_urls)
+        st.bytes += len(updated_text.encode("utf-8"))
     if updates == 0:
         print("[i] No changes to write.")
         # حتى لو ماكو تغيير، نكتب محليًا إذا ماكو توكن (للتحقق)
+    return updated_text
+
+def publish(updated_text: str, remote_text: Optional[str] = None) -> None:
+    """اكتب إلى GitHub أو محليًا."""
     token = GITHUB_TOKEN
     if token:
         print(f"[i] Writing to GitHub: {GITHUB_REPO}@{GITHUB_BRANCH}:{DEST_REPO_PATH}")
@@ -246,17 +164,36 @@ def main():
             content_bytes=updated_text.encode("utf-8"),
             message=COMMIT_MESSAGE,
             token=token,
+            remote_content=remote_text.encode("utf-8") if remote_text is not None else None,
         )
-        print("[✓] Updated:", res.get("content", {}).get("path"))
+        if res is not None:
+            print("[✓] Updated:", res.get("content", {}).get("path"))
     else:
         p = Path(OUTPUT_LOCAL_PATH)
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text(updated_text, encoding="utf-8")
         print("[i] Wrote locally to:", p.resolve())
 
+def main():
+    # 1) حمّل المصدر والوجهة
+    src_text, dest_text = fetch_texts(SOURCE_URL, DEST_RAW_URL)  # بالتوازي
+    if src_text.not_modified and dest_text.not_modified:
+        print("[i] Source and destination not modified (304). Nothing to do.")
+        return
+
+    # 2+3) اختر الروابط وحدّث الديستنيشن
+    updated_text = render(counted(iter_pairs(src_text), REPORT.get("parse", SOURCE_URL)), dest_text)
+
+    # 4) اكتب إلى GitHub أو محليًا
+    if updated_text is not None:
+        publish(updated_text, dest_text)
+    # التشغيل نجح: ثبّت ETag/Last-Modified حتى التشغيل الجاي يحصل 304
+    commit_cache()
+
 if __name__ == "__main__":
     try:
-        main()
+        with REPORT.run("pull_channels_and_update"):
+            main()
     except Exception as e:
         print("[x] Error:", e)
         sys.exit(1)
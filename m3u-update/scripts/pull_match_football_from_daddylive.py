@@ -16,9 +16,14 @@
 import os
 import re
 import sys
-import base64
-from typing import List, Tuple, Dict, Optional
-import requests
+from typing import Iterable, List, Tuple, Dict, Optional
+
+from channel_matcher import ChannelMatcher
+from github_publish import upsert_github_file
+from http_fetch import commit_cache, fetch_texts
+from m3u_index import apply_edits, scan_slots
+from m3u_stream import iter_pairs
+from run_report import REPORT, counted
 
 # ---------- إعدادات قابلة للتعديل عبر متغيرات البيئة ----------
 
@@ -43,9 +48,6 @@ COMMIT_MESSAGE = os.getenv("COMMIT_MESSAGE", "chore: update MATCH! FOOTBALL 1/2/
 # للكتابة محلية عند عدم توفر التوكن:
 OUTPUT_LOCAL_PATH = os.getenv("OUTPUT_LOCAL_PATH", "./out/generalsports.m3u")
 
-TIMEOUT = 25
-VERIFY_SSL = True
-
 # ---------- القنوات المطلوبة + أنماط المطابقة ----------
 
 WANTED_CHANNELS = [
@@ -70,146 +72,62 @@ ALIASES: Dict[str, List[re.Pattern]] = {
     ],
 }
 
-# ---------- وظائف مساعدة ----------
+ALIASES_MATCHER = ChannelMatcher(ALIASES)
 
-def fetch_text(url: str) -> str:
-    r = requests.get(url, timeout=TIMEOUT, verify=VERIFY_SSL)
-    r.raise_for_status()
-    return r.text
-
-def parse_m3u_pairs(m3u_text: str) -> List[Tuple[str, Optional[str]]]:
-    """
-    يحوّل M3U إلى أزواج (EXTINF, URL)
-    يربط كل #EXTINF بالرابط الذي يليه إن وجد (وليس سطر تعليق).
-    """
-    lines = [ln.rstrip("\n") for ln in m3u_text.splitlines()]
-    out: List[Tuple[str, Optional[str]]] = []
-    i = 0
-    while i < len(lines):
-        ln = lines[i].strip()
-        if ln.startswith("#EXTINF"):
-            url = None
-            if i + 1 < len(lines):
-                nxt = lines[i + 1].strip()
-                if nxt and not nxt.startswith("#"):
-                    url = nxt
-            out.append((ln, url))
-            i += 2
-            continue
-        i += 1
-    return out
+# ---------- وظائف مساعدة ----------
 
-def find_first_match(extinf: str, patterns: List[re.Pattern]) -> bool:
-    txt = extinf
+def display_name(extinf: str) -> str:
     # نطبع الاسم بعد الفاصلة إن وجد (#EXTINF:-1,NAME ...)
     m = re.search(r"#EXTINF[^,]*,(.*)$", extinf, flags=re.I)
-    if m:
-        txt = m.group(1)
-    for p in patterns:
-        if p.search(txt):
-            return True
-    return False
+    return m.group(1) if m else extinf
+
+def wanted(extinf: str) -> bool:
+    """السطر يخص هذي الوجهة؟ (update_all يحتفظ بس بهالأزواج من المصدر)"""
+    return ALIASES_MATCHER.first(display_name(extinf)) is not None
 
-def pick_wanted_clean(source_pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, Tuple[str, Optional[str]]]:
+def pick_wanted_clean(source_pairs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Tuple[str, Optional[str]]]:
     """
     يرجّع dict: official_name -> (clean_extinf, url)
     حيث clean_extinf يكون بالصيغة البسيطة: "#EXTINF:-1,OFFICIAL_NAME"
     يلتقط أول تطابق لكل قناة مطلوبة.
     """
     picked: Dict[str, Tuple[str, Optional[str]]] = {}
-    for extinf, url in source_pairs:
-        if not url:
-            continue
-        for official_name in WANTED_CHANNELS:
-            if official_name in picked:
-                continue
-            pats = ALIASES.get(official_name, [])
-            if find_first_match(extinf, pats):
-                clean_line = f"#EXTINF:-1,{official_name}"
-                picked[official_name] = (clean_line, url)
+    candidates = ALIASES_MATCHER.classify(source_pairs, key=display_name)
+    for official_name in WANTED_CHANNELS:
+        if candidates.get(official_name):
+            _, url = candidates[official_name][0]
+            picked[official_name] = (f"#EXTINF:-1,{official_name}", url)
     return picked
 
-def upsert_github_file(repo: str, branch: str, path_in_repo: str, content_bytes: bytes, message: str, token: str):
-    base = "https://api.github.com"
-    url = f"{base}/repos/{repo}/contents/{path_in_repo}"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
-
-    # احصل على sha الحالي (إن الملف موجود)
-    sha = None
-    get_res = requests.get(url, headers=headers, params={"ref": branch}, timeout=TIMEOUT)
-    if get_res.status_code == 200:
-        sha = get_res.json().get("sha")
-
-    payload = {
-        "message": message,
-        "content": base64.b64encode(content_bytes).decode("utf-8"),
-        "branch": branch,
-    }
-    if sha:
-        payload["sha"] = sha
-
-    put_res = requests.put(url, headers=headers, json=payload, timeout=TIMEOUT)
-    if put_res.status_code not in (200, 201):
-        raise RuntimeError(f"GitHub PUT failed: {put_res.status_code} {put_res.text}")
-    return put_res.json()
-
 def render_updated(dest_text: str, picked: Dict[str, Tuple[str, Optional[str]]]) -> str:
     """
     يحدّث/يضيف المداخل داخل ملف الوجهة:
     - يبحث عن أي EXTINF موجود لنفس القنوات ويستبدله بسطرين نظيفين (EXTINF البسيط + URL).
     - إذا مش موجودة: يضيفها بترتيب WANTED_CHANNELS في النهاية.
     - يحافظ على #EXTM3U في بداية الملف.
+    الاستبدال على مواقع الأسطر (m3u_index) بدون تقسيم الملف كله وإعادة بناءه.
     """
-    lines = [ln.rstrip("\n") for ln in dest_text.splitlines()]
-
     # تأكد من وجود header
-    if not lines or not lines[0].strip().upper().startswith("#EXTM3U"):
-        lines = ["#EXTM3U"] + lines
-
-    # حدد مواقع القنوات الحالية المطابقة (لاستبدالها)
-    idx_to_official: Dict[int, str] = {}
-    for i, ln in enumerate(lines):
-        if not ln.strip().startswith("#EXTINF"):
-            continue
-        # استخرج اسم العرض بعد الفاصلة (قدر الإمكان)
-        display = ln
-        m = re.search(r"#EXTINF[^,]*,(.*)$", ln, flags=re.I)
-        if m:
-            display = m.group(1).strip()
-        for official_name in WANTED_CHANNELS:
-            pats = ALIASES.get(official_name, [])
-            # طابق على display أو على السطر كله كاحتياط
-            if any(p.search(display) for p in pats) or any(p.search(ln) for p in pats):
-                idx_to_official[i] = official_name
-                break
+    if not dest_text.split("\n", 1)[0].strip().upper().startswith("#EXTM3U"):
+        dest_text = "#EXTM3U\n" + dest_text
 
+    # اسم العرض جزء من السطر، فالمطابقة على السطر كله تغطي الحالتين
+    edits = []
     used = set()
-    out: List[str] = []
-    i = 0
-    while i < len(lines):
-        if i in idx_to_official:
-            official = idx_to_official[i]
-            pair = picked.get(official)
-            if pair:
-                clean_extinf, url = pair
-                out.append(clean_extinf)
-                if url:
-                    out.append(url)
-                used.add(official)
-                # تخطّى السطر التالي إن كان URL قديم (غير تعليق)
-                if i + 1 < len(lines) and lines[i + 1].strip() and not lines[i + 1].strip().startswith("#"):
-                    i += 2
-                else:
-                    i += 1
-                continue
+    for slot in scan_slots(dest_text, key=ALIASES_MATCHER.first):
+        pair = picked.get(slot.key)
+        if not pair:
             # لو ما قدرنا نجيبها من المصدر لأي سبب، خليه القديم
-            out.append(lines[i])
-            i += 1
-        else:
-            out.append(lines[i])
-            i += 1
-
-    # أضف القنوات الناقصة بترتيب ثابت
+            continue
+        clean_extinf, url = pair
+        end = slot.extinf_end if slot.url_start is None else slot.url_end
+        edits.append((slot.extinf_start, end, clean_extinf + (f"\n{url}" if url else "")))
+        used.add(slot.key)
+    text = apply_edits(dest_text, edits)
+
+    # أضف القنوات الناقصة بترتيب ثابت (سطر فارغ قبل كل وحدة)
+    last_line = (text[:-1] if text.endswith("\n") else text).rsplit("\n", 1)[-1]
+    tail: List[str] = []
     for name in WANTED_CHANNELS:
         if name in used:
             continue
@@ -217,43 +135,44 @@ def render_updated(dest_text: str, picked: Dict[str, Tuple[str, Optional[str]]])
         if not pair:
             continue
         clean_extinf, url = pair
-        if out and out[-1].strip():
-            out.append("")
-        out.append(f"# --- {name} ---")
-        out.append(clean_extinf)
+        if tail or last_line.strip():
+            tail.append("")
+        tail.append(f"# --- {name} ---")
+        tail.append(clean_extinf)
         if url:
-            out.append(url)
+            tail.append(url)
+    if tail:
+        text = (text if text.endswith("\n") else text + "\n") + "\n".join(tail)
 
-    # نظف نهايات فارغة
-    while out and not out[-1].strip():
-        out.pop()
-
-    return "\n".join(out) + "\n"
+    # نظف نهايات فارغة (الأسطر الفارغة فقط)
+    return re.sub(r"\n\s*\Z", "", text) + "\n"
 
 # ---------- main ----------
 
-def main():
-    # 1) حمّل المصدر والوجهة
-    src_text = fetch_text(SOURCE_URL)
-    dest_text = fetch_text(DEST_RAW_URL)
-
-    # 2) حلّل المصدر والتقط القنوات المطلوبة بصيغة clean
-    pairs = parse_m3u_pairs(src_text)
-    picked = pick_wanted_clean(pairs)
+def render(source_pairs: Iterable[Tuple[str, Optional[str]]], dest_text: str) -> Optional[str]:
+    """
+    يلتقط القنوات المطلوبة بصيغة clean ويركّب ملف الوجهة المحدّث.
+    يرجّع None إذا ولا قناة انمسكت (لا نغيّر الملف).
+    """
+    with REPORT.stage("match", DEST_REPO_PATH) as st:
+        picked = pick_wanted_clean(source_pairs)
+        st.matches += len(picked)
 
     print("[i] Picked from source:")
     for name in WANTED_CHANNELS:
         print(f"  {'✓' if name in picked else 'x'} {name}")
 
-    # 3) إذا ولا وحدة انمسكت، لا تغيّر الملف
     if not any(n in picked for n in WANTED_CHANNELS):
         print("[!] No wanted channels found in source. Skipping update.")
-        return
+        return None
 
-    # 4) ركّب ملف الوجهة المحدّث
-    updated = render_updated(dest_text, picked)
+    with REPORT.stage("render", DEST_REPO_PATH) as st:
+        updated = render_updated(dest_text, picked)
+        st.bytes += len(updated.encode("utf-8"))
+    return updated
 
-    # 5) اكتب إلى GitHub أو محلياً
+def publish(updated: str, remote_text: Optional[str] = None) -> None:
+    """اكتب إلى GitHub أو محلياً."""
     token = GITHUB_TOKEN
     if token:
         print(f"[i] Updating GitHub: {GITHUB_REPO}@{GITHUB_BRANCH}:{DEST_REPO_PATH}")
@@ -264,8 +183,10 @@ def main():
             content_bytes=updated.encode("utf-8"),
             message=COMMIT_MESSAGE,
             token=token,
+            remote_content=remote_text.encode("utf-8") if remote_text is not None else None,
         )
-        print("[✓] Updated:", res.get("content", {}).get("path"))
+        if res is not None:
+            print("[✓] Updated:", res.get("content", {}).get("path"))
     else:
         out_path = OUTPUT_LOCAL_PATH
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
@@ -273,9 +194,26 @@ def main():
             f.write(updated)
         print("[i] Wrote locally:", os.path.abspath(out_path))
 
+def main():
+    # 1) حمّل المصدر والوجهة
+    src_text, dest_text = fetch_texts(SOURCE_URL, DEST_RAW_URL)  # بالتوازي
+    if src_text.not_modified and dest_text.not_modified:
+        print("[i] Source and destination not modified (304). Nothing to do.")
+        return
+
+    # 2+3+4) حلّل المصدر، التقط القنوات، وركّب ملف الوجهة
+    updated = render(counted(iter_pairs(src_text), REPORT.get("parse", SOURCE_URL)), dest_text)
+
+    # 5) اكتب إلى GitHub أو محلياً
+    if updated is not None:
+        publish(updated, dest_text)
+    # التشغيل نجح: ثبّت ETag/Last-Modified حتى التشغيل الجاي يحصل 304
+    commit_cache()
+
 if __name__ == "__main__":
     try:
-        main()
+        with REPORT.run("pull_match_football_from_daddylive"):
+            main()
     except Exception as e:
         print("[x] Error:", e)
         sys.exit(1)
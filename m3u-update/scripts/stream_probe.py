@@ -0,0 +1,146 @@
+# scripts/stream_probe.py
+# -*- coding: utf-8 -*-
+"""
+ترتيب روابط المرشحين حسب القياس بدل الاسم فقط (اختياري: PROBE_STREAMS=1).
+
+لكل رابط مرشح (بالتوازي ومع timeouts قصيرة):
+1) نجيب الـmanifest ونقيس time-to-first-byte.
+2) إذا master playlist ناخذ أول variant ونجيب الـmedia playlist.
+3) نحمّل بداية أول segment (لحد PROBE_SEGMENT_BYTES) ونقيس الـbitrate الفعلي.
+
+الترتيب: الروابط الشغّالة أولاً، بعدين TTFB الأقل، بعدين bitrate الأعلى
+(الاثنين بفئات تقريبية حتى الفروق الصغيرة ما تحسم)، وسكور الاسم يفصل التعادل.
+بدون PROBE_STREAMS الترتيب يبقى بالاسم فقط مثل قبل.
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from http_fetch import make_session
+
+PROBE_STREAMS = os.getenv("PROBE_STREAMS", "0") == "1"
+PROBE_TIMEOUT = float(os.getenv("PROBE_TIMEOUT", "4"))
+PROBE_CONCURRENCY = int(os.getenv("PROBE_CONCURRENCY", "16"))
+PROBE_MAX_CANDIDATES = int(os.getenv("PROBE_MAX_CANDIDATES", "5"))   # لكل قناة (الأعلى سكور)
+PROBE_SEGMENT_BYTES = 512 * 1024
+
+TTFB_BUCKET = 0.1        # ثانية
+BITRATE_BUCKET = 500.0   # kbit/s
+
+PROBE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+
+class ProbeResult(NamedTuple):
+    url: str
+    ok: bool
+    ttfb: float = float("inf")      # ثانية (طلب الـmanifest)
+    kbps: float = 0.0               # bitrate المقاس على أول segment
+    error: Optional[str] = None
+
+
+def _first_uri(playlist: str) -> Optional[str]:
+    for ln in playlist.splitlines():
+        ln = ln.strip()
+        if ln and not ln.startswith("#"):
+            return ln
+    return None
+
+
+async def _read_limited(resp: aiohttp.ClientResponse, limit: int) -> int:
+    got = 0
+    async for chunk in resp.content.iter_chunked(64 * 1024):
+        got += len(chunk)
+        if got >= limit:
+            break
+    return got
+
+
+async def probe_url(session: aiohttp.ClientSession, url: str) -> ProbeResult:
+    try:
+        t0 = time.perf_counter()
+        async with session.get(url, headers=PROBE_HEADERS) as resp:
+            ttfb = time.perf_counter() - t0
+            resp.raise_for_status()
+            ctype = resp.headers.get("Content-Type", "").lower()
+            if "mpegurl" not in ctype and not url.split("?")[0].endswith((".m3u8", ".m3u")):
+                # مو HLS: الرابط نفسه هو الميديا
+                t1 = time.perf_counter()
+                n = await _read_limited(resp, PROBE_SEGMENT_BYTES)
+                return ProbeResult(url, n > 0, ttfb, n * 8 / 1000 / max(time.perf_counter() - t1, 1e-3))
+            manifest = await resp.text(errors="replace")
+            base = str(resp.url)
+
+        if "#EXT-X-STREAM-INF" in manifest:
+            variant = _first_uri(manifest)
+            if not variant:
+                return ProbeResult(url, False, ttfb, error="empty master playlist")
+            base = urljoin(base, variant)
+            async with session.get(base, headers=PROBE_HEADERS) as resp:
+                resp.raise_for_status()
+                manifest = await resp.text(errors="replace")
+
+        segment = _first_uri(manifest)
+        if not segment:
+            return ProbeResult(url, False, ttfb, error="no media segment")
+        t1 = time.perf_counter()
+        async with session.get(urljoin(base, segment), headers=PROBE_HEADERS) as resp:
+            resp.raise_for_status()
+            n = await _read_limited(resp, PROBE_SEGMENT_BYTES)
+        elapsed = max(time.perf_counter() - t1, 1e-3)
+        return ProbeResult(url, n > 0, ttfb, n * 8 / 1000 / elapsed)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        return ProbeResult(url, False, error=f"{type(e).__name__}: {e}")
+
+
+async def probe_all_async(urls: Iterable[str]) -> Dict[str, ProbeResult]:
+    unique = list(dict.fromkeys(urls))
+    sem = asyncio.Semaphore(PROBE_CONCURRENCY)
+    async with make_session(limit=PROBE_CONCURRENCY, limit_per_host=4, timeout=PROBE_TIMEOUT) as session:
+        async def one(u: str) -> ProbeResult:
+            async with sem:
+                return await probe_url(session, u)
+        results = await asyncio.gather(*(one(u) for u in unique))
+    return dict(zip(unique, results))
+
+
+def probe_all(urls: Iterable[str]) -> Dict[str, ProbeResult]:
+    return asyncio.run(probe_all_async(urls))
+
+
+def rank_key(probe: ProbeResult, name_score: int) -> Tuple:
+    ttfb = round(probe.ttfb / TTFB_BUCKET) if probe.ok else float("inf")
+    return (not probe.ok, ttfb, -int(probe.kbps // BITRATE_BUCKET), -name_score)
+
+
+def pick_best(candidates: Dict[str, List[Tuple[str, str]]],
+              score: Callable[[Tuple[str, str]], int],
+              probe: Optional[bool] = None) -> Dict[str, str]:
+    """
+    {channel: [(extinf, url), ...]} -> {channel: best_url}
+    كل مرشحين كل القنوات ينفحصون بدفعة async وحدة.
+    """
+    probe = PROBE_STREAMS if probe is None else probe
+    by_name = {name: sorted(lst, key=score, reverse=True) for name, lst in candidates.items() if lst}
+    if not probe:
+        return {name: lst[0][1] for name, lst in by_name.items()}
+
+    shortlist = {name: lst[:PROBE_MAX_CANDIDATES] for name, lst in by_name.items()}
+    results = probe_all(url for lst in shortlist.values() for _, url in lst)
+
+    picked: Dict[str, str] = {}
+    for name, lst in shortlist.items():
+        best = min(lst, key=lambda item: rank_key(results[item[1]], score(item)))
+        r = results[best[1]]
+        if r.ok:
+            print(f"[i] Probe {name}: ttfb={r.ttfb * 1000:.0f}ms bitrate={r.kbps:.0f}kbps")
+        else:
+            print(f"[!] Probe {name}: no working mirror, keeping best by name ({r.error})")
+        picked[name] = best[1]
+    return picked
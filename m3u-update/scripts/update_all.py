@@ -0,0 +1,162 @@
+# scripts/update_all.py
+# -*- coding: utf-8 -*-
+"""
+تشغيل واحد لكل ملفات الوجهة المشتقّة من daddylive
+(premierleague.m3u, generalsports.m3u, dazn.m3u, bein.m3u):
+
+- كل مصدر (SOURCE_URL) مميّز ينحمّل ويتحلّل مرة وحدة فقط، بمرور واحد على
+  المولّد: ينحفظ بس الأزواج اللي تهم وجهة وحدة على الأقل (wanted)، مو كل المصدر.
+- كل وجهة تطبّق قواعدها (render) على نفس النتيجة المحلّلة، وبعدين تكتب (publish).
+- إذا المصدر والوجهة رجعوا 304 (كاش http_fetch) الوجهة تنتخطّى بدون تحليل/كتابة.
+- الكتابة على GitHub تنجمع: كل الملفات المتغيّرة بنفس repo@branch تنكتب بـcommit
+  واحد (BatchCommit)، بدل GET+PUT وcommit لكل ملف.
+- فشل وجهة وحدة ما يوقف الباقي؛ الكود النهائي 1 إذا أي وجهة فشلت.
+- جدول حسب انتهاء الروابط (expiry_index): الوجهة تتحدّث قبل أقرب expires
+  لروابطها بـEXPIRY_MARGIN، وقبلها تنتخطّى بدون أي تحميل.
+- تقرير لكل مرحلة/هدف (run_report): .cache/reports/update_all.json و .prom
+
+إعدادات كل وجهة (DEST_RAW_URL, GITHUB_REPO, DEST_REPO_PATH ...) تبقى بسكربتها.
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+from expiry_index import RefreshSchedule, fmt_ts
+from github_publish import BatchCommit
+from http_fetch import commit_cache, fetch_all
+from m3u_stream import iter_pairs
+from run_report import REPORT
+import pull_channels_and_update
+import pull_match_football_from_daddylive
+import update_bein_urls
+import update_dazn_pt
+
+DESTINATIONS = [
+    pull_channels_and_update,
+    pull_match_football_from_daddylive,
+    update_dazn_pt,
+    update_bein_urls,
+]
+
+def group_by_source(destinations) -> Dict[str, List]:
+    groups: Dict[str, List] = {}
+    for dest in destinations:
+        groups.setdefault(dest.SOURCE_URL, []).append(dest)
+    return groups
+
+def source_candidates(src_text: str, dests, stats=None) -> List[Tuple[str, str]]:
+    """
+    مرور واحد على المصدر: (extinf, url) اللي تهم أي وجهة من dests، بنفس الترتيب.
+    الباقي ما ينحفظ، فالذاكرة تكبر بعدد القنوات المطلوبة مو بحجم المصدر.
+    """
+    out: List[Tuple[str, str]] = []
+    for extinf, url in iter_pairs(src_text):
+        if stats is not None:
+            stats.entries += 1
+        if url and any(d.wanted(extinf) for d in dests):
+            out.append((extinf, url))
+    return out
+
+def batch_message(dests) -> str:
+    paths = ", ".join(d.DEST_REPO_PATH for d in dests)
+    body = "\n".join(f"- {d.COMMIT_MESSAGE}" for d in dests)
+    return f"chore: auto-update playlists ({paths})\n\n{body}"
+
+def main(destinations=DESTINATIONS) -> int:
+    schedule = RefreshSchedule()
+    due = []
+    for dest in destinations:
+        if schedule.is_due(dest.DEST_RAW_URL):
+            due.append(dest)
+        else:
+            print(f"[i] == {dest.__name__}: tokens still valid, next refresh {fmt_ts(schedule.next_refresh(dest.DEST_RAW_URL))}")
+    if not due:
+        print("[i] Nothing due for refresh")
+        return 0
+    destinations = due
+    groups = group_by_source(destinations)
+
+    # كل المصادر وكل الوجهات تنحمّل بالتوازي على نفس الـpool
+    urls = list(groups) + [d.DEST_RAW_URL for d in destinations]
+    fetched = fetch_all(urls, return_exceptions=True)
+
+    batches: Dict[Tuple[str, str], BatchCommit] = {}
+    batched: Dict[Tuple[str, str], List] = {}
+    # نص كل وجهة نجحت (بعد التحديث) -> نحسب منه موعد التحديث الجاي
+    done: Dict[str, str] = {}
+
+    failed = 0
+    for source_url, dests in groups.items():
+        print(f"[i] Source: {source_url} -> {len(dests)} destination(s)")
+        src_text = fetched[source_url]
+        if isinstance(src_text, BaseException):
+            print("[x] Source fetch failed:", src_text)
+            failed += len(dests)
+            continue
+
+        # 304 للمصدر وللوجهة = نفس المدخلات، نتخطّى الوجهة كلها
+        changed = [d for d in dests
+                   if not (src_text.not_modified and getattr(fetched[d.DEST_RAW_URL], "not_modified", False))]
+        for dest in dests:
+            if dest not in changed:
+                print(f"[i] == {dest.__name__}: not modified (304), skipped")
+                done[dest.DEST_RAW_URL] = fetched[dest.DEST_RAW_URL]
+        if not changed:
+            continue
+
+        # تحليل واحد مشترك لكل الوجهات
+        with REPORT.stage("parse", source_url) as st:
+            pairs = source_candidates(src_text, changed, st)
+        print(f"[i] Parsed {st.entries} entries, {len(pairs)} candidates kept")
+
+        for dest in changed:
+            name = dest.__name__
+            print(f"[i] == {name}: {dest.DEST_RAW_URL}")
+            try:
+                dest_text = fetched[dest.DEST_RAW_URL]
+                if isinstance(dest_text, BaseException):
+                    raise dest_text
+                updated = dest.render(pairs, dest_text)
+                if updated is None:
+                    done[dest.DEST_RAW_URL] = dest_text
+                    continue
+                if dest.GITHUB_TOKEN:
+                    key = (dest.GITHUB_REPO, dest.GITHUB_BRANCH)
+                    if key not in batches:
+                        batches[key] = BatchCommit(dest.GITHUB_REPO, dest.GITHUB_BRANCH, dest.GITHUB_TOKEN, "")
+                    if batches[key].add(dest.DEST_REPO_PATH, updated.encode("utf-8"), dest_text.encode("utf-8")):
+                        batched.setdefault(key, []).append(dest)
+                else:
+                    dest.publish(updated)
+                done[dest.DEST_RAW_URL] = updated
+            except Exception as e:
+                print(f"[x] {name} failed:", e)
+                failed += 1
+
+    # commit واحد لكل repo@branch
+    for key, dests in batched.items():
+        batch = batches[key]
+        batch.message = batch_message(dests)
+        try:
+            batch.commit()
+        except Exception as e:
+            print(f"[x] Commit to {key[0]}@{key[1]} failed:", e)
+            failed += len(dests)
+            for dest in dests:
+                done.pop(dest.DEST_RAW_URL, None)
+
+    for key, text in done.items():
+        schedule.record(key, text)
+    schedule.save()
+
+    # إذا أي وجهة فشلت ما نثبّت الكاش، حتى التشغيل الجاي يعيد المعالجة
+    if failed:
+        REPORT.failed = True
+        return 1
+    commit_cache()
+    return 0
+
+if __name__ == "__main__":
+    with REPORT.run("update_all"):
+        rc = main()
+    sys.exit(rc)
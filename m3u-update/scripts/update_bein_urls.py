@@ -5,9 +5,15 @@
 ويحدث bein.m3u بإبقاء الاسماء مثل ما هي (#EXTINF:-1,beIN SPORTS 6 ...).
 """
 
-import os, re, base64, requests
+import os, re
 from pathlib import Path
 
+from channel_matcher import ChannelMatcher
+from github_publish import upsert_github_file
+from http_fetch import commit_cache, fetch_texts
+from m3u_stream import iter_pairs
+from run_report import REPORT, counted
+
 SOURCE_URL = "https://raw.githubusercontent.com/DisabledAbel/daddylivehd-m3u/f582ae100c91adf8c8db905a8f97beb42f369a0b/daddylive-events.m3u8"
 DEST_RAW_URL = "https://raw.githubusercontent.com/amouradore/chaine-en-live/main/www/bein.m3u"
 
@@ -18,7 +24,6 @@ DEST_REPO_PATH = "www/bein.m3u"
 COMMIT_MESSAGE = "chore: update bein.m3u (replace 6-9 URLs)"
 
 OUTPUT_LOCAL_PATH = "./out/bein.m3u"
-TIMEOUT = 25
 
 # mapping: الاسم في الملف -> regex بالـ source
 MAP = {
@@ -28,33 +33,16 @@ MAP = {
     "beIN SPORTS 9": re.compile(r"BEIN\s+SPORTS.*9", re.I),
 }
 
-def fetch_text(url: str) -> str:
-    r = requests.get(url, timeout=TIMEOUT)
-    r.raise_for_status()
-    return r.text
+MATCHER = ChannelMatcher({name: [pat] for name, pat in MAP.items()})
 
-def parse_pairs(m3u: str):
-    lines = [ln.strip() for ln in m3u.splitlines() if ln.strip()]
-    out = []
-    i = 0
-    while i < len(lines):
-        if lines[i].startswith("#EXTINF"):
-            url = lines[i+1] if i+1 < len(lines) and not lines[i+1].startswith("#") else None
-            out.append((lines[i], url))
-            i += 2
-        else:
-            i += 1
-    return out
+def wanted(extinf):
+    """السطر يخص هذي الوجهة؟ (update_all يحتفظ بس بهالأزواج من المصدر)"""
+    return MATCHER.first(extinf) is not None
 
-def pick_urls(src_text: str):
-    pairs = parse_pairs(src_text)
-    picked = {}
-    for ext, url in pairs:
-        for name, pat in MAP.items():
-            if name in picked: continue
-            if pat.search(ext):
-                picked[name] = url
-    return picked
+def pick_urls(pairs):
+    # أول تطابق لكل قناة، بمرور واحد على المصدر
+    cands = MATCHER.classify(pairs)
+    return {name: lst[0][1] for name, lst in cands.items() if lst}
 
 def update_dest(dest_text: str, urls: dict):
     lines = dest_text.splitlines()
@@ -80,37 +68,38 @@ def update_dest(dest_text: str, urls: dict):
         i += 1
     return "\n".join(out) + "\n"
 
-def upsert_github(path: str, content: str):
-    import json
-    api = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path}"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"}
-    sha = None
-    res = requests.get(api, headers=headers, params={"ref": GITHUB_BRANCH}, timeout=TIMEOUT)
-    if res.status_code == 200:
-        sha = res.json().get("sha")
-    payload = {
-        "message": COMMIT_MESSAGE,
-        "content": base64.b64encode(content.encode()).decode(),
-        "branch": GITHUB_BRANCH,
-    }
-    if sha: payload["sha"] = sha
-    put = requests.put(api, headers=headers, json=payload, timeout=TIMEOUT)
-    if put.status_code not in (200,201):
-        raise RuntimeError(f"GitHub PUT failed {put.status_code}: {put.text}")
+def upsert_github(path: str, content: str, remote_text: str = None):
+    return upsert_github_file(GITHUB_REPO, GITHUB_BRANCH, path, content.encode(), COMMIT_MESSAGE, GITHUB_TOKEN,
+                              remote_content=remote_text.encode() if remote_text is not None else None)
 
-def main():
-    src = fetch_text(SOURCE_URL)
-    dest = fetch_text(DEST_RAW_URL)
-    urls = pick_urls(src)
+def render(pairs, dest_text: str):
+    with REPORT.stage("match", DEST_REPO_PATH) as st:
+        urls = pick_urls(pairs)
+        st.matches += len(urls)
     print("[i] Picked URLs:", urls)
-    updated = update_dest(dest, urls)
+    with REPORT.stage("render", DEST_REPO_PATH) as st:
+        updated = update_dest(dest_text, urls)
+        st.bytes += len(updated.encode("utf-8"))
+    return updated
+
+def publish(updated: str, remote_text: str = None):
     if GITHUB_TOKEN:
-        upsert_github(DEST_REPO_PATH, updated)
-        print("[✓] Updated bein.m3u on GitHub")
+        if upsert_github(DEST_REPO_PATH, updated, remote_text) is not None:
+            print("[✓] Updated bein.m3u on GitHub")
     else:
         Path(OUTPUT_LOCAL_PATH).parent.mkdir(parents=True, exist_ok=True)
         Path(OUTPUT_LOCAL_PATH).write_text(updated, encoding="utf-8")
         print("[i] Written locally:", OUTPUT_LOCAL_PATH)
 
+def main():
+    src, dest = fetch_texts(SOURCE_URL, DEST_RAW_URL)  # بالتوازي
+    if src.not_modified and dest.not_modified:
+        print("[i] Source and destination not modified (304). Nothing to do.")
+        return
+    publish(render(counted(iter_pairs(src), REPORT.get("parse", SOURCE_URL)), dest), dest)
+    # التشغيل نجح: ثبّت ETag/Last-Modified حتى التشغيل الجاي يحصل 304
+    commit_cache()
+
 if __name__ == "__main__":
-    main()
+    with REPORT.run("update_bein_urls"):
+        main()
@@ -9,10 +9,16 @@
 import os
 import re
 import sys
-import base64
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
-import requests
+from typing import Iterable, Tuple, Dict, Optional
+
+from channel_matcher import ChannelMatcher
+from github_publish import upsert_github_file
+from http_fetch import commit_cache, fetch_texts
+from m3u_index import patch_urls
+from m3u_stream import iter_pairs
+from run_report import REPORT, counted
+from stream_probe import pick_best
 
 # ===== إعدادات (نفس معلماتك) =====
 SOURCE_URL = os.getenv(
@@ -31,9 +37,6 @@ DEST_REPO_PATH = os.getenv("DEST_REPO_PATH", "dazn.m3u")
 COMMIT_MESSAGE = os.getenv("COMMIT_MESSAGE", "chore: update DAZN ELEVEN PT (1/2/3) URLs")
 OUTPUT_LOCAL_PATH = os.getenv("OUTPUT_LOCAL_PATH", "./out/dazn.m3u")
 
-TIMEOUT = 25
-VERIFY_SSL = True
-
 # ===== القنوات الهدف =====
 # نلتقط من "المصدر": DAZN ELEVEN {1..3} PORTUGAL / ELEVEN SPORTS {1..3} (PT)
 # ونحدّث في "الوجهة": DAZN {1..3} حصراً (لا نلمس DAZN 4..6).
@@ -58,51 +61,29 @@ def dest_regex_for(num: int) -> re.Pattern:
     # أمثلة صالحة: "#EXTINF:-1,DAZN 1", "#EXTINF:-1 tvg-id=...,DAZN 1 HD"
     return re.compile(rf"^#EXTINF[^,]*,\s*DAZN\s*{num}\b.*$", re.I)
 
+SOURCE_MATCHER = ChannelMatcher({name: source_patterns_for(num) for name, num in WANTED.items()})
+# بُنيّة مطابقة الوجهة فقط لـ DAZN 1/2/3
+DEST_MATCHER = ChannelMatcher({num: [dest_regex_for(num)] for num in (1, 2, 3)})
+
 # ===== مساعدات =====
-def fetch_text(url: str) -> str:
-    r = requests.get(url, timeout=TIMEOUT, verify=VERIFY_SSL)
-    r.raise_for_status()
-    return r.text
-
-def parse_pairs(m3u_text: str) -> List[Tuple[str, Optional[str]]]:
-    lines = [ln.rstrip("\n") for ln in m3u_text.splitlines()]
-    out: List[Tuple[str, Optional[str]]] = []
-    i = 0
-    while i < len(lines):
-        ln = lines[i].strip()
-        if ln.startswith("#EXTINF"):
-            url = None
-            if i + 1 < len(lines):
-                nxt = lines[i + 1].strip()
-                if nxt and not nxt.startswith("#"):
-                    url = nxt
-            out.append((lines[i], url))
-            i += 2
-            continue
-        i += 1
-    return out
-
-def pick_from_source(pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
-    picked: Dict[str, str] = {}
-    for name, num in WANTED.items():
-        pats = source_patterns_for(num)
-        cands: list[Tuple[str,str]] = []
-        for extinf, url in pairs:
-            if not url: 
-                continue
-            if any(p.search(extinf) for p in pats):
-                cands.append((extinf, url))
-
-        if cands:
-            # نفضّل UHD/4K/FHD/HD + EN إذا موجود
-            def score(item: Tuple[str, str]) -> int:
-                ext = item[0].lower()
-                sc = 0
-                if any(q in ext for q in (" uhd", " 4k", " fhd", " hd")): sc += 2
-                if re.search(r"\b(en|english)\b", ext): sc += 1
-                return sc
-            best = sorted(cands, key=score, reverse=True)[0]
-            picked[name] = best[1]
+def wanted(extinf: str) -> bool:
+    """السطر يخص هذي الوجهة؟ (update_all يحتفظ بس بهالأزواج من المصدر)"""
+    return SOURCE_MATCHER.first(extinf) is not None
+
+def pick_from_source(pairs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+    # مرور واحد على المصدر لكل القنوات مع بعض
+    cands = SOURCE_MATCHER.classify(pairs)
+
+    # نفضّل UHD/4K/FHD/HD + EN إذا موجود
+    def score(item: Tuple[str, str]) -> int:
+        ext = item[0].lower()
+        sc = 0
+        if any(q in ext for q in (" uhd", " 4k", " fhd", " hd")): sc += 2
+        if re.search(r"\b(en|english)\b", ext): sc += 1
+        return sc
+
+    # PROBE_STREAMS=1: الأسرع فعليًا (TTFB/bitrate) والسكور يفصل التعادل
+    picked = pick_best(cands, score)
 
     print("[i] Source picks:")
     for k in WANTED.keys():
@@ -110,102 +91,71 @@ def pick_from_source(pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
     return picked
 
 def update_dest_urls_only(dest_text: str, picked: Dict[str,str]) -> Tuple[str,int]:
-    lines = [ln.rstrip("\n") for ln in dest_text.splitlines()]
-    if not lines or not lines[0].strip().upper().startswith("#EXTM3U"):
-        lines = ["#EXTM3U"] + lines
+    if not dest_text.split("\n", 1)[0].strip().upper().startswith("#EXTM3U"):
+        dest_text = "#EXTM3U\n" + dest_text
 
-    # بُنيّة مطابقة الوجهة فقط لـ DAZN 1/2/3
-    dest_pats: Dict[int,re.Pattern] = {num: dest_regex_for(num) for num in (1,2,3)}
     # خريطة تحويل: أي DAZN {n} بالوجهة -> أي قناة مصدر نقابلها
     wanted_by_num: Dict[int, str] = {num: f"DAZN ELEVEN {num} PORTUGAL" for num in (1,2,3)}
+    urls_by_num = {num: picked[key] for num, key in wanted_by_num.items() if key in picked}
 
-    out: List[str] = []
-    i = 0
+    # سطر الرابط فقط يتبدّل (مواقع الأسطر عبر m3u_index)، الـEXTINF والترتيب ما يتغيّرون
+    updated, changes = patch_urls(dest_text, urls_by_num, key=DEST_MATCHER.first)
     updates = 0
-
-    while i < len(lines):
-        ln = lines[i]
-        if ln.strip().startswith("#EXTINF"):
-            matched_num = None
-            for num, pat in dest_pats.items():
-                if pat.search(ln):
-                    matched_num = num
-                    break
-
-            if matched_num:
-                wanted_key = wanted_by_num[matched_num]
-                if wanted_key in picked:
-                    out.append(ln)  # لا تغيّر الـEXTINF إطلاقًا
-                    new_url = picked[wanted_key]
-                    # إذا اللي بعده URL: بدّله، وإلا أدرجه
-                    if i + 1 < len(lines) and lines[i + 1].strip() and not lines[i + 1].strip().startswith("#"):
-                        old_url = lines[i + 1]
-                        if old_url != new_url:
-                            updates += 1
-                            print(f"[i] Updated URL for: DAZN {matched_num}")
-                        else:
-                            print(f"[i] URL already up-to-date: DAZN {matched_num}")
-                        out.append(new_url)
-                        i += 2
-                        continue
-                    else:
-                        updates += 1
-                        print(f"[i] Inserted URL for: DAZN {matched_num}")
-                        out.append(new_url)
-                        i += 1
-                        continue
-
-        out.append(ln)
-        i += 1
-
-    return ("\n".join(out).rstrip() + "\n", updates)
-
-def upsert_github_file(repo: str, branch: str, path_in_repo: str, content_bytes: bytes, message: str, token: str):
-    base = "https://api.github.com"
-    url = f"{base}/repos/{repo}/contents/{path_in_repo}"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
-
-    sha = None
-    get_res = requests.get(url, headers=headers, params={"ref": branch}, timeout=TIMEOUT)
-    if get_res.status_code == 200:
-        sha = get_res.json().get("sha")
-
-    payload = {"message": message, "content": base64.b64encode(content_bytes).decode("utf-8"), "branch": branch}
-    if sha:
-        payload["sha"] = sha
-
-    put_res = requests.put(url, headers=headers, json=payload, timeout=TIMEOUT)
-    if put_res.status_code not in (200, 201):
-        raise RuntimeError(f"GitHub PUT failed: {put_res.status_code} {put_res.text}")
-    return put_res.json()
-
-def main():
-    # 1) المصدر & الوجهة
-    src_text = fetch_text(SOURCE_URL)
-    dest_text = fetch_text(DEST_RAW_URL)
-
-    # 2) التقط روابط DAZN ELEVEN PT 1/2/3 من المصدر
-    pairs = parse_pairs(src_text)
-    picked = pick_from_source(pairs)
-
-    # 3) حدّث فقط DAZN 1/2/3 في الوجهة (استبدال سطر الرابط الذي يلي الـEXTINF)
-    updated, n_up = update_dest_urls_only(dest_text, picked)
-
-    # 4) كتابة
+    for num, status in changes:
+        if status == "same":
+            print(f"[i] URL already up-to-date: DAZN {num}")
+            continue
+        updates += 1
+        print(f"[i] {status.capitalize()} URL for: DAZN {num}")
+
+    return (updated.rstrip() + "\n", updates)
+
+def render(pairs: Iterable[Tuple[str, Optional[str]]], dest_text: str) -> Optional[str]:
+    # التقط روابط DAZN ELEVEN PT 1/2/3 من المصدر
+    with REPORT.stage("match", DEST_REPO_PATH) as st:
+        picked = pick_from_source(pairs)
+        st.matches += len(picked)
+    # حدّث فقط DAZN 1/2/3 في الوجهة (استبدال سطر الرابط الذي يلي الـEXTINF)
+    with REPORT.stage("render", DEST_REPO_PATH) as st:
+        updated, n_up = update_dest_urls_only(dest_text, picked)
+        st.bytes += len(updated.encode("utf-8"))
+    print(f"[i] Updates: {n_up}")
+    return updated
+
+def publish(updated: str, remote_text: Optional[str] = None) -> None:
     token = GITHUB_TOKEN
     if token:
         print(f"[i] Writing to GitHub: {GITHUB_REPO}@{GITHUB_BRANCH}:{DEST_REPO_PATH}")
-        upsert_github_file(GITHUB_REPO, GITHUB_BRANCH, DEST_REPO_PATH, updated.encode("utf-8"), COMMIT_MESSAGE, token)
-        print(f"[✓] Done. Updates: {n_up}")
+        res = upsert_github_file(GITHUB_REPO, GITHUB_BRANCH, DEST_REPO_PATH, updated.encode("utf-8"), COMMIT_MESSAGE, token,
+                                 remote_content=remote_text.encode("utf-8") if remote_text is not None else None)
+        if res is not None:
+            print("[✓] Done.")
     else:
         p = Path(OUTPUT_LOCAL_PATH)
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text(updated, encoding="utf-8")
-        print(f"[i] Wrote locally: {p.resolve()} | Updates: {n_up}")
+        print(f"[i] Wrote locally: {p.resolve()}")
+
+def main():
+    # 1) المصدر & الوجهة
+    src_text, dest_text = fetch_texts(SOURCE_URL, DEST_RAW_URL)  # بالتوازي
+    if src_text.not_modified and dest_text.not_modified:
+        print("[i] Source and destination not modified (304). Nothing to do.")
+        return
+
+    # 2+3) التقط الروابط وحدّث الوجهة
+    updated = render(counted(iter_pairs(src_text), REPORT.get("parse", SOURCE_URL)), dest_text)
+
+    # 4) كتابة
+    if updated is not None:
+        publish(updated, dest_text)
+    # التشغيل نجح: ثبّت ETag/Last-Modified حتى التشغيل الجاي يحصل 304
+    commit_cache()
 
 if __name__ == "__main__":
     try:
-        main()
+        with REPORT.run("update_dazn_pt"):
+            main()
     except Exception as e:
         print("[x] Error:", e)
         sys.exit(1)
@@ -1,123 +1,346 @@
 
+import asyncio
 import xml.etree.ElementTree as ET
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
 import re
-from concurrent.futures import ThreadPoolExecutor
+import time
 import logging
+from collections import Counter
+import os
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:  # lxml absent : extraction BeautifulSoup uniquement
+    lxml_html = None
+
+# Rapport d'exécution : copie de m3u-update/scripts/run_report.py (gardée identique par tests/test_run_report.py)
+from run_report import REPORT
+from livetv_cache import LIVETV_CACHE_ENABLED, EventCache, content_hash
+from livetv_urls import UrlIndex
+from livetv_http import LIVETV_WORKERS, AsyncHostLimiter, make_async_session, polite_get_async
+
+# Analyseur des pages d'événement : "lxml" (rapide, défaut) ou "bs4"
+LIVETV_PARSER = os.getenv("LIVETV_PARSER", "lxml")
+
+BROADCAST_CLASS = re.compile(r'broadc(a|á)st')
+CL_ONCLICK = re.compile(r"cl\(this, '(.+?)'\)")
+PLAYER_HREF = re.compile(r'/es/showvideo/\d+/|/es/webplayer/\d+/')
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def find_web_player_links(event_url):
+def extract_player_links(html):
     """
-    Visite une page d'événement de livetv.sx et cherche des liens de lecteurs web.
+    Extrait les liens de lecteurs web d'une page d'événement déjà téléchargée.
+    lxml (C) si disponible, sinon / en cas d'échec BeautifulSoup.
     """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://livetv.sx/es/'
-        }
-        response = requests.get(event_url, headers=headers, timeout=15, verify=False)
-        if response.status_code != 200:
-            logging.warning(f"Impossible d'accéder à {event_url}, status code: {response.status_code}")
-            return []
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Cible les liens qui sont dans des cellules de tableau avec une description de lecteur
-        # et qui ne contiennent pas 'acestream' dans leur URL.
-        player_links = []
-        
-        # Stratégie 1: Chercher les liens dans les descriptions de diffusion
-        broadcast_tables = soup.find_all('table', class_=re.compile(r'broadc(a|á)st'))
-        for table in broadcast_tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                link_cell = row.find('td', class_='live')
-                if link_cell:
-                    link = link_cell.find('a', href=True)
-                    if link and 'acestream:' not in link['href'] and 'sop:' not in link['href']:
-                        # Essayer d'obtenir une URL plus directe si elle est cachée
-                        onclick_attr = link.get('onclick')
-                        if onclick_attr:
-                            # Extrait l'URL d'une fonction JavaScript comme "return cl(this, '...'))"
-                            match = re.search(r"cl\(this, '(.+?)'\)", onclick_attr)
-                            if match:
-                                player_url = f"https://livetv.sx{match.group(1)}"
-                                player_links.append(player_url)
-                                logging.info(f"Lien de lecteur web trouvé (via JS) : {player_url}")
-                        else:
-                            player_url = link['href']
-                            if not player_url.startswith('http'):
-                                player_url = f"https://livetv.sx{player_url}"
-                            player_links.append(player_url)
-                            logging.info(f"Lien de lecteur web trouvé : {player_url}")
-
-        # Si aucune table de diffusion n'est trouvée, essayer une recherche plus générale
-        if not player_links:
-            all_links = soup.find_all('a', href=re.compile(r'/es/showvideo/\d+/|/es/webplayer/\d+/'))
-            for link in all_links:
-                if 'acestream:' not in link['href']:
-                    player_url = link['href']
-                    if not player_url.startswith('http'):
-                        player_url = f"https://livetv.sx{player_url}"
+    if LIVETV_PARSER == "lxml" and lxml_html is not None:
+        try:
+            return extract_player_links_lxml(html)
+        except (etree.ParserError, ValueError) as e:
+            logging.debug(f"lxml n'a pas pu analyser la page ({e}), retour à BeautifulSoup")
+    return extract_player_links_bs4(html)
+
+
+def _absolute(player_url):
+    return player_url if player_url.startswith('http') else f"https://livetv.sx{player_url}"
+
+
+def extract_player_links_lxml(html):
+    """
+    Même résultat que extract_player_links_bs4, mais l'arbre est construit par
+    lxml et on ne parcourt que les tables de diffusion (XPath) au lieu de tout
+    l'arbre BeautifulSoup.
+    """
+    doc = lxml_html.document_fromstring(html)
+    player_links = []
+
+    # Stratégie 1: lignes des tables de diffusion (class ~ broadcast / broadcást)
+    for table in doc.xpath("//table[contains(@class, 'broadc')]"):
+        if not BROADCAST_CLASS.search(table.get('class', '')):
+            continue
+        for row in table.iter('tr'):
+            link_cell = row.xpath(".//td[contains(concat(' ', normalize-space(@class), ' '), ' live ')][1]")
+            if not link_cell:
+                continue
+            link = link_cell[0].xpath(".//a[@href][1]")
+            if not link:
+                continue
+            href = link[0].get('href')
+            if 'acestream:' in href or 'sop:' in href:
+                continue
+            onclick_attr = link[0].get('onclick')
+            if onclick_attr:
+                match = CL_ONCLICK.search(onclick_attr)
+                if match:
+                    player_url = f"https://livetv.sx{match.group(1)}"
                     player_links.append(player_url)
-                    logging.info(f"Lien de lecteur web trouvé (général) : {player_url}")
+                    logging.info(f"Lien de lecteur web trouvé (via JS) : {player_url}")
+            else:
+                player_url = _absolute(href)
+                player_links.append(player_url)
+                logging.info(f"Lien de lecteur web trouvé : {player_url}")
 
-        return player_links
+    # Recherche générale si aucune table de diffusion n'a donné de lien
+    if not player_links:
+        for href in doc.xpath("//a/@href"):
+            if PLAYER_HREF.search(href) and 'acestream:' not in href:
+                player_url = _absolute(href)
+                player_links.append(player_url)
+                logging.info(f"Lien de lecteur web trouvé (général) : {player_url}")
 
-    except requests.RequestException as e:
-        logging.error(f"Erreur de requête pour {event_url}: {e}")
+    return player_links
+
+
+def extract_player_links_bs4(html):
+    """
+    Extrait les liens de lecteurs web d'une page d'événement déjà téléchargée
+    (BeautifulSoup + html.parser, chemin historique et de secours).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Cible les liens qui sont dans des cellules de tableau avec une description de lecteur
+    # et qui ne contiennent pas 'acestream' dans leur URL.
+    player_links = []
+
+    # Stratégie 1: Chercher les liens dans les descriptions de diffusion
+    broadcast_tables = soup.find_all('table', class_=BROADCAST_CLASS)
+    for table in broadcast_tables:
+        rows = table.find_all('tr')
+        for row in rows:
+            link_cell = row.find('td', class_='live')
+            if link_cell:
+                link = link_cell.find('a', href=True)
+                if link and 'acestream:' not in link['href'] and 'sop:' not in link['href']:
+                    # Essayer d'obtenir une URL plus directe si elle est cachée
+                    onclick_attr = link.get('onclick')
+                    if onclick_attr:
+                        # Extrait l'URL d'une fonction JavaScript comme "return cl(this, '...'))"
+                        match = CL_ONCLICK.search(onclick_attr)
+                        if match:
+                            player_url = f"https://livetv.sx{match.group(1)}"
+                            player_links.append(player_url)
+                            logging.info(f"Lien de lecteur web trouvé (via JS) : {player_url}")
+                    else:
+                        player_url = link['href']
+                        if not player_url.startswith('http'):
+                            player_url = f"https://livetv.sx{player_url}"
+                        player_links.append(player_url)
+                        logging.info(f"Lien de lecteur web trouvé : {player_url}")
+
+    # Si aucune table de diffusion n'est trouvée, essayer une recherche plus générale
+    if not player_links:
+        all_links = soup.find_all('a', href=PLAYER_HREF)
+        for link in all_links:
+            if 'acestream:' not in link['href']:
+                player_url = link['href']
+                if not player_url.startswith('http'):
+                    player_url = f"https://livetv.sx{player_url}"
+                player_links.append(player_url)
+                logging.info(f"Lien de lecteur web trouvé (général) : {player_url}")
+
+    return player_links
+
+
+def _links_from_response(event_url, response):
+    if response.status_code != 200:
+        logging.warning(f"Impossible d'accéder à {event_url}, status code: {response.status_code}")
         return []
-    except Exception as e:
-        logging.error(f"Erreur inattendue pour {event_url}: {e}")
+    t0 = time.perf_counter()
+    player_links = extract_player_links(response.text)
+    REPORT.add("match", "livetv.sx", time.perf_counter() - t0, matches=len(player_links))
+    return player_links
+
+
+async def event_links_async(session, limiter, cache, event_url, event_time, stats):
+    """
+    Liens d'un événement en passant par le cache SQLite (voir livetv_cache) :
+    entrée encore fraîche -> aucune requête ; page inchangée (même sha1) ->
+    pas de réanalyse ; échec du téléchargement -> liens en cache, même périmés.
+    """
+    entry = cache.get(event_url) if cache is not None else None
+    if EventCache.is_fresh(entry, event_time):
+        stats["fraîches"] += 1
+        return entry.links
+
+    response = None
+    try:
+        t0 = time.perf_counter()
+        response = await polite_get_async(session, event_url, limiter)
+        REPORT.add("fetch", "livetv.sx", time.perf_counter() - t0, bytes=len(response.content))
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.error(f"Erreur de requête pour {event_url}: {e}")
+
+    if response is None or response.status_code != 200:
+        if response is not None:
+            logging.warning(f"Impossible d'accéder à {event_url}, status code: {response.status_code}")
+        if entry is not None:
+            logging.warning(f"Liens en cache (périmés) réutilisés pour {event_url}")
+            stats["périmées"] += 1
+            return entry.links
         return []
 
-def generate_playlist_from_xml(xml_path, output_m3u_path):
+    digest = content_hash(response.content)
+    if entry is not None and entry.content_hash == digest:
+        stats["inchangées"] += 1
+        links = entry.links
+    else:
+        stats["analysées"] += 1
+        links = _links_from_response(event_url, response)
+    if cache is not None:
+        cache.put(event_url, links, digest)
+    return links
+
+
+class PlaylistWriter:
+    """
+    Écrit la playlist au fil de l'eau : le fichier n'est ouvert (et l'ancien
+    écrasé) qu'au premier lien trouvé, et chaque événement est écrit en entier
+    puis flushé. Un run interrompu laisse donc une playlist valide et partielle.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = 0
+        self.seconds = 0.0
+        self._f = None
+
+    def add_event(self, event_time, event_name, links):
+        t0 = time.perf_counter()
+        if self._f is None:
+            self._f = open(self.path, 'w', encoding='utf-8')
+            self._f.write("#EXTM3U\n")
+        # Pour chaque lien de lecteur trouvé, créer une entrée
+        for i, link in enumerate(links):
+            entry_name = f"{event_time} - {event_name} (Lien {i+1})"
+            self._f.write(f"#EXTINF:-1,{entry_name}\n{link}\n")
+        self._f.flush()
+        self.entries += len(links)
+        self.seconds += time.perf_counter() - t0
+
+    def close(self):
+        if self._f is None:
+            return
+        REPORT.add("publish", str(self.path), self.seconds, entries=self.entries, bytes=self._f.tell())
+        self._f.close()
+        self._f = None
+
+
+def iter_events(xml_path):
+    """
+    (url, nom, heure) de chaque <evento> enfant de la racine, lu avec iterparse.
+    Chaque élément est libéré dès qu'il a été lu : mémoire constante, quelle
+    que soit la taille du flux.
+    """
+    root = None
+    depth = 0
+    for ev, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if ev == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == 'evento':
+            event_url = elem.findtext('url')
+            if event_url:
+                yield event_url.strip(), elem.findtext('nombre'), elem.findtext('hora')
+            else:
+                logging.warning("Événement sans <url> ignoré")
+        root.clear()
+
+
+async def generate_playlist_from_xml_async(xml_path, output_m3u_path):
     """
     Génère une playlist M3U à partir du fichier XML d'événements.
+
+    Le XML est lu au fil de l'eau (iterparse) et LIVETV_WORKERS tâches
+    consomment une file bornée d'événements : chaque page
+    est traitée dès qu'elle arrive (une page lente ne bloque pas les autres)
+    et ses liens sont ajoutés tout de suite au fichier de sortie. Les événements
+    dont l'entrée de cache est encore fraîche ne sont pas retéléchargés, et
+    chaque URL (événement ou lecteur) n'est traitée qu'une fois par run,
+    toutes variantes confondues (voir livetv_urls).
     """
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-    except FileNotFoundError:
+    if not os.path.exists(xml_path):
         logging.critical(f"Le fichier XML '{xml_path}' n'a pas été trouvé. Exécutez d'abord le script principal.")
+        REPORT.failed = True
         return
 
-    events = root.findall('evento')
-    playlist_entries = []
-    
-    # Utiliser ThreadPoolExecutor pour paralléliser les requêtes
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_event = {executor.submit(find_web_player_links, event.find('url').text): event for event in events}
-        
-        for future in future_to_event:
-            event_element = future_to_event[future]
+    writer = PlaylistWriter(output_m3u_path)
+    queue = asyncio.Queue(maxsize=LIVETV_WORKERS * 2)
+    limiter = AsyncHostLimiter()
+    cache = EventCache() if LIVETV_CACHE_ENABLED else None
+    stats = Counter()
+    # Index canoniques du run : une page d'événement / un lien n'est traité qu'une fois
+    event_index = UrlIndex()
+    link_index = UrlIndex()
+
+    async def worker(session):
+        while True:
+            item = await queue.get()
             try:
-                web_player_links = future.result()
+                if item is None:
+                    return
+                event_url, event_name, event_time = item
+                web_player_links = await event_links_async(session, limiter, cache, event_url, event_time, stats)
+                web_player_links = link_index.new_only(web_player_links)
                 if web_player_links:
-                    event_name = event_element.find('nombre').text
-                    event_time = event_element.find('hora').text
-                    
-                    # Pour chaque lien de lecteur trouvé, créer une entrée
-                    for i, link in enumerate(web_player_links):
-                        entry_name = f"{event_time} - {event_name} (Lien {i+1})"
-                        playlist_entries.append(f"#EXTM3U\n{entry_name}\n{link}\n")
+                    writer.add_event(event_time, event_name, web_player_links)
             except Exception as exc:
                 logging.error(f"Une erreur est survenue lors du traitement d'un événement: {exc}")
+            finally:
+                queue.task_done()
+
+    try:
+        async with make_async_session() as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(LIVETV_WORKERS)]
+            # Producteur : chaque <evento> part vers les workers dès qu'il est lu
+            events = iter_events(xml_path)
+            parse_seconds, parsed = 0.0, 0
+            try:
+                while True:
+                    t0 = time.perf_counter()
+                    item = next(events, None)
+                    parse_seconds += time.perf_counter() - t0
+                    if item is None:
+                        break
+                    parsed += 1
+                    event_url = event_index.add(item[0])
+                    if event_url is not None:
+                        await queue.put((event_url,) + item[1:])
+            except ET.ParseError as e:
+                logging.error(f"XML invalide '{xml_path}' après {parsed} événements : {e}")
+                REPORT.failed = True
+            finally:
+                REPORT.add("parse", str(xml_path), parse_seconds, entries=parsed)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.close()
 
-    # Écrire la playlist M3U
-    if playlist_entries:
-        with open(output_m3u_path, 'w', encoding='utf-8') as f:
-            f.write("#EXTM3U\n")
-            for entry in playlist_entries:
-                f.write(entry)
-        logging.info(f"Playlist M3U générée avec succès : '{output_m3u_path}' avec {len(playlist_entries)} liens.")
+    logging.info(f"Doublons ignorés : {event_index.duplicates} événements, {link_index.duplicates} liens "
+                 f"({len(link_index)} liens uniques)")
+    if cache is not None:
+        logging.info("Cache des événements : " + ", ".join(f"{n} {k}" for k, n in sorted(stats.items())))
+    if writer.entries:
+        logging.info(f"Playlist M3U générée avec succès : '{output_m3u_path}' avec {writer.entries} liens.")
     else:
         logging.warning("Aucun lien de lecteur web n'a été trouvé. La playlist est vide.")
 
+
+def generate_playlist_from_xml(xml_path, output_m3u_path):
+    asyncio.run(generate_playlist_from_xml_async(xml_path, output_m3u_path))
+
 if __name__ == "__main__":
     xml_file = '../platinsport-m3u-updater/eventos_livetv_sx.xml'
     m3u_file = '../www/livetv_events.m3u'
-    generate_playlist_from_xml(xml_file, m3u_file)
+    with REPORT.run("generate_livetv_playlist"):
+        generate_playlist_from_xml(xml_file, m3u_file)
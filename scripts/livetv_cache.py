@@ -0,0 +1,134 @@
+"""
+Cache persistant (SQLite) des pages d'événement livetv.sx.
+
+Une ligne par URL d'événement : liens de lecteurs extraits, date du dernier
+téléchargement et empreinte (sha1) du contenu. Une entrée est « fraîche »
+tant que son âge est inférieur à un TTL qui dépend de la proximité du coup
+d'envoi (champ <hora> du XML) :
+
+    coup d'envoi inconnu            LIVETV_TTL_UNKNOWN   (30 min)
+    dans plus de 6 h                LIVETV_TTL_FAR       (3 h)
+    dans 1 h à 6 h                  LIVETV_TTL_SOON      (30 min)
+    de -1 h à +3 h (en direct)      LIVETV_TTL_LIVE      (5 min)
+    terminé depuis plus de 3 h      LIVETV_TTL_ENDED     (6 h)
+
+Seules les entrées périmées sont retéléchargées ; si le contenu n'a pas
+changé (même empreinte), les liens en cache sont réutilisés sans réanalyse.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+LIVETV_CACHE_ENABLED = os.getenv("LIVETV_CACHE", "1") != "0"
+LIVETV_CACHE_DB = os.getenv("LIVETV_CACHE_DB",
+                            str(Path(__file__).resolve().parents[1] / ".cache" / "livetv_events.sqlite"))
+
+LIVETV_TTL_UNKNOWN = int(os.getenv("LIVETV_TTL_UNKNOWN", "1800"))
+LIVETV_TTL_FAR = int(os.getenv("LIVETV_TTL_FAR", "10800"))
+LIVETV_TTL_SOON = int(os.getenv("LIVETV_TTL_SOON", "1800"))
+LIVETV_TTL_LIVE = int(os.getenv("LIVETV_TTL_LIVE", "300"))
+LIVETV_TTL_ENDED = int(os.getenv("LIVETV_TTL_ENDED", "21600"))
+
+PRUNE_AFTER = 2 * 86400   # on oublie les événements non vus depuis 2 jours
+
+HORA_RE = re.compile(r'(\d{1,2})[:h](\d{2})')
+
+
+class CachedEvent(NamedTuple):
+    url: str
+    links: List[str]
+    fetched_at: float
+    content_hash: str
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+def parse_kickoff(hora: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Timestamp du coup d'envoi à partir du champ <hora>.
+    Date complète ISO 8601 acceptée ; une heure seule (« 20:45 ») est placée
+    sur le jour (hier / aujourd'hui / demain, heure locale) le plus proche de now.
+    """
+    if not hora:
+        return None
+    hora = hora.strip()
+    try:
+        return datetime.fromisoformat(hora).timestamp()
+    except ValueError:
+        pass
+    m = HORA_RE.search(hora)
+    if not m or int(m.group(1)) > 23 or int(m.group(2)) > 59:
+        return None
+    now = time.time() if now is None else now
+    today = datetime.fromtimestamp(now).replace(hour=int(m.group(1)), minute=int(m.group(2)),
+                                                second=0, microsecond=0)
+    candidates = [(today + timedelta(days=d)).timestamp() for d in (-1, 0, 1)]
+    return min(candidates, key=lambda ts: abs(ts - now))
+
+
+def ttl_for(kickoff: Optional[float], now: Optional[float] = None) -> int:
+    if kickoff is None:
+        return LIVETV_TTL_UNKNOWN
+    now = time.time() if now is None else now
+    until = kickoff - now
+    if until > 6 * 3600:
+        return LIVETV_TTL_FAR
+    if until > 3600:
+        return LIVETV_TTL_SOON
+    if until > -3 * 3600:
+        return LIVETV_TTL_LIVE
+    return LIVETV_TTL_ENDED
+
+
+class EventCache:
+    def __init__(self, path: str = LIVETV_CACHE_DB):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " url TEXT PRIMARY KEY,"
+            " links TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " content_hash TEXT NOT NULL)"
+        )
+        with self.conn:
+            self.conn.execute("DELETE FROM events WHERE fetched_at < ?", (time.time() - PRUNE_AFTER,))
+
+    def get(self, url: str) -> Optional[CachedEvent]:
+        row = self.conn.execute(
+            "SELECT url, links, fetched_at, content_hash FROM events WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedEvent(row[0], json.loads(row[1]), row[2], row[3])
+
+    @staticmethod
+    def is_fresh(entry: Optional[CachedEvent], hora: Optional[str], now: Optional[float] = None) -> bool:
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry.fetched_at < ttl_for(parse_kickoff(hora, now), now)
+
+    def put(self, url: str, links: List[str], digest: str, fetched_at: Optional[float] = None) -> None:
+        # un commit par événement : un run interrompu garde ce qui a déjà été fait
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO events (url, links, fetched_at, content_hash) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(links), time.time() if fetched_at is None else fetched_at, digest),
+            )
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,113 @@
+"""
+Accès HTTP partagé pour les scripts livetv.sx.
+
+- Une seule aiohttp.ClientSession (pool de connexions keep-alive) pour tout
+  le run : make_async_session().
+- Limite de requêtes simultanées par hôte (connecteur) + intervalle minimal
+  entre deux départs vers le même hôte (politesse) : AsyncHostLimiter.
+- Nouvelles tentatives avec backoff exponentiel sur 429/5xx et erreurs réseau
+  (Retry-After respecté) : polite_get_async().
+
+Tout est réglable par variables d'environnement (LIVETV_*).
+"""
+
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+LIVETV_WORKERS = int(os.getenv("LIVETV_WORKERS", "10"))                 # requêtes simultanées au total
+LIVETV_PER_HOST = int(os.getenv("LIVETV_PER_HOST", "4"))                # requêtes simultanées par hôte
+LIVETV_MIN_INTERVAL = float(os.getenv("LIVETV_MIN_INTERVAL", "0.1"))    # secondes entre deux départs vers un hôte
+LIVETV_RETRIES = int(os.getenv("LIVETV_RETRIES", "3"))
+LIVETV_BACKOFF = float(os.getenv("LIVETV_BACKOFF", "0.5"))              # 0.5s, 1s, 2s ...
+LIVETV_TIMEOUT = float(os.getenv("LIVETV_TIMEOUT", "15"))
+LIVETV_VERIFY_SSL = os.getenv("LIVETV_VERIFY_SSL", "0") == "1"
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://livetv.sx/es/'
+}
+
+
+class Page(NamedTuple):
+    """Réponse minimale (mêmes noms d'attributs que requests.Response)."""
+    url: str
+    status_code: int
+    content: bytes
+    text: str
+
+
+def make_async_session() -> aiohttp.ClientSession:
+    # limit_per_host du connecteur = limite de requêtes simultanées par hôte
+    connector = aiohttp.TCPConnector(
+        limit=LIVETV_WORKERS,
+        limit_per_host=LIVETV_PER_HOST,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+        ssl=None if LIVETV_VERIFY_SSL else False,
+    )
+    return aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS,
+                                 timeout=aiohttp.ClientTimeout(total=LIVETV_TIMEOUT))
+
+
+class AsyncHostLimiter:
+    """Intervalle minimal entre deux départs vers un même hôte (boucle asyncio unique)."""
+
+    def __init__(self, min_interval: float = LIVETV_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        start = max(now, self._next.get(host, 0.0))
+        self._next[host] = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Backoff exponentiel, ou Retry-After (secondes ou date HTTP) s'il est plus long."""
+    delay = LIVETV_BACKOFF * (2 ** attempt)
+    if retry_after:
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            try:
+                wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                wait = 0.0
+        delay = max(delay, wait)
+    return delay
+
+
+async def polite_get_async(session: aiohttp.ClientSession, url: str,
+                           limiter: Optional[AsyncHostLimiter] = None) -> Page:
+    """GET avec politesse par hôte et retries sur 429/5xx / erreurs réseau."""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.wait(url)
+        try:
+            async with session.get(url) as resp:
+                content = await resp.read()
+                page = Page(str(resp.url), resp.status,
+                            content, content.decode(resp.charset or "utf-8", errors="replace"))
+                retry_after = resp.headers.get("Retry-After")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt >= LIVETV_RETRIES:
+                raise
+            page, retry_after = None, None
+        if page is not None and (page.status_code not in RETRY_STATUS or attempt >= LIVETV_RETRIES):
+            return page
+        await asyncio.sleep(retry_delay(attempt, retry_after))
+        attempt += 1
@@ -0,0 +1,72 @@
+"""
+URL canoniques pour dédoublonner les liens livetv.sx sur tout un run.
+
+Un même lecteur apparaît souvent sous plusieurs événements / stratégies
+d'extraction, en http ou https, avec ou sans www, slash final ou paramètres
+de suivi. canonical_key() ramène toutes ces variantes à une seule clé ;
+UrlIndex garde la première forme vue (nettoyée) pour chaque clé.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Uniquement des paramètres de suivi connus : "ref", "id", "mc_*"... peuvent porter le flux lui-même
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "msclkid", "ref_src", "_ga", "igshid", "mc_cid", "mc_eid"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_SLASHES = re.compile(r"/{2,}")
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _clean_query(query: str) -> str:
+    return urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not _is_tracking(k)])
+
+
+def clean_url(url: str) -> str:
+    """Forme émise : schéma/hôte en minuscules, port par défaut, fragment et paramètres de suivi retirés."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, _SLASHES.sub("/", parts.path) or "/", _clean_query(parts.query), ""))
+
+
+def canonical_key(url: str) -> str:
+    """Clé de dédoublonnage : ignore le schéma, « www. », le slash final et l'ordre des paramètres."""
+    parts = urlsplit(clean_url(url))
+    host = parts.netloc
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = "&".join(sorted(parts.query.split("&"))) if parts.query else ""
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+class UrlIndex:
+    """Index des URL déjà vues pendant le run (clé canonique -> forme émise)."""
+
+    def __init__(self):
+        self._seen: Dict[str, str] = {}
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, url: str) -> Optional[str]:
+        """Forme nettoyée si l'URL est nouvelle, None si une variante a déjà été vue."""
+        key = canonical_key(url)
+        if key in self._seen:
+            self.duplicates += 1
+            return None
+        self._seen[key] = cleaned = clean_url(url)
+        return cleaned
+
+    def new_only(self, urls: Iterable[str]) -> List[str]:
+        return [u for u in map(self.add, urls) if u is not None]
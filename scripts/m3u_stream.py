@@ -0,0 +1,133 @@
+# scripts/m3u_stream.py
+# -*- coding: utf-8 -*-
+"""
+قارئ/كاتب M3U مشترك يشتغل بشكل تدفّقي (generator) بدل ما نحمّل الملف كله
+كقائمة أسطر ثم قائمة أزواج.
+
+قواعد التحليل (موحّدة لكل السكربتات):
+- الأسطر الفارغة تُتجاهل.
+- كل #EXTINF يبدأ مدخل جديد؛ أول سطر بعده مو تعليق هو الرابط.
+- أسطر # الوسيطة (#EXTVLCOPT, #KODIPROP, #EXTGRP ...) تنحفظ بـ options ولا تقطع الربط.
+- #EXTINF يجي وراه #EXTINF ثاني مباشرة => المدخل الأول بدون رابط (url=None).
+- رابط بدون #EXTINF قبله يُتجاهل.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+# head = كل شي قبل أول فاصلة خارج علامات التنصيص (المدة + الخصائص)، title = اسم العرض
+_EXTINF_RE = re.compile(r'^#EXTINF:?(?P<head>(?:[^",]|"[^"]*")*),?(?P<title>.*)$', re.I)
+_DURATION_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)")
+_ATTR_RE = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|([^\s"]+))')
+
+
+class M3UEntry(NamedTuple):
+    extinf: str                 # سطر #EXTINF كما هو (بدون مسافات طرفية)
+    url: Optional[str]
+    title: str                  # الاسم بعد الفاصلة
+    duration: str
+    attrs: Dict[str, str]       # tvg-id / tvg-logo / tvg-name / group-title ...
+    options: Tuple[str, ...] = ()
+
+    @property
+    def tvg_id(self) -> Optional[str]:
+        return self.attrs.get("tvg-id")
+
+    @property
+    def tvg_logo(self) -> Optional[str]:
+        return self.attrs.get("tvg-logo")
+
+
+def parse_extinf(line: str) -> Tuple[str, Dict[str, str], str]:
+    """(duration, attrs, title) من سطر #EXTINF واحد."""
+    m = _EXTINF_RE.match(line.strip())
+    if not m:
+        return "", {}, ""
+    head = m.group("head")
+    d = _DURATION_RE.match(head)
+    duration = d.group(1) if d else ""
+    attrs = {k.lower(): q or v for k, q, v in _ATTR_RE.findall(head[d.end() if d else 0:])}
+    return duration, attrs, m.group("title").strip()
+
+
+def _make_entry(extinf: str, url: Optional[str], options: List[str]) -> M3UEntry:
+    duration, attrs, title = parse_extinf(extinf)
+    return M3UEntry(extinf, url, title, duration, attrs, tuple(options))
+
+
+def iter_entries(lines: Iterable[str]) -> Iterator[M3UEntry]:
+    """يحلّل أي مصدر أسطر (ملف مفتوح، StringIO، استجابة HTTP) مدخل مدخل."""
+    pending: Optional[str] = None
+    options: List[str] = []
+    for raw in lines:
+        ln = raw.strip()
+        if not ln:
+            continue
+        if ln[:7].upper() == "#EXTINF":
+            if pending is not None:
+                yield _make_entry(pending, None, options)
+            pending, options = ln, []
+            continue
+        if ln.startswith("#"):
+            if pending is not None:
+                options.append(ln)
+            continue
+        if pending is not None:
+            yield _make_entry(pending, ln, options)
+            pending, options = None, []
+    if pending is not None:
+        yield _make_entry(pending, None, options)
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """
+    أسطر النص وحدة وحدة بـfind، بدون نسخة ثانية من النص كله
+    (StringIO ينسخه لبافر داخلي أكبر منه بـ4 مرات، وsplitlines يبني قائمة).
+    """
+    pos, n = 0, len(text)
+    while pos < n:
+        end = text.find("\n", pos)
+        if end < 0:
+            end = n
+        yield text[pos:end]
+        pos = end + 1
+
+
+def iter_entries_from_text(m3u_text: str) -> Iterator[M3UEntry]:
+    return iter_entries(iter_lines(m3u_text))
+
+
+def iter_entries_from_file(path: Union[str, Path], encoding: str = "utf-8") -> Iterator[M3UEntry]:
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        yield from iter_entries(f)
+
+
+def iter_pairs(m3u_text: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """[(extinf_line, url_or_None), ...] بشكل lazy (بديل parse_m3u_pairs / parse_pairs)."""
+    for e in iter_entries_from_text(m3u_text):
+        yield e.extinf, e.url
+
+
+def format_entry(entry: Union[M3UEntry, Tuple[str, Optional[str]]]) -> str:
+    if isinstance(entry, M3UEntry):
+        parts = [entry.extinf, *entry.options]
+        url = entry.url
+    else:
+        parts = [entry[0]]
+        url = entry[1]
+    if url:
+        parts.append(url)
+    return "\n".join(parts) + "\n"
+
+
+def write_entries(entries: Iterable[Union[M3UEntry, Tuple[str, Optional[str]]]],
+                  fp: TextIO, header: Optional[str] = "#EXTM3U") -> int:
+    """يكتب المداخل وحدة وحدة على fp ويرجّع عددها."""
+    if header:
+        fp.write(header + "\n")
+    n = 0
+    for entry in entries:
+        fp.write(format_entry(entry))
+        n += 1
+    return n
@@ -0,0 +1,195 @@
+# scripts/run_report.py
+# -*- coding: utf-8 -*-
+"""
+تقرير تشغيل لكل مرحلة (fetch, parse, match, render, publish) بصيغة قابلة للقراءة الآلية.
+
+لكل (stage, target): الزمن الفعلي (wall time) + bytes + entries + matches + api_calls.
+target = المصدر/الوجهة/الصفحة حتى نعرف أي upstream ياكل وقت الـcron.
+
+الاستعمال (REPORT واحد على مستوى الموديول مثل CACHE / SHA_CACHE):
+
+    from run_report import REPORT, counted
+    with REPORT.run("update_all"):          # يكتب التقرير بالنهاية (success حسب الاستثناء)
+        with REPORT.stage("match", DEST_REPO_PATH) as st:
+            picked = ...
+            st.matches += len(picked)
+        pairs = counted(iter_pairs(src), REPORT.get("parse", SOURCE_URL))  # يحسب العدد ووقت التحليل
+
+المكتبات المشتركة تسجّل لحالها: http_fetch (fetch لكل رابط) و github_publish
+(publish + api_calls). REPORT.add(...) آمن من threads.
+
+الكتابة: <RUN_REPORT_DIR>/<job>.json و <job>.prom (Prometheus textfile collector،
+كتابة ذرّية tmp + rename). RUN_REPORT=0 يعطّل الكتابة.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+RUN_REPORT_ENABLED = os.getenv("RUN_REPORT", "1") != "0"
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", ".cache/reports")
+
+COUNTERS = ("bytes", "entries", "matches", "api_calls")
+METRIC_PREFIX = "playlist"
+
+
+class StageStats:
+    __slots__ = ("seconds", "calls") + COUNTERS
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        for c in COUNTERS:
+            setattr(self, c, 0)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"seconds": round(self.seconds, 6), "calls": self.calls,
+                **{c: getattr(self, c) for c in COUNTERS}}
+
+
+class RunReport:
+    def __init__(self, job: str = "run"):
+        self.start(job)
+
+    def start(self, job: str) -> None:
+        self.job = job
+        self.started = time.time()
+        self.failed = False
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[Tuple[str, str], StageStats] = {}
+
+    @contextmanager
+    def run(self, job: str) -> Iterator["RunReport"]:
+        """start + write بالنهاية؛ فشل = استثناء أو report.failed = True."""
+        self.start(job)
+        ok = False
+        try:
+            yield self
+            ok = not self.failed
+        finally:
+            path = self.write(success=ok)
+            if path is not None:
+                print(f"[i] Run report: {path}")
+                print(self.summary())
+
+    def get(self, stage: str, target: str = "") -> StageStats:
+        key = (stage, target)
+        with self._lock:
+            if key not in self.stages:
+                self.stages[key] = StageStats()
+            return self.stages[key]
+
+    @contextmanager
+    def stage(self, stage: str, target: str = "") -> Iterator[StageStats]:
+        """يجمع الزمن على نفس (stage, target) إذا تكرر."""
+        st = self.get(stage, target)
+        t0 = time.perf_counter()
+        try:
+            yield st
+        finally:
+            with self._lock:
+                st.seconds += time.perf_counter() - t0
+                st.calls += 1
+
+    def add(self, stage: str, target: str = "", seconds: float = 0.0, **counters: int) -> None:
+        """لمراحل تنقاس بمكان ثاني (تحميل async بالتوازي، threads ...)."""
+        st = self.get(stage, target)
+        with self._lock:
+            st.seconds += seconds
+            st.calls += 1
+            for k, v in counters.items():
+                setattr(st, k, getattr(st, k) + v)
+
+    def to_dict(self, success: Optional[bool] = None) -> Dict:
+        totals = {c: sum(getattr(s, c) for s in self.stages.values()) for c in COUNTERS}
+        return {
+            "job": self.job,
+            "started_at": self.started,
+            "wall_seconds": round(time.perf_counter() - self._t0, 6),
+            "success": success,
+            "totals": totals,
+            "stages": [{"stage": st, "target": tg, **s.to_dict()} for (st, tg), s in self.stages.items()],
+        }
+
+    def to_prometheus(self, success: Optional[bool] = None) -> str:
+        data = self.to_dict(success)
+        job = _label(self.job)
+        lines: List[str] = []
+
+        def metric(name: str, help_: str, samples: List[Tuple[str, float]]) -> None:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}_{name}{{{labels}}} {value}")
+
+        metric("run_seconds", "Wall time of the whole run.", [(f'job="{job}"', data["wall_seconds"])])
+        metric("run_timestamp_seconds", "Unix time the run started.", [(f'job="{job}"', round(self.started, 3))])
+        if success is not None:
+            metric("run_success", "1 if the run finished without errors.", [(f'job="{job}"', int(success))])
+
+        def stage_labels(s: Dict) -> str:
+            return f'job="{job}",stage="{_label(s["stage"])}",target="{_label(s["target"])}"'
+
+        metric("stage_seconds", "Wall time spent in a stage.",
+               [(stage_labels(s), s["seconds"]) for s in data["stages"]])
+        for c in COUNTERS:
+            metric(f"stage_{c}", f"{c.replace('_', ' ').capitalize()} counted in a stage.",
+                   [(stage_labels(s), s[c]) for s in data["stages"]])
+        return "\n".join(lines) + "\n"
+
+    def write(self, success: Optional[bool] = None, directory: Optional[str] = None) -> Optional[Path]:
+        if not RUN_REPORT_ENABLED:
+            return None
+        out = Path(directory or RUN_REPORT_DIR)
+        out.mkdir(parents=True, exist_ok=True)
+        _atomic_write(out / f"{self.job}.json", json.dumps(self.to_dict(success), ensure_ascii=False, indent=1))
+        _atomic_write(out / f"{self.job}.prom", self.to_prometheus(success))
+        return out / f"{self.job}.json"
+
+    def summary(self) -> str:
+        rows = sorted(self.stages.items(), key=lambda kv: -kv[1].seconds)
+        return "\n".join(f"    {st:<8} {s.seconds * 1000:9.1f} ms  {tg}" for (st, tg), s in rows)
+
+
+T = TypeVar("T")
+
+
+def counted(items: Iterable[T], stats: StageStats) -> Iterator[T]:
+    """
+    يمرّر العناصر كما هي (تبقى تدفّقية) ويعدّها بـstats.entries. stats.seconds
+    ياخذ وقت إنتاج العناصر بس (التحليل)، مو وقت المستهلك بين عنصر والثاني.
+    """
+    it = iter(items)
+    spent = 0.0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                spent += time.perf_counter() - t0
+            stats.entries += 1
+            yield item
+    finally:
+        stats.seconds += spent
+        stats.calls += 1
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+REPORT = RunReport()
@@ -1,139 +1,563 @@
 # scripts/scrape_yallashoot_to_json.py
-import os, json, datetime as dt, time
-from pathlib import Path
+import os, sys, datetime as dt, time, argparse, subprocess
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 from zoneinfo import ZoneInfo
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+import requests
+from playwright.sync_api import sync_playwright, Error as PWError, TimeoutError as PWTimeout
+
+from yallashoot_static import (compare_cards, extract_cards_lxml, extract_scores_lxml, lxml_html, match_id,
+                               needs_live_refresh, normalize_status, state_problem)
+from yallashoot_feed import OUT_PATH, load_snapshot, write_output
+
+# Per-stage run report: vendored copy of m3u-update/scripts/run_report.py (kept identical by tests/test_run_report.py)
+from run_report import REPORT
 
 BAGHDAD_TZ = ZoneInfo("Asia/Baghdad")
 DEFAULT_URL = "https://www.yalla-shoot.info/matches-today/"
 
-REPO_ROOT = Path(__file__).resolve().parents[1]
-# For GitHub Pages, the output should be in the www directory to be served correctly
-OUT_DIR = REPO_ROOT / "www" / "matches"
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-OUT_PATH = OUT_DIR / "today.json"
+CARD_SELECTOR = ".AY_Inner"
+# Adaptive scroll: stop once no new card shows up within the quiet window
+SCROLL_QUIET_MS = int(os.environ.get("SCROLL_QUIET_MS", "1200"))
+SCROLL_CAP_S = float(os.environ.get("SCROLL_CAP_S", "15"))
+FIRST_CARD_TIMEOUT_MS = int(os.environ.get("FIRST_CARD_TIMEOUT_MS", "10000"))
+
+COUNT_JS = "(sel) => document.querySelectorAll(sel).length"
+MORE_CARDS_JS = "([sel, n]) => document.querySelectorAll(sel).length > n"
+
+# Request interception: we only read text and img src attributes, so images,
+# media, fonts and anything outside the page's own site are aborted.
+BLOCK_RESOURCE_TYPES = {t.strip() for t in os.environ.get("BLOCK_RESOURCES", "image,media,font").split(",") if t.strip()}
+BLOCK_THIRD_PARTY = os.environ.get("BLOCK_THIRD_PARTY", "1") == "1"
+ALLOW_HOSTS = {h.strip().lower() for h in os.environ.get("ALLOW_HOSTS", "").split(",") if h.strip()}
+
+def site_of(host):
+    """Registrable-ish domain: last two labels (www.yalla-shoot.info -> yalla-shoot.info)."""
+    return ".".join((host or "").lower().split(".")[-2:])
+
+class RequestBlocker:
+    def __init__(self, page_url):
+        self.site = site_of(urlsplit(page_url).hostname)
+        self.blocked = 0
+        self.allowed = 0
+
+    @property
+    def enabled(self):
+        return bool(BLOCK_RESOURCE_TYPES) or BLOCK_THIRD_PARTY
+
+    def wanted(self, request):
+        if request.resource_type in BLOCK_RESOURCE_TYPES:
+            return False
+        if BLOCK_THIRD_PARTY:
+            host = (urlsplit(request.url).hostname or "").lower()
+            if host and host not in ALLOW_HOSTS and site_of(host) != self.site:
+                return False
+        return True
 
-def gradual_scroll(page, step=900, pause=0.25):
-    last_h = 0
+    def __call__(self, route):
+        if self.wanted(route.request):
+            self.allowed += 1
+            route.continue_()
+        else:
+            self.blocked += 1
+            route.abort()
+
+    def install(self, ctx):
+        if self.enabled:
+            ctx.route("**/*", self)
+
+    def uninstall(self, ctx):
+        if self.enabled:
+            ctx.unroute("**/*", self)
+
+    @contextmanager
+    def paused(self, ctx):
+        """Interception off for one load only: back on afterwards, even if the load fails."""
+        self.uninstall(ctx)
+        try:
+            yield
+        finally:
+            self.install(ctx)
+
+def adaptive_scroll(page, selector=CARD_SELECTOR, quiet_ms=SCROLL_QUIET_MS, cap_s=SCROLL_CAP_S):
+    """
+    Jump to the bottom, then wait (in the page, no polling from Python) until
+    more cards are attached. Returns as soon as a whole quiet window passes
+    without a new card, or when the hard cap is reached.
+    Lazy images don't need to scroll into view: the extractor falls back to data-src.
+    """
+    t0 = time.perf_counter()
+    try:
+        page.wait_for_selector(selector, state="attached", timeout=FIRST_CARD_TIMEOUT_MS)
+    except PWTimeout:
+        print(f"[scroll] no {selector} after {FIRST_CARD_TIMEOUT_MS} ms")
+    count = page.evaluate(COUNT_JS, selector)
+    passes = 0
+    capped = False
     while True:
-        h = page.evaluate("() => document.body.scrollHeight")
-        if h <= last_h:
+        left_ms = (cap_s - (time.perf_counter() - t0)) * 1000
+        if left_ms <= 0:
+            capped = True
             break
-        for y in range(0, h, step):
-            page.evaluate(f"window.scrollTo(0, {y});")
-            time.sleep(pause)
-        last_h = h
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
+        passes += 1
+        try:
+            page.wait_for_function(MORE_CARDS_JS, arg=[selector, count], timeout=min(quiet_ms, left_ms))
+        except PWTimeout:
+            if min(quiet_ms, left_ms) < quiet_ms:
+                capped = True
+            break
+        count = page.evaluate(COUNT_JS, selector)
+    elapsed = time.perf_counter() - t0
+    print(f"[scroll] {count} cards, {passes} passes, {elapsed:.2f}s" + (" (hard cap reached)" if capped else ""))
+    return count
+
+# In-page extractor: one dict per .AY_Inner card
+CARDS_JS = r"""
+() => {
+  const cards = [];
+  document.querySelectorAll('.AY_Inner').forEach((inner, idx) => {
+    const root = inner.parentElement || inner;
+    const qText = (sel) => {
+      const el = root.querySelector(sel);
+      return el ? el.textContent.trim() : "";
+    };
+    // Lazy-loaded logos keep a placeholder in src (often a data: URI) until
+    // scrolled into view: the real URL is in the lazy attribute (LOGO_LAZY_ATTRS)
+    const qLogo = (sel) => {
+      const el = root.querySelector(sel);
+      if (!el) return "";
+      for (const attr of ['data-src', 'data-lazy-src', 'data-original']) {
+        const v = (el.getAttribute(attr) || "").trim();
+        if (v && !v.startsWith('data:')) return v;
+      }
+      const src = (el.getAttribute('src') || "").trim();
+      return src.startsWith('data:') ? "" : src;
+    };
+
+    const home = qText('.MT_Team.TM1 .TM_Name');
+    const away = qText('.MT_Team.TM2 .TM_Name');
+    const homeLogo = qLogo('.MT_Team.TM1 .TM_Logo img');
+    const awayLogo = qLogo('.MT_Team.TM2 .TM_Logo img');
+
+    const time = qText('.MT_Data .MT_Time');
+    const result = qText('.MT_Data .MT_Result');
+    const status = qText('.MT_Data .MT_Stat');
+
+    const infoLis = Array.from(root.querySelectorAll('.MT_Info li span')).map(x => x.textContent.trim());
+    const channel = infoLis[0] || "";
+    const commentator = infoLis[1] || "";
+    const competition = infoLis[2] || "";
+
+    cards.push({
+      home, away, home_logo: homeLogo, away_logo: awayLogo,
+      time_local: time, result_text: result, status_text: status,
+      channel, commentator, competition
+    });
+  });
+  return cards;
+}
+"""
+
+# Live refresh: only the fields that move during a match
+SCORES_JS = r"""
+() => Array.from(document.querySelectorAll('.AY_Inner')).map((inner) => {
+  const root = inner.parentElement || inner;
+  const qText = (sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.textContent.trim() : "";
+  };
+  return {
+    home: qText('.MT_Team.TM1 .TM_Name'), away: qText('.MT_Team.TM2 .TM_Name'),
+    result_text: qText('.MT_Data .MT_Result'), status_text: qText('.MT_Data .MT_Stat')
+  };
+})
+"""
+
+# Daemon mode: one warm browser, page reloaded every DAEMON_INTERVAL seconds
+DAEMON_INTERVAL = float(os.environ.get("DAEMON_INTERVAL", "300"))
+DAEMON_MAX_RUNTIME = float(os.environ.get("DAEMON_MAX_RUNTIME", "0"))    # 0 = forever
+RESTART_BACKOFF_MAX = 300
+
+def launch_browser(p):
+    return p.chromium.launch(headless=True, args=["--disable-extensions", "--disable-background-networking"])
+
+def open_page(browser, url):
+    ctx = browser.new_context(
+        viewport={"width": 1366, "height": 864},
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36",
+        locale="ar",
+        # Important: Set browser timezone to Baghdad to get correct times
+        timezone_id="Asia/Baghdad",
+        # Service workers would fetch behind the route handler's back
+        service_workers="block",
+    )
+    blocker = RequestBlocker(url)
+    blocker.install(ctx)
+    page = ctx.new_page()
+    page.set_default_timeout(60000)
+    return ctx, page, blocker
+
+def load_cards(page, ctx, blocker, url, reload=False, js=None):
+    """goto (or reload, for a warm page) + scroll + in-page extraction (CARDS_JS by default)."""
+    print("[reload]" if reload else "[open]", url)
+    with REPORT.stage("fetch", url) as st:
+        # Ready = DOM parsed + first match card attached (inside adaptive_scroll),
+        # not networkidle: ads and trackers kept that waiting for up to 20 s.
+        if reload:
+            resp = page.reload(wait_until="domcontentloaded", timeout=60000)
+        else:
+            resp = page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        found = adaptive_scroll(page)
+        if not found and blocker.enabled:
+            # Cards may depend on something we blocked: retry once with a plain page
+            print("[block] no cards with interception on, reloading once without it")
+            with blocker.paused(ctx):
+                resp = page.reload(wait_until="domcontentloaded", timeout=60000)
+                adaptive_scroll(page)
+        st.bytes += len(resp.body()) if resp else 0
+    if blocker.enabled:
+        print(f"[block] {blocker.blocked} requests aborted, {blocker.allowed} allowed")
+
+    # Add error handling for the JavaScript execution
+    try:
+        with REPORT.stage("parse", url) as st:
+            cards = page.evaluate(js or CARDS_JS)
+            st.entries += len(cards)
+    except Exception as e:
+        print(f"[error] JavaScript evaluation failed: {e}")
+        cards = []  # Return empty array if evaluation fails
+        REPORT.failed = True
+    print(f"[found] {len(cards)} cards")
+    return cards
+
+# Browserless fast path: plain HTTP GET + lxml over the server-rendered cards.
+# Used only when the result looks complete, otherwise Playwright takes over.
+STATIC_FAST_PATH = os.environ.get("STATIC_FAST_PATH", "1") == "1" and lxml_html is not None
+STATIC_MIN_CARDS = int(os.environ.get("STATIC_MIN_CARDS", "1"))
+STATIC_TIMEOUT = 20
+STATIC_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36",
+    "Accept-Language": "ar",
+}
+
+def previous_count(today, path=None):
+    """Matches already published for today (a static result with fewer is incomplete)."""
+    prev = load_snapshot(path) or {}
+    return len(prev.get("matches") or []) if prev.get("date") == today else 0
+
+def fetch_static(url):
+    """Plain GET of the server-rendered page (raises requests.RequestException)."""
+    print("[static]", url)
+    with REPORT.stage("fetch", url) as st:
+        resp = requests.get(url, headers=STATIC_HEADERS, timeout=STATIC_TIMEOUT)
+        resp.raise_for_status()
+        st.bytes += len(resp.content)
+    if "charset" not in resp.headers.get("Content-Type", "").lower():
+        resp.encoding = "utf-8"   # requests would assume ISO-8859-1 for text/html
+    return resp
+
+def static_cards(url, today, path=None):
+    """
+    Cards from the server-rendered HTML, or None when the browser is needed:
+    too few cards, a card whose kick-off can't be confirmed (time_local is
+    only set from a timezone-independent attribute, see yallashoot_static), or
+    a status/result that can't be trusted (state_problem).
+    """
+    if not STATIC_FAST_PATH:
+        return None
+    try:
+        resp = fetch_static(url)
+        with REPORT.stage("parse", url) as st:
+            cards = extract_cards_lxml(resp.text)
+            st.entries += len(cards)
+    except (requests.RequestException, ValueError) as e:
+        print(f"[static] failed ({e}), falling back to the browser")
+        return None
+    need = max(STATIC_MIN_CARDS, previous_count(today, path))
+    complete = [c for c in cards if c["home"] and c["away"]]
+    if len(cards) < need or len(complete) < len(cards):
+        print(f"[static] looks incomplete ({len(complete)}/{len(cards)} complete cards, expected >= {need}),"
+              " falling back to the browser")
+        return None
+    unconfirmed = sum(1 for c in cards if not c["time_local"])
+    if unconfirmed:
+        print(f"[static] no timezone-independent kick-off for {unconfirmed}/{len(cards)} cards,"
+              " falling back to the browser")
+        return None
+    now = dt.datetime.now(BAGHDAD_TZ)
+    doubtful = [(c, state_problem(c, now)) for c in cards]
+    doubtful = [(c, why) for c, why in doubtful if why]
+    if doubtful:
+        c, why = doubtful[0]
+        print(f"[static] status/result not trusted for {len(doubtful)}/{len(cards)} cards"
+              f" (e.g. {c['home']} - {c['away']}: {why}), falling back to the browser")
+        return None
+    print(f"[found] {len(cards)} cards (static)")
+    return cards
+
+def build_output(cards, url, today, path=None):
+    with REPORT.stage("render", str(path or OUT_PATH)) as st:
+        out = {
+            "date": today,
+            "source_url": url,
+            "matches": []
+        }
+        for c in cards:
+            mid = match_id(c["home"], c["away"], today)
+            out["matches"].append({
+                "id": mid,
+                "home": c["home"],
+                "away": c["away"],
+                "home_logo": c["home_logo"],
+                "away_logo": c["away_logo"],
+                # Baghdad time: the browser runs in Asia/Baghdad, and the static path
+                # converts a timezone-independent kick-off (yallashoot_static)
+                "time_baghdad": c["time_local"],
+                "status": normalize_status(c["status_text"]),
+                "status_text": c["status_text"],
+                "result_text": c["result_text"],
+                "channel": c["channel"] or None,
+                "commentator": c["commentator"] or None,
+                "competition": c["competition"] or None,
+                "_source": "yalla1shoot"
+            })
+        st.matches += len(out["matches"])
+    return out
+
+# Live refresh: between full scrapes, re-read result/status only for matches
+# that are LIVE or about to start (needs_live_refresh), on top of the last full today.json
+DAEMON_LIVE_INTERVAL = float(os.environ.get("DAEMON_LIVE_INTERVAL", "60"))
+
+def static_scores(url):
+    if not STATIC_FAST_PATH:
+        return None
+    try:
+        resp = fetch_static(url)
+        with REPORT.stage("parse", url) as st:
+            scores = extract_scores_lxml(resp.text)
+            st.entries += len(scores)
+    except (requests.RequestException, ValueError) as e:
+        print(f"[static] failed ({e}), falling back to the browser")
+        return None
+    return scores
+
+def live_refresh(url, today, browser_scores, path=None, delta_path=None):
+    """
+    Update result/status of the watched matches in today.json.
+    Returns True if written, False if nothing to do / unchanged, and None
+    when there is no full snapshot for today (a full scrape is needed).
+    The static page is only a cheap "nothing changed" probe: values that are
+    missing, not trusted (state_problem) or different from today.json are
+    re-read with browser_scores() (SCORES_JS), and only those are written.
+    """
+    snapshot = load_snapshot(path)
+    if not snapshot or snapshot.get("date") != today:
+        print("[live] no full snapshot for today yet")
+        return None
+    now = dt.datetime.now(BAGHDAD_TZ)
+    watched = {m["id"]: m for m in snapshot["matches"] if needs_live_refresh(m, today, now)}
+    if not watched:
+        print("[live] nothing live or about to start, skipping")
+        return False
+    print(f"[live] {len(watched)} matches live or about to start")
+
+    def by_id(scores):
+        return {match_id(c["home"], c["away"], today): c for c in scores or []}
+
+    static = by_id(static_scores(url))
+    unsure = [mid for mid, m in watched.items()
+              if mid not in static or state_problem(static[mid], now)
+              or (static[mid]["status_text"], static[mid]["result_text"]) != (m.get("status_text"), m.get("result_text"))]
+    if not unsure:
+        print("[live] static page agrees with today.json, nothing to update")
+        return False
+    print(f"[live] {len(unsure)} watched matches missing, live or changed on the static page, using the browser")
+    found = by_id(browser_scores())
+
+    with REPORT.stage("render", str(path or OUT_PATH)) as st:
+        matches = []
+        for m in snapshot["matches"]:
+            c = found.get(m["id"]) if m["id"] in watched else None
+            if c is not None and c["status_text"]:
+                m = {**m, "result_text": c["result_text"], "status_text": c["status_text"],
+                     "status": normalize_status(c["status_text"])}
+                st.matches += 1
+            matches.append(m)
+    out = {k: v for k, v in snapshot.items() if k not in ("version", "matches")}
+    out["matches"] = matches
+    return write_output(out, path, delta_path)
+
+def current_url():
+    return os.environ.get("FORCE_URL") or DEFAULT_URL
 
 def scrape():
-    url = os.environ.get("FORCE_URL") or DEFAULT_URL
+    url = current_url()
     today = dt.datetime.now(BAGHDAD_TZ).date().isoformat()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context(
-            viewport={"width": 1366, "height": 864},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36",
-            locale="ar",
-            # Important: Set browser timezone to Baghdad to get correct times
-            timezone_id="Asia/Baghdad",
-        )
-        page = ctx.new_page()
-        page.set_default_timeout(60000)
-
-        print("[open]", url)
-        page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        try:
-            page.wait_for_load_state("networkidle", timeout=20000)
-        except PWTimeout:
-            pass
+    cards = static_cards(url, today)
+    if cards is None:
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            ctx, page, blocker = open_page(browser, url)
+            cards = load_cards(page, ctx, blocker, url)
+            browser.close()
 
-        gradual_scroll(page)
+    write_output(build_output(cards, url, today))
 
-        # Add error handling for the JavaScript execution
-        try:
-            js = r"""
-            () => {
-              const cards = [];
-              document.querySelectorAll('.AY_Inner').forEach((inner, idx) => {
-                const root = inner.parentElement || inner;
-                const qText = (sel) => {
-                  const el = root.querySelector(sel);
-                  return el ? el.textContent.trim() : "";
-                };
-                const qAttr = (sel, attr) => {
-                  const el = root.querySelector(sel);
-                  if (!el) return "";
-                  return el.getAttribute(attr) || el.getAttribute('data-' + attr) || "";
-                };
-
-                const home = qText('.MT_Team.TM1 .TM_Name');
-                const away = qText('.MT_Team.TM2 .TM_Name');
-                const homeLogo = qAttr('.MT_Team.TM1 .TM_Logo img', 'src') || qAttr('.MT_Team.TM1 .TM_Logo img', 'data-src');
-                const awayLogo = qAttr('.MT_Team.TM2 .TM_Logo img', 'src') || qAttr('.MT_Team.TM2 .TM_Logo img', 'data-src');
-
-                const time = qText('.MT_Data .MT_Time');
-                const result = qText('.MT_Data .MT_Result');
-                const status = qText('.MT_Data .MT_Stat');
-
-                const infoLis = Array.from(root.querySelectorAll('.MT_Info li span')).map(x => x.textContent.trim());
-                const channel = infoLis[0] || "";
-                const commentator = infoLis[1] || "";
-                const competition = infoLis[2] || "";
-
-                cards.push({
-                  home, away, home_logo: homeLogo, away_logo: awayLogo,
-                  time_local: time, result_text: result, status_text: status,
-                  channel, commentator, competition
-                });
-              });
-              return cards;
-            }
-            """
-            cards = page.evaluate(js)
-        except Exception as e:
-            print(f"[error] JavaScript evaluation failed: {e}")
-            cards = []  # Return empty array if evaluation fails
+def scrape_live():
+    """One-shot live refresh (full scrape when there is no snapshot for today)."""
+    url = current_url()
+    today = dt.datetime.now(BAGHDAD_TZ).date().isoformat()
+
+    def browser_scores():
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            ctx, page, blocker = open_page(browser, url)
+            scores = load_cards(page, ctx, blocker, url, js=SCORES_JS)
+            browser.close()
+        return scores
+
+    if live_refresh(url, today, browser_scores) is None:
+        scrape()
 
+# --check-static: the browserless path against a browser scrape of the same page (compare_cards)
+def check_static(url=None):
+    """Exit status: 0 when the static path matches the browser on `url`, 1 otherwise."""
+    url = url or current_url()
+    today = dt.datetime.now(BAGHDAD_TZ).date().isoformat()
+    if lxml_html is None:
+        print("[x] lxml is not installed, no static path to check")
+        return 1
+    try:
+        static = extract_cards_lxml(fetch_static(url).text)
+    except (requests.RequestException, ValueError) as e:
+        print(f"[x] static fetch failed: {e}")
+        return 1
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        ctx, page, blocker = open_page(browser, url)
+        cards = load_cards(page, ctx, blocker, url)
         browser.close()
+    if not cards:
+        print("[x] the browser found no cards, nothing to compare with")
+        return 1
+    problems = compare_cards(static, cards, today)
+    for problem in problems:
+        print("[!]", problem)
+    print(f"[{'x' if problems else '✓'}] static {len(static)} vs browser {len(cards)} cards:"
+          f" {len(problems)} mismatches")
+    return 1 if problems else 0
 
-    print(f"[found] {len(cards)} cards")
+def run_on_change(cmd):
+    """Optional hook after each write (e.g. git commit && git push)."""
+    if not cmd:
+        return
+    rc = subprocess.run(cmd, shell=True).returncode
+    if rc != 0:
+        print(f"[!] on-change command exited with {rc}")
+
+def daemon(interval=DAEMON_INTERVAL, max_runtime=DAEMON_MAX_RUNTIME, on_change=None,
+           live_interval=DAEMON_LIVE_INTERVAL):
+    """
+    Keep one browser + context + page warm and do a full scrape every `interval`
+    seconds, with live refreshes (LIVE / about-to-start matches only) every
+    `live_interval` seconds in between (0 = full scrapes only); today.json
+    is rewritten only when its content changes. Any
+    Playwright error (browser crash, closed page, hung reload) tears everything
+    down and relaunches, with exponential backoff on repeated failures.
+    """
+    url = current_url()
+    started = time.monotonic()
+    failures = 0
+
+    def time_left():
+        return max_runtime <= 0 or time.monotonic() - started < max_runtime
+
+    with sync_playwright() as p:
+        while time_left():
+            browser = None
+            wait = 0
+            try:
+                browser = launch_browser(p)
+                ctx, page, blocker = open_page(browser, url)
+                dead = []
+                browser.on("disconnected", lambda _: dead.append("browser disconnected"))
+                page.on("crash", lambda _: dead.append("page crashed"))
+                reload = False
+
+                def page_scores():
+                    nonlocal reload
+                    scores = load_cards(page, ctx, blocker, url, reload=reload, js=SCORES_JS)
+                    reload = True
+                    return scores
+
+                last_full = None
+                while time_left():
+                    t0 = time.monotonic()
+                    full = last_full is None or live_interval <= 0 or t0 - last_full >= interval
+                    with REPORT.run("scrape_yallashoot_to_json"):
+                        today = dt.datetime.now(BAGHDAD_TZ).date().isoformat()
+                        written = None if full else live_refresh(url, today, page_scores)
+                        if written is None:
+                            full = True
+                            cards = static_cards(url, today)
+                            if cards is None:
+                                cards = load_cards(page, ctx, blocker, url, reload=reload)
+                                reload = True
+                            written = bool(cards) and write_output(build_output(cards, url, today))
+                        if written:
+                            run_on_change(on_change)
+                    if dead:
+                        raise PWError(dead[0])
+                    if full:
+                        last_full = t0
+                    failures = 0
+                    step = interval if live_interval <= 0 else min(live_interval, interval)
+                    print(f"[daemon] {'full' if full else 'live'} refresh took {time.monotonic() - t0:.1f}s,"
+                          f" next in {step:.0f}s")
+                    time.sleep(max(0.0, step - (time.monotonic() - t0)))
+            except PWError as e:
+                failures += 1
+                wait = min(RESTART_BACKOFF_MAX, 5 * 2 ** (failures - 1))
+                print(f"[x] browser failure #{failures}: {e}")
+                print(f"[i] restarting browser in {wait}s")
+            finally:
+                if browser is not None:
+                    try:
+                        browser.close()
+                    except PWError:
+                        pass
+            time.sleep(wait)
+    print("[daemon] max runtime reached, exiting")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scrape yalla-shoot matches into www/matches/today.json")
+    ap.add_argument("--daemon", action="store_true", default=os.environ.get("DAEMON") == "1",
+                    help="keep the browser warm and refresh every --interval seconds")
+    ap.add_argument("--interval", type=float, default=DAEMON_INTERVAL)
+    ap.add_argument("--max-runtime", type=float, default=DAEMON_MAX_RUNTIME,
+                    help="daemon: exit after this many seconds (0 = never)")
+    ap.add_argument("--on-change", default=os.environ.get("ON_CHANGE_CMD"),
+                    help="daemon: shell command run after each write of today.json")
+    ap.add_argument("--live", action="store_true", default=os.environ.get("LIVE_ONLY") == "1",
+                    help="only refresh LIVE / about-to-start matches of today.json")
+    ap.add_argument("--live-interval", type=float, default=DAEMON_LIVE_INTERVAL,
+                    help="daemon: seconds between live refreshes (0 = full scrapes only)")
+    ap.add_argument("--check-static", action="store_true",
+                    help="compare the browserless result with a browser scrape of the same page (exit 1 on mismatch)")
+    args = ap.parse_args(argv)
 
-    def normalize_status(ar_text: str) -> str:
-        t = (ar_text or "").strip()
-        if not t: return "NS"
-        if "انتهت" in t or "نتهت" in t: return "FT"
-        if "مباشر" in t or "الشوط" in t: return "LIVE"
-        if "لم" in t and "تبدأ" in t: return "NS"
-        return "NS"
-
-    out = {
-        "date": today,
-        "source_url": url,
-        "matches": []
-    }
-    for c in cards:
-        mid = f"{c['home'][:12]}-{c['away'][:12]}-{today}".replace(" ", "")
-        out["matches"].append({
-            "id": mid,
-            "home": c["home"],
-            "away": c["away"],
-            "home_logo": c["home_logo"],
-            "away_logo": c["away_logo"],
-            # Now this is Baghdad time because browser is configured to Asia/Baghdad
-            "time_baghdad": c["time_local"],
-            "status": normalize_status(c["status_text"]),
-            "status_text": c["status_text"],
-            "result_text": c["result_text"],
-            "channel": c["channel"] or None,
-            "commentator": c["commentator"] or None,
-            "competition": c["competition"] or None,
-            "_source": "yalla1shoot"
-        })
-
-    with OUT_PATH.open("w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
-
-    print(f"[write] {OUT_PATH} with {len(out['matches'])} matches.")
+    if args.check_static:
+        return check_static()
+    if args.daemon:
+        daemon(args.interval, args.max_runtime, args.on_change, args.live_interval)
+    elif args.live:
+        with REPORT.run("scrape_yallashoot_to_json"):
+            scrape_live()
+    else:
+        with REPORT.run("scrape_yallashoot_to_json"):
+            scrape()
 
 if __name__ == "__main__":
-    scrape()
\ No newline at end of file
+    sys.exit(main())
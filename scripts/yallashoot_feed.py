@@ -0,0 +1,102 @@
+# scripts/yallashoot_feed.py
+"""
+www/matches/today.json and its delta feed: change-only writes by match id.
+No Playwright here, so the scraper's output side can be tested on its own.
+"""
+import datetime as dt
+import json
+import os
+from pathlib import Path
+
+from run_report import REPORT
+from yallashoot_static import BAGHDAD_TZ
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# For GitHub Pages, the output should be in the www directory to be served correctly
+OUT_DIR = REPO_ROOT / "www" / "matches"
+OUT_DIR.mkdir(parents=True, exist_ok=True)
+OUT_PATH = OUT_DIR / "today.json"
+
+# Delta feed next to the snapshot: clients holding version N-1 apply it,
+# anyone else re-downloads today.json
+DELTA_PATH = OUT_DIR / "today.delta.json"
+
+def load_snapshot(path=None):
+    try:
+        return json.loads((path or OUT_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def index_matches(matches):
+    """{id: match}; a repeated id gets a #n suffix so nothing is lost in the diff."""
+    out = {}
+    for m in matches or []:
+        key = m.get("id") or ""
+        n = 1
+        while key in out:
+            n += 1
+            key = f"{m.get('id')}#{n}"
+        out[key] = m
+    return out
+
+def diff_matches(old, new):
+    """(added, removed ids, {id: changed fields}) between two match lists."""
+    old_i, new_i = index_matches(old), index_matches(new)
+    added = [m for k, m in new_i.items() if k not in old_i]
+    removed = [k for k in old_i if k not in new_i]
+    changed = {}
+    for k, m in new_i.items():
+        before = old_i.get(k)
+        if before is None:
+            continue
+        fields = {f: v for f, v in m.items() if before.get(f) != v}
+        fields.update({f: None for f in before if f not in m})
+        if fields:
+            changed[k] = fields
+    return added, removed, changed
+
+def _atomic_write(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+def write_output(out, path=None, delta_path=None):
+    """
+    Diff against the previous snapshot by match id. Nothing changed: no write.
+    Otherwise bump "version", rewrite the snapshot and publish the delta
+    (added / removed / changed fields) for clients on the previous version.
+    Returns True when written.
+    """
+    path = path or OUT_PATH
+    delta_path = delta_path or DELTA_PATH
+    prev = load_snapshot(path)
+    prev_version = (prev or {}).get("version", 0)
+    added, removed, changed = diff_matches((prev or {}).get("matches"), out["matches"])
+    meta = {k: v for k, v in out.items() if k != "matches"}
+    same_meta = prev is not None and all(prev.get(k) == v for k, v in meta.items())
+    if same_meta and not (added or removed or changed):
+        print(f"[same] {path} unchanged ({len(out['matches'])} matches, version {prev_version})")
+        return False
+
+    version = prev_version + 1
+    snapshot = {"version": version, **out}
+    delta = {
+        "version": version,
+        "base_version": prev_version,
+        "generated_at": dt.datetime.now(BAGHDAD_TZ).isoformat(timespec="seconds"),
+        **meta,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+    }
+    with REPORT.stage("publish", str(path)) as st:
+        payload = json.dumps(snapshot, ensure_ascii=False, indent=2)
+        _atomic_write(path, payload)
+        # delta last: its version never runs ahead of the snapshot's
+        delta_payload = json.dumps(delta, ensure_ascii=False, separators=(",", ":"))
+        _atomic_write(delta_path, delta_payload)
+        st.bytes += len(payload.encode("utf-8")) + len(delta_payload.encode("utf-8"))
+        st.entries += len(added) + len(removed) + len(changed)
+    print(f"[write] {path} with {len(out['matches'])} matches (version {version}: "
+          f"+{len(added)} -{len(removed)} ~{len(changed)})")
+    return True
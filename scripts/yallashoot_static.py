@@ -0,0 +1,239 @@
+# scripts/yallashoot_static.py
+"""
+lxml twins of the in-page extractors of scrape_yallashoot_to_json.py, for the
+browserless fast path (plain HTTP GET, no Playwright), and the pure helpers
+the scraper shares with it (status, kick-off, match id, --check-static).
+
+Kick-off times: the visible MT_Time text is rendered client-side in the
+viewer's timezone (the browser runs with timezone_id="Asia/Baghdad"), so the
+server-rendered text can't be trusted. The time is taken from an attribute
+that pins the instant (epoch, or ISO 8601 with an offset) and converted to
+Asia/Baghdad; a card without one gets time_local="" and the caller falls back
+to the browser.
+
+Status and result: the client updates both while a match runs, so the static
+values are only kept for a known status text (state_problem), otherwise the
+browser is used as well.
+"""
+import datetime as dt
+import os
+import re
+from zoneinfo import ZoneInfo
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # no lxml: the scraper always uses the browser
+    lxml_html = None
+
+BAGHDAD_TZ = ZoneInfo("Asia/Baghdad")
+
+def _has_class(*names):
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names)
+
+def _xp(*steps):
+    """('A', 'B'), ('C',) -> './/*[A and B]//*[C]', i.e. the CSS '.A.B .C'."""
+    return ".//" + "//".join(f"*[{_has_class(*step)}]" for step in steps)
+
+# Same selectors as CARDS_JS, as XPath
+XP_CARD = "//*[" + _has_class("AY_Inner") + "]"
+XP_HOME = _xp(("MT_Team", "TM1"), ("TM_Name",))
+XP_AWAY = _xp(("MT_Team", "TM2"), ("TM_Name",))
+XP_HOME_LOGO = _xp(("MT_Team", "TM1"), ("TM_Logo",)) + "//img"
+XP_AWAY_LOGO = _xp(("MT_Team", "TM2"), ("TM_Logo",)) + "//img"
+XP_TIME = _xp(("MT_Data",), ("MT_Time",))
+XP_RESULT = _xp(("MT_Data",), ("MT_Result",))
+XP_STATUS = _xp(("MT_Data",), ("MT_Stat",))
+XP_INFO = _xp(("MT_Info",)) + "//li//span"
+# Lazy-image attributes holding the real logo URL, checked before src (same order in CARDS_JS)
+LOGO_LAZY_ATTRS = ("data-src", "data-lazy-src", "data-original")
+
+# Attributes that may carry the kick-off instant, in order of preference
+TIME_ATTRS = ("data-start", "data-timestamp", "data-time", "data-datetime", "data-date", "datetime")
+XP_TIME_ATTR = ".//*[" + " or ".join(f"@{a}" for a in TIME_ATTRS) + "]"
+EPOCH_RE = re.compile(r"\d{9,13}")
+# A published score: "2 - 1" (any digits, the site's own spacing)
+RESULT_RE = re.compile(r"\d{1,2}\s*-\s*\d{1,2}")
+
+def logo_src(img):
+    """Real logo URL of an <img>: lazy attribute first, src unless it's a data: placeholder."""
+    for attr in LOGO_LAZY_ATTRS:
+        v = (img.get(attr) or "").strip()
+        if v and not v.startswith("data:"):
+            return v
+    src = (img.get("src") or "").strip()
+    return "" if src.startswith("data:") else src
+
+def parse_instant(value):
+    """Epoch (s or ms) or ISO 8601 with an offset -> aware datetime; None for anything else."""
+    v = (value or "").strip()
+    if EPOCH_RE.fullmatch(v):
+        ts = int(v)
+        return dt.datetime.fromtimestamp(ts / 1000 if ts > 10 ** 11 else ts, dt.timezone.utc)
+    try:
+        d = dt.datetime.fromisoformat(v.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # a naive value is a wall-clock time in some unknown zone: not usable
+    return d if d.tzinfo is not None else None
+
+def card_kickoff(inner, root):
+    """Kick-off of a card as an aware datetime: time element first, then the card itself."""
+    times = root.xpath(XP_TIME)
+    candidates = times[:1] + (times[0].xpath(XP_TIME_ATTR) if times else [])
+    # not root's other descendants: several cards may share the same parent
+    candidates += [inner] + inner.xpath(XP_TIME_ATTR) + [root]
+    for el in candidates:
+        for attr in TIME_ATTRS:
+            d = parse_instant(el.get(attr))
+            if d is not None:
+                return d
+    return None
+
+def baghdad_time(instant):
+    """'HH:MM' in Asia/Baghdad, the format kickoff_at() reads back."""
+    return instant.astimezone(BAGHDAD_TZ).strftime("%H:%M")
+
+def known_status(ar_text):
+    """NS / LIVE / FT for a status text the site is known to render, None otherwise."""
+    t = (ar_text or "").strip()
+    if "انتهت" in t or "نتهت" in t: return "FT"
+    if "مباشر" in t or "الشوط" in t: return "LIVE"
+    if "لم" in t and "تبدأ" in t: return "NS"
+    return None
+
+def normalize_status(ar_text):
+    """Published status: an empty or unknown text counts as not started."""
+    return known_status(ar_text) or "NS"
+
+def kickoff_at(time_text, today, now=None):
+    """
+    '21:45' / '9:45 م' (Baghdad) -> aware datetime, or None. The text has no
+    date: it is taken on `today`, or, given `now`, on the day around now that
+    puts it closest to now (00:30 seen at 23:50 is tomorrow's, 23:45 seen at
+    00:20 was yesterday's). A naive `now` is the runner's local time.
+    """
+    m = re.search(r"(\d{1,2}):(\d{2})", time_text or "")
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2))
+    if "م" in time_text[m.end():] and hour < 12:      # مساءً (PM)
+        hour += 12
+    elif "ص" in time_text[m.end():] and hour == 12:   # صباحاً (AM)
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    at = dt.time(hour, minute)
+    if now is None:
+        return dt.datetime.combine(dt.date.fromisoformat(today), at, tzinfo=BAGHDAD_TZ)
+    now = now.astimezone(BAGHDAD_TZ)
+    days = (now.date() + dt.timedelta(days=d) for d in (-1, 0, 1))
+    return min((dt.datetime.combine(day, at, tzinfo=BAGHDAD_TZ) for day in days), key=lambda k: abs(k - now))
+
+# Live refresh: matches that are LIVE or about to start
+LIVE_LEAD_MIN = int(os.environ.get("LIVE_LEAD_MIN", "15"))     # start watching N min before kick-off
+LIVE_GIVE_UP_H = 3                                             # still NS this long after kick-off: postponed
+
+def needs_live_refresh(match, today, now):
+    """A published match worth re-reading now: LIVE, or NS from LIVE_LEAD_MIN before kick-off."""
+    if match.get("status") == "LIVE":
+        return True
+    if match.get("status") != "NS":
+        return False
+    kickoff = kickoff_at(match.get("time_baghdad"), today, now)
+    if kickoff is None:
+        return False
+    until = (kickoff - now.astimezone(BAGHDAD_TZ)).total_seconds()
+    return -LIVE_GIVE_UP_H * 3600 < until <= LIVE_LEAD_MIN * 60
+
+def state_problem(card, now):
+    """
+    Why the static status/result of a card can't be published as is, or None.
+    Kept: a known not-started / finished text with an empty or "N - N" result,
+    and "not started" only while the kick-off (card["kickoff"]) is still ahead.
+    """
+    status = known_status(card["status_text"])
+    result = card["result_text"].strip()
+    if status is None:
+        return f"unknown status {card['status_text']!r}"
+    if status == "LIVE":
+        return "live, the score moves client-side"
+    if result and not RESULT_RE.fullmatch(result):
+        return f"unexpected result {card['result_text']!r}"
+    if status == "FT" and not result:
+        return "finished without a result"
+    if status == "NS" and card.get("kickoff") is not None and card["kickoff"] <= now:
+        return "still not started after kick-off"
+    return None
+
+def extract_cards_lxml(html):
+    """
+    Python twin of CARDS_JS over static HTML (time_local from card_kickoff, see
+    above), plus "kickoff": the aware kick-off instant or None.
+    """
+    doc = lxml_html.document_fromstring(html)
+    cards = []
+    for inner in doc.xpath(XP_CARD):
+        root = inner.getparent() if inner.getparent() is not None else inner
+
+        def q_text(xp):
+            el = root.xpath(xp)
+            return el[0].text_content().strip() if el else ""
+
+        def q_src(xp):
+            el = root.xpath(xp)
+            return logo_src(el[0]) if el else ""
+
+        kickoff = card_kickoff(inner, root)
+        info = [x.text_content().strip() for x in root.xpath(XP_INFO)]
+        cards.append({
+            "home": q_text(XP_HOME), "away": q_text(XP_AWAY),
+            "home_logo": q_src(XP_HOME_LOGO), "away_logo": q_src(XP_AWAY_LOGO),
+            "time_local": baghdad_time(kickoff) if kickoff else "", "kickoff": kickoff,
+            "result_text": q_text(XP_RESULT), "status_text": q_text(XP_STATUS),
+            "channel": info[0] if len(info) > 0 else "",
+            "commentator": info[1] if len(info) > 1 else "",
+            "competition": info[2] if len(info) > 2 else "",
+        })
+    return cards
+
+def extract_scores_lxml(html):
+    """Python twin of SCORES_JS over static HTML, plus "kickoff" as in extract_cards_lxml."""
+    doc = lxml_html.document_fromstring(html)
+    scores = []
+    for inner in doc.xpath(XP_CARD):
+        root = inner.getparent() if inner.getparent() is not None else inner
+
+        def q_text(xp):
+            el = root.xpath(xp)
+            return el[0].text_content().strip() if el else ""
+
+        scores.append({"home": q_text(XP_HOME), "away": q_text(XP_AWAY),
+                       "result_text": q_text(XP_RESULT), "status_text": q_text(XP_STATUS),
+                       "kickoff": card_kickoff(inner, root)})
+    return scores
+
+def match_id(home, away, today):
+    return f"{home[:12]}-{away[:12]}-{today}".replace(" ", "")
+
+# --check-static: the browserless path against a browser scrape of the same page
+CHECKED_FIELDS = ("home_logo", "away_logo", "channel", "commentator", "competition", "status_text", "result_text")
+
+def compare_cards(static, browser, today):
+    """
+    Differences between static and browser cards of one page. A live match may
+    legitimately move between the two loads; run the check outside match hours.
+    """
+    s_by = {match_id(c["home"], c["away"], today): c for c in static}
+    b_by = {match_id(c["home"], c["away"], today): c for c in browser}
+    problems = [f"{mid}: missing from the static page" for mid in sorted(b_by.keys() - s_by.keys())]
+    problems += [f"{mid}: not on the browser page" for mid in sorted(s_by.keys() - b_by.keys())]
+    for mid in sorted(s_by.keys() & b_by.keys()):
+        sc, bc = s_by[mid], b_by[mid]
+        if not sc["time_local"]:
+            problems.append(f"{mid}: no timezone-independent kick-off on the static page")
+        elif kickoff_at(sc["time_local"], today) != kickoff_at(bc["time_local"], today):
+            problems.append(f"{mid}: time {sc['time_local']!r} (static) != {bc['time_local']!r} (browser)")
+        for key in CHECKED_FIELDS:
+            if sc[key] != bc[key]:
+                problems.append(f"{mid}: {key} {sc[key]!r} (static) != {bc[key]!r} (browser)")
+    return problems
@@ -0,0 +1,12 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+"""The scripts are run as plain scripts (no package): put their folders on sys.path."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for sub in ("m3u-update/scripts", "scripts", "benchmarks"):
+    path = str(ROOT / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
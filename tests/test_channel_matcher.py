@@ -0,0 +1,51 @@
+# tests/test_channel_matcher.py
+# -*- coding: utf-8 -*-
+import re
+from pathlib import Path
+
+import pytest
+
+from bench_matcher import all_aliases
+from channel_matcher import ChannelMatcher, required_keywords
+from fixtures import WANTED_NAMES, make_source
+from m3u_stream import iter_pairs
+
+M3U_DIR = Path(__file__).resolve().parents[1] / "m3u-update"
+
+
+def naive_match_all(aliases, text):
+    return [name for name, pats in aliases.items()
+            if any(re.compile(p, re.I).search(text) if isinstance(p, str) else p.search(text) for p in pats)]
+
+
+def corpus():
+    lines = [extinf for extinf, _ in iter_pairs(make_source(3000, seed=7, wanted_ratio=0.2))]
+    for path in sorted(M3U_DIR.glob("*.m3u")):
+        lines += [extinf for extinf, _ in iter_pairs(path.read_text(encoding="utf-8", errors="replace"))]
+    for name in WANTED_NAMES:
+        lines += [f"#EXTINF:-1,{name}", f"#EXTINF:-1,{name.upper()}", f"#EXTINF:-1,{name.lower()}",
+                  f"#EXTINF:-1,{name.replace(' ', '')}", f"#EXTINF:-1,{name.replace(' ', '  ')}"]
+    return lines
+
+
+@pytest.mark.parametrize("extra", [0, 25])
+def test_match_all_equals_regex_by_regex_scan(extra):
+    aliases = all_aliases(extra)
+    matcher = ChannelMatcher(aliases)
+    lines = corpus()
+    if extra:
+        lines += [f"#EXTINF:-1,Channel X{i} FHD" for i in range(extra)]
+    for line in lines:
+        assert matcher.match_all(line) == naive_match_all(aliases, line), line
+
+
+def test_string_aliases_are_case_insensitive():
+    matcher = ChannelMatcher({"a": [r"\btnt\s*sports?\s*1\b"], "b": [r"sky|bt"]})
+    assert matcher.match_all("TNT Sports 1 UK") == ["a"]
+    assert matcher.first("BT Sport") == "b"
+    assert matcher.first("Eurosport 2") is None
+
+
+def test_required_keywords_from_literals_and_alternation():
+    assert frozenset({"eleven"}) in required_keywords(re.compile(r"\beleven\s*sports?\s*1\b", re.I))
+    assert frozenset({"sky", "tnt"}) in required_keywords(re.compile(r"\b(sky|tnt)\s*sports\b", re.I))
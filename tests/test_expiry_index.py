@@ -0,0 +1,79 @@
+# tests/test_expiry_index.py
+# -*- coding: utf-8 -*-
+import pytest
+
+import expiry_index
+from expiry_index import EXPIRY_MARGIN, EXPIRY_MAX_INTERVAL, ExpiryIndex, RefreshSchedule, url_expiry
+
+NOW = 1_760_000_000
+
+
+def playlist(*urls):
+    lines = ["#EXTM3U"]
+    for i, url in enumerate(urls):
+        lines += [f"#EXTINF:-1,Channel {i}", url]
+    return "\n".join(lines) + "\n"
+
+
+def signed(expires):
+    return f"https://cdn.example/hls/x.m3u8?md5=abc&expires={expires}"
+
+
+@pytest.fixture(autouse=True)
+def no_force(monkeypatch):
+    monkeypatch.setattr(expiry_index, "FORCE_REFRESH", False)
+
+
+def test_url_expiry():
+    assert url_expiry(signed(123)) == 123
+    assert url_expiry("https://cdn.example/x.m3u8") is None
+    assert url_expiry("https://cdn.example/x.m3u8?expires=soon") is None
+    assert url_expiry(None) is None
+
+
+def test_earliest_expiry_per_channel():
+    idx = ExpiryIndex.from_text(playlist(signed(NOW + 7200), signed(NOW + 3600)))
+    assert idx.earliest() == NOW + 3600
+    assert [e.channel for e in idx.expiring_within(3600, now=NOW)] == ["Channel 1"]
+
+
+def test_unknown_destination_is_due(tmp_path):
+    assert RefreshSchedule(str(tmp_path / "s.json")).is_due("dest", now=NOW)
+
+
+def test_signed_destination_waits_until_margin_before_expiry(tmp_path):
+    sched = RefreshSchedule(str(tmp_path / "s.json"))
+    expires = NOW + 3600
+    sched.record("dest", playlist(signed(expires), signed(expires + 600)), now=NOW)
+
+    assert sched.next_refresh("dest") == expires - EXPIRY_MARGIN
+    assert not sched.is_due("dest", now=expires - EXPIRY_MARGIN - 1)
+    assert sched.is_due("dest", now=expires - EXPIRY_MARGIN)
+
+
+def test_far_expiry_is_capped_by_max_interval(tmp_path):
+    sched = RefreshSchedule(str(tmp_path / "s.json"))
+    sched.record("dest", playlist(signed(NOW + 10 * EXPIRY_MAX_INTERVAL)), now=NOW)
+    assert sched.next_refresh("dest") == NOW + EXPIRY_MAX_INTERVAL
+
+
+def test_unsigned_url_refreshes_every_run(tmp_path):
+    sched = RefreshSchedule(str(tmp_path / "s.json"))
+    sched.record("dest", playlist(signed(NOW + 3600), "https://cdn.example/plain.m3u8"), now=NOW)
+    assert sched.next_refresh("dest") == NOW
+    assert sched.is_due("dest", now=NOW)
+
+
+def test_force_refresh(tmp_path, monkeypatch):
+    sched = RefreshSchedule(str(tmp_path / "s.json"))
+    sched.record("dest", playlist(signed(NOW + 3600)), now=NOW)
+    monkeypatch.setattr(expiry_index, "FORCE_REFRESH", True)
+    assert sched.is_due("dest", now=NOW)
+
+
+def test_schedule_survives_save_and_reload(tmp_path):
+    path = str(tmp_path / "cache" / "s.json")
+    sched = RefreshSchedule(path)
+    sched.record("dest", playlist(signed(NOW + 3600)), now=NOW)
+    sched.save()
+    assert RefreshSchedule(path).next_refresh("dest") == NOW + 3600 - EXPIRY_MARGIN
@@ -0,0 +1,87 @@
+# tests/test_generate_livetv_playlist.py
+# -*- coding: utf-8 -*-
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import generate_livetv_playlist as livetv
+from fixtures import make_event_page
+
+EVENTS_XML = """<?xml version="1.0" encoding="utf-8"?>
+<eventos>
+  <evento><url> https://livetv.sx/es/eventinfo/1/ </url><nombre>Real Madrid – Barça</nombre><hora>21:00</hora></evento>
+  <evento><nombre>Sin url</nombre><hora>18:00</hora></evento>
+  <evento>
+    <url>https://livetv.sx/es/eventinfo/2/</url>
+    <nombre>Nested</nombre>
+    <extra><evento><url>https://livetv.sx/es/eventinfo/inner/</url></evento></extra>
+  </evento>
+  <otro><url>https://livetv.sx/es/eventinfo/ignored/</url></otro>
+  <evento><url>https://livetv.sx/es/eventinfo/3/</url></evento>
+</eventos>
+"""
+
+
+def test_iter_events_reads_every_top_level_event(tmp_path):
+    path = tmp_path / "events.xml"
+    path.write_text(EVENTS_XML, encoding="utf-8")
+    assert list(livetv.iter_events(str(path))) == [
+        ("https://livetv.sx/es/eventinfo/1/", "Real Madrid – Barça", "21:00"),
+        ("https://livetv.sx/es/eventinfo/2/", "Nested", None),
+        ("https://livetv.sx/es/eventinfo/3/", None, None),
+    ]
+
+
+def test_iter_events_frees_each_event_once_read(tmp_path, monkeypatch):
+    path = tmp_path / "events.xml"
+    path.write_text("<eventos>" + "".join(
+        f"<evento><url>https://livetv.sx/es/eventinfo/{i}/</url></evento>" for i in range(5000)) + "</eventos>",
+        encoding="utf-8")
+    roots = []
+    real_iterparse = ET.iterparse
+
+    def spy(source, events):
+        for ev, elem in real_iterparse(source, events):
+            if not roots:
+                roots.append(elem)
+            yield ev, elem
+    monkeypatch.setattr(livetv.ET, "iterparse", spy)
+
+    held = [len(roots[0]) for _ in livetv.iter_events(str(path))]
+    assert len(held) == 5000
+    # the parser reads ahead one 16 KiB chunk at most; read events never pile up on the root
+    assert max(held) < 500
+
+
+ROW = '<tr><td class="lang">es</td><td class="{cls}">{a}</td></tr>'
+PAGES = {
+    "broadcast-table": make_event_page(7),
+    "accented-class-and-absolute-href": (
+        '<table class="lnktbj broadcást">'
+        + ROW.format(cls="live", a='<a href="https://other.example/es/webplayer/1/">w</a>')
+        + ROW.format(cls="live big", a='<a href="sop://broker:3912/1">sop</a>')
+        + ROW.format(cls="lang", a='<a href="/es/webplayer/2/">not a live cell</a>')
+        + "</table>"),
+    "onclick-without-player": (
+        '<table class="broadcast">'
+        + ROW.format(cls="live", a='<a href="/es/webplayer/3/" onclick="return false">x</a>')
+        + ROW.format(cls="live", a='<a name="anchor">no href</a><a href="/es/showvideo/4/">v</a>')
+        + "</table>"),
+    "nested-broadcast-tables": (
+        '<table class="broadcast"><tr><td class="live"><a href="/es/webplayer/5/">a</a>'
+        '<table class="broadcast">' + ROW.format(cls="live", a='<a href="/es/webplayer/6/">b</a>')
+        + "</table></td></tr></table>"),
+    "general-fallback": (
+        '<table class="other">' + ROW.format(cls="live", a='<a href="/es/webplayer/8/">t</a>') + "</table>"
+        '<p><a href="/es/showvideo/9/">v</a> <a href="acestream://abc/es/webplayer/1/">ace</a>'
+        ' <a href="https://livetv.sx/es/webplayer/10/">abs</a> <a href="/es/eventinfo/1/">info</a></p>'),
+    "no-links": "<html><body><p>Aucun lecteur</p></body></html>",
+}
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_lxml_and_bs4_extractors_agree(name):
+    html = PAGES[name]
+    links = livetv.extract_player_links_lxml(html)
+    assert links == livetv.extract_player_links_bs4(html)
+    assert bool(links) == (name != "no-links")
@@ -0,0 +1,175 @@
+# tests/test_github_publish.py
+# -*- coding: utf-8 -*-
+"""BatchCommit against a local http.server stand-in for the Git Data API."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import github_publish
+from github_publish import BatchCommit, GitHubError, RemoteShaCache, git_blob_sha
+
+
+class FakeGitHub:
+    def __init__(self, files=None, conflicts=0, bad_trees=0):
+        self.head = "c0"
+        self.files = dict(files or {})     # path -> blob sha on the head tree
+        self.conflicts = conflicts         # how many ref updates answer 422
+        self.bad_trees = bad_trees         # how many tree posts answer 422 (invalid tree)
+        self.calls = []
+        self.bodies = []
+
+    def handle(self, method, path, body):
+        self.calls.append((method, path.split("?")[0]))
+        self.bodies.append(body)
+        base = "/repos/o/r/"
+        route = path[len(base):].split("?")[0]
+        if method == "GET" and route == "git/ref/heads/main":
+            return 200, {"object": {"sha": self.head}}
+        if method == "GET" and route.startswith("git/commits/"):
+            return 200, {"tree": {"sha": "t-" + route.rsplit("/", 1)[1]}}
+        if method == "GET" and route.startswith("git/trees/"):
+            return 200, {"tree": [{"path": p, "sha": s} for p, s in self.files.items()]}
+        if method == "POST" and route == "git/trees":
+            if self.bad_trees:
+                self.bad_trees -= 1
+                return 422, {"message": "tree.path contains a malformed path component"}
+            return 201, {"sha": "t-new"}
+        if method == "POST" and route == "git/commits":
+            return 201, {"sha": "c-" + body["parents"][0]}
+        if method == "PATCH" and route == "git/refs/heads/main":
+            if self.conflicts:
+                self.conflicts -= 1
+                self.head += "+"           # someone else pushed meanwhile
+                return 422, {"message": "Update is not a fast forward"}
+            self.head = body["sha"]
+            return 200, {"object": {"sha": self.head}}
+        return 404, {"message": "Not Found"}
+
+
+@pytest.fixture
+def server():
+    state = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            status, payload = state["gh"].handle(self.command, self.path, body)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = _serve
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def start(gh):
+        state["gh"] = gh
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    c = RemoteShaCache(str(tmp_path / "shas.json"))
+    monkeypatch.setattr(github_publish, "SHA_CACHE", c)
+    return c
+
+
+SEQUENCE = [
+    ("GET", "/repos/o/r/git/ref/heads/main"),
+    ("GET", "/repos/o/r/git/commits/c0"),
+    ("GET", "/repos/o/r/git/trees/t-c0"),
+    ("POST", "/repos/o/r/git/trees"),
+    ("POST", "/repos/o/r/git/commits"),
+    ("PATCH", "/repos/o/r/git/refs/heads/main"),
+]
+
+
+def test_one_commit_with_fixed_call_sequence(server, cache):
+    gh = FakeGitHub({"a.m3u": git_blob_sha(b"old a"), "b.m3u": git_blob_sha(b"b")})
+    batch = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    for path, data in [("a.m3u", b"new a"), ("b.m3u", b"b"), ("c.m3u", b"new c")]:
+        batch.add(path, data)
+
+    assert batch.commit() == "c-c0"
+    assert gh.calls == SEQUENCE
+    assert batch.api_calls == 6
+    tree = gh.bodies[3]
+    assert tree["base_tree"] == "t-c0"
+    assert {e["path"]: e["content"] for e in tree["tree"]} == {"a.m3u": "new a", "c.m3u": "new c"}
+    assert gh.bodies[4] == {"message": "update", "tree": "t-new", "parents": ["c0"]}
+    assert gh.bodies[5] == {"sha": "c-c0", "force": False}
+    for path, data in [("a.m3u", b"new a"), ("b.m3u", b"b"), ("c.m3u", b"new c")]:
+        assert cache.get(RemoteShaCache.key("o/r", "main", path)) == git_blob_sha(data)
+
+
+def test_unchanged_files_make_no_commit(server):
+    gh = FakeGitHub({"a.m3u": git_blob_sha(b"a")})
+    batch = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    batch.add("a.m3u", b"a")
+
+    assert batch.commit() is None
+    assert [m for m, _ in gh.calls] == ["GET", "GET", "GET"]
+
+    # next run: the cache knows the blob, nothing is even queued
+    again = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    assert not again.add("a.m3u", b"a")
+    assert again.commit() is None
+    assert len(gh.calls) == 3
+
+
+def test_ref_conflict_retries_once_on_new_head(server):
+    gh = FakeGitHub(conflicts=1)
+    batch = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    batch.add("a.m3u", b"a")
+
+    assert batch.commit() == "c-c0+"
+    assert gh.calls[:6] == SEQUENCE
+    assert gh.calls[6:] == [
+        ("GET", "/repos/o/r/git/ref/heads/main"),
+        ("GET", "/repos/o/r/git/commits/c0+"),
+        ("GET", "/repos/o/r/git/trees/t-c0+"),
+        ("POST", "/repos/o/r/git/trees"),
+        ("POST", "/repos/o/r/git/commits"),
+        ("PATCH", "/repos/o/r/git/refs/heads/main"),
+    ]
+    assert gh.bodies[10]["parents"] == ["c0+"]
+    assert gh.head == "c-c0+"
+
+
+def test_second_conflict_is_raised(server):
+    gh = FakeGitHub(conflicts=2)
+    batch = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    batch.add("a.m3u", b"a")
+
+    with pytest.raises(GitHubError) as err:
+        batch.commit()
+    assert err.value.status == 422 and err.value.not_fast_forward
+    assert [c for c in gh.calls if c[0] == "PATCH"] == [SEQUENCE[-1]] * 2
+
+
+def test_other_422_is_not_retried(server):
+    gh = FakeGitHub(bad_trees=1)
+    batch = BatchCommit("o/r", "main", "t", "update", api=server(gh))
+    batch.add("a.m3u", b"a")
+
+    with pytest.raises(GitHubError) as err:
+        batch.commit()
+    assert (err.value.method, err.value.path, err.value.status) == ("POST", "git/trees", 422)
+    assert not err.value.not_fast_forward
+    assert gh.calls == SEQUENCE[:4]
@@ -0,0 +1,46 @@
+# tests/test_github_sha_cache.py
+# -*- coding: utf-8 -*-
+import pytest
+
+import github_publish
+from github_publish import BatchCommit, RemoteShaCache, git_blob_sha, known_unchanged
+
+KEY = RemoteShaCache.key("o/r", "main", "a.m3u")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = RemoteShaCache(str(tmp_path / "shas.json"))
+    monkeypatch.setattr(github_publish, "SHA_CACHE", c)
+    return c
+
+
+def test_blob_sha_matches_git():
+    # git hash-object on "hello\n"
+    assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+def test_cache_alone_skips(cache):
+    cache.set(KEY, git_blob_sha(b"new"))
+    assert known_unchanged(KEY, git_blob_sha(b"new"))
+
+
+def test_remote_edit_invalidates_cache(cache):
+    # the cache says we published "new", but someone changed the file since
+    cache.set(KEY, git_blob_sha(b"new"))
+    assert not known_unchanged(KEY, git_blob_sha(b"new"), remote_content=b"edited by hand")
+    assert cache.get(KEY) is None
+    # the drop is persisted
+    assert RemoteShaCache(str(cache.path)).get(KEY) is None
+
+
+def test_remote_equal_to_output_skips_without_cache(cache):
+    assert known_unchanged(KEY, git_blob_sha(b"same"), remote_content=b"same")
+
+
+def test_batch_add_uses_remote_content(cache):
+    cache.set(KEY, git_blob_sha(b"new"))
+    batch = BatchCommit("o/r", "main", "t", "msg", api="http://127.0.0.1:9")
+    assert batch.add("a.m3u", b"new", remote_content=b"edited by hand")
+    assert batch.files == {"a.m3u": b"new"}
+    assert not batch.add("b.m3u", b"x", remote_content=b"x")
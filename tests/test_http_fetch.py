@@ -0,0 +1,77 @@
+# tests/test_http_fetch.py
+# -*- coding: utf-8 -*-
+"""fetch_texts + HttpCache against a local http.server that honours ETag."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_fetch
+from http_fetch import HttpCache, commit_cache, fetch_texts
+
+BODY = "#EXTM3U\n#EXTINF:-1,TNT Sports 1\nhttps://cdn/tnt1.m3u8\n"
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def origin():
+    seen = []    # If-None-Match of every request (None = unconditional)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            inm = self.headers.get("If-None-Match")
+            seen.append(inm)
+            if inm == ETAG:
+                self.send_response(304)
+                self.send_header("ETag", ETAG)
+                self.end_headers()
+                return
+            data = BODY.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/list.m3u", seen
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = HttpCache(tmp_path / "http")
+    monkeypatch.setattr(http_fetch, "CACHE", c)
+    return c
+
+
+def test_second_run_gets_304_with_cached_body(origin, cache):
+    url, seen = origin
+    (first,) = fetch_texts(url)
+    assert first == BODY and not first.not_modified
+    commit_cache()                      # the run succeeded
+
+    (second,) = fetch_texts(url)
+    assert seen == [None, ETAG]
+    assert second.not_modified
+    assert second == BODY
+
+
+def test_failed_run_saves_no_validator(origin, cache):
+    url, seen = origin
+    fetch_texts(url)                    # run fails before commit_cache()
+    assert cache.lookup(url) is None
+    assert not cache.dir.exists()
+
+    (again,) = fetch_texts(url)
+    assert seen == [None, None]         # nothing stored: unconditional again
+    assert not again.not_modified and again == BODY
+
@@ -0,0 +1,61 @@
+# tests/test_livetv_cache.py
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import pytest
+
+from livetv_cache import (LIVETV_TTL_ENDED, LIVETV_TTL_FAR, LIVETV_TTL_LIVE, LIVETV_TTL_SOON,
+                          LIVETV_TTL_UNKNOWN, EventCache, content_hash, parse_kickoff, ttl_for)
+
+NOW = datetime(2026, 10, 18, 20, 0).timestamp()
+H = 3600
+
+
+@pytest.mark.parametrize("until, ttl", [
+    (7 * H, LIVETV_TTL_FAR),
+    (2 * H, LIVETV_TTL_SOON),
+    (30 * 60, LIVETV_TTL_LIVE),
+    (-2 * H, LIVETV_TTL_LIVE),
+    (-4 * H, LIVETV_TTL_ENDED),
+])
+def test_ttl_tiers(until, ttl):
+    assert ttl_for(NOW + until, NOW) == ttl
+
+
+def test_unknown_kickoff():
+    assert ttl_for(None, NOW) == LIVETV_TTL_UNKNOWN
+    assert parse_kickoff(None, NOW) is None
+    assert parse_kickoff("TBD", NOW) is None
+    assert parse_kickoff("25:10", NOW) is None
+
+
+def test_parse_kickoff_picks_nearest_day():
+    base = datetime.fromtimestamp(NOW)
+    assert parse_kickoff("21:30", NOW) == base.replace(hour=21, minute=30).timestamp()
+    # 01:00 is closer tomorrow than this morning
+    assert parse_kickoff("01:00", NOW) == (base + timedelta(days=1)).replace(hour=1, minute=0).timestamp()
+    assert parse_kickoff("2026-10-18T22:00:00+00:00", NOW) == datetime.fromisoformat("2026-10-18T22:00:00+00:00").timestamp()
+
+
+def test_is_fresh_follows_kickoff():
+    cache = EventCache(":memory:")
+    cache.put("https://livetv.sx/es/eventinfo/1/", ["https://a/1"], content_hash(b"page"), fetched_at=NOW - 600)
+    entry = cache.get("https://livetv.sx/es/eventinfo/1/")
+    kickoff = datetime.fromtimestamp(NOW)
+
+    # live: 5 min TTL -> a 10 min old entry is stale
+    assert not EventCache.is_fresh(entry, kickoff.strftime("%H:%M"), NOW)
+    # far away: 3 h TTL -> still fresh
+    assert EventCache.is_fresh(entry, (kickoff + timedelta(hours=8)).isoformat(), NOW)
+    assert not EventCache.is_fresh(None, None, NOW)
+    cache.close()
+
+
+def test_put_get_round_trip(tmp_path):
+    path = str(tmp_path / "db" / "events.sqlite")
+    cache = EventCache(path)
+    cache.put("u", ["l1", "l2"], "abc")
+    cache.close()
+    entry = EventCache(path).get("u")
+    assert (entry.links, entry.content_hash) == (["l1", "l2"], "abc")
+    assert EventCache(path).get("missing") is None
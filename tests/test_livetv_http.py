@@ -0,0 +1,158 @@
+# tests/test_livetv_http.py
+# -*- coding: utf-8 -*-
+"""polite_get_async retries (stub session), AsyncHostLimiter spacing, per-host connection cap."""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+
+import livetv_http
+from livetv_http import AsyncHostLimiter, make_async_session, polite_get_async
+
+
+class StubResponse:
+    def __init__(self, status, body=b"ok", headers=None):
+        self.status = status
+        self.url = "https://livetv.sx/es/eventinfo/1/"
+        self.charset = "utf-8"
+        self.headers = headers or {}
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class StubSession:
+    """Answers each get() with the next item: a StubResponse, or an exception to raise."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    seen = []
+
+    def fake_delay(attempt, retry_after=None):
+        seen.append((attempt, retry_after))
+        return 0
+    monkeypatch.setattr(livetv_http, "retry_delay", fake_delay)
+    monkeypatch.setattr(livetv_http, "LIVETV_RETRIES", 3)
+    return seen
+
+
+def test_retries_on_retry_status_and_network_errors(delays):
+    session = StubSession(StubResponse(429, headers={"Retry-After": "7"}),
+                          aiohttp.ClientConnectionError("reset"),
+                          asyncio.TimeoutError(),
+                          StubResponse(200, b"page"))
+    page = asyncio.run(polite_get_async(session, "https://livetv.sx/es/eventinfo/1/"))
+    assert (page.status_code, page.text) == (200, "page")
+    assert session.calls == 4
+    assert delays == [(0, "7"), (1, None), (2, None)]
+
+
+def test_last_retry_status_is_returned_after_max_retries(delays):
+    session = StubSession(*[StubResponse(503)] * 4)
+    page = asyncio.run(polite_get_async(session, "https://livetv.sx/x"))
+    assert page.status_code == 503
+    assert session.calls == 4 and len(delays) == 3
+
+
+def test_network_error_is_raised_after_max_retries(delays):
+    session = StubSession(*[aiohttp.ClientConnectionError("down")] * 4)
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(polite_get_async(session, "https://livetv.sx/x"))
+    assert session.calls == 4
+
+
+def test_non_retry_status_is_returned_at_once(delays):
+    session = StubSession(StubResponse(404))
+    assert asyncio.run(polite_get_async(session, "https://livetv.sx/x")).status_code == 404
+    assert delays == []
+
+
+def test_retry_delay_backoff_and_retry_after(monkeypatch):
+    monkeypatch.setattr(livetv_http, "LIVETV_BACKOFF", 0.5)
+    assert [livetv_http.retry_delay(a) for a in range(3)] == [0.5, 1.0, 2.0]
+    assert livetv_http.retry_delay(0, "10") == 10.0
+    assert livetv_http.retry_delay(2, "1") == 2.0          # backoff wins when longer
+    assert livetv_http.retry_delay(0, "garbage") == 0.5
+
+
+def test_host_limiter_spaces_starts_per_host():
+    limiter = AsyncHostLimiter(0.05)
+    starts = {}
+
+    async def hit(url):
+        await limiter.wait(url)
+        starts.setdefault(url.split("/")[2], []).append(time.monotonic())
+
+    async def main():
+        urls = ["https://a.test/1", "https://a.test/2", "https://a.test/3", "https://b.test/1"]
+        await asyncio.gather(*(hit(u) for u in urls))
+
+    asyncio.run(main())
+    a = starts["a.test"]
+    assert all(later - earlier >= 0.045 for earlier, later in zip(a, a[1:]))
+    # another host doesn't queue behind a.test
+    assert starts["b.test"][0] - a[0] < 0.03
+
+
+def test_session_caps_concurrent_requests_per_host(monkeypatch):
+    monkeypatch.setattr(livetv_http, "LIVETV_PER_HOST", 2)
+    state = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with lock:
+                state["now"] += 1
+                state["max"] = max(state["max"], state["now"])
+            time.sleep(0.05)
+            with lock:
+                state["now"] -= 1
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    async def main():
+        async with make_async_session() as session:
+            pages = await asyncio.gather(*(polite_get_async(session, f"{base}/{i}") for i in range(8)))
+        return pages
+
+    try:
+        pages = asyncio.run(main())
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert [p.status_code for p in pages] == [200] * 8
+    assert state["max"] == 2
@@ -0,0 +1,34 @@
+# tests/test_livetv_urls.py
+# -*- coding: utf-8 -*-
+from livetv_urls import UrlIndex, canonical_key, clean_url
+
+
+def test_canonical_key_collapses_variants():
+    assert canonical_key("http://www.LiveTV.sx:80/es//webplayer/12?utm_source=x#a") == "livetv.sx/es/webplayer/12"
+    assert canonical_key("https://livetv.sx/es/webplayer/12/") == "livetv.sx/es/webplayer/12"
+    assert canonical_key("https://livetv.sx/p?b=2&a=1&fbclid=z") == canonical_key("http://livetv.sx/p?a=1&b=2")
+
+
+def test_canonical_key_keeps_meaningful_parts():
+    assert canonical_key("https://livetv.sx:8443/p") == "livetv.sx:8443/p"
+    assert canonical_key("https://livetv.sx/p?c=1") != canonical_key("https://livetv.sx/p?c=2")
+    assert canonical_key("https://cdn.livetv.sx/p") != canonical_key("https://livetv.sx/p")
+
+
+def test_only_known_tracking_params_are_dropped():
+    assert clean_url("https://livetv.sx/es/webplayer/1/?ref=abc&mc_cid=1&mc_eid=2&ref_src=tw") == \
+        "https://livetv.sx/es/webplayer/1/?ref=abc"
+    assert canonical_key("https://livetv.sx/p?ref=1") != canonical_key("https://livetv.sx/p?ref=2")
+    assert canonical_key("https://livetv.sx/p?mc_channel=3") != canonical_key("https://livetv.sx/p")
+
+
+def test_clean_url_keeps_scheme_and_www():
+    assert clean_url(" HTTPS://WWW.LiveTV.sx:443/es//x?utm_medium=a&id=3#top ") == "https://www.livetv.sx/es/x?id=3"
+
+
+def test_url_index_keeps_first_form():
+    idx = UrlIndex()
+    assert idx.new_only(["https://livetv.sx/a/", "http://www.livetv.sx/a", "https://livetv.sx/b"]) == \
+        ["https://livetv.sx/a/", "https://livetv.sx/b"]
+    assert idx.add("https://LIVETV.sx/b?utm_source=x") is None
+    assert (len(idx), idx.duplicates) == (2, 2)
@@ -0,0 +1,122 @@
+# tests/test_m3u_index.py
+# -*- coding: utf-8 -*-
+import os
+
+import patch_local_playlists
+from m3u_index import M3UIndex, apply_edits, patch_urls, scan_slots
+
+DEST = ("#EXTM3U\r\n"
+        "#EXTINF:-1 tvg-id=\"a\",Alpha\r\n"
+        "http://old/alpha.m3u8\r\n"
+        "#EXTINF:-1,Beta\r\n"
+        "#EXTVLCOPT:http-referrer=https://ref/\r\n"
+        "http://old/beta.m3u8\r\n"
+        "#EXTINF:-1,Gamma\r\n"
+        "http://old/gamma.m3u8\r\n"
+        "#EXTINF:-1,Delta")
+
+
+def test_scan_slots_offsets():
+    slots = {s.key: s for s in scan_slots(DEST)}
+    assert list(slots) == ["alpha", "beta", "gamma", "delta"]
+    alpha = slots["alpha"]
+    assert DEST[alpha.extinf_start:alpha.extinf_end] == '#EXTINF:-1 tvg-id="a",Alpha'
+    assert DEST[alpha.url_start:alpha.url_end] == "http://old/alpha.m3u8"
+    # the URL must follow the EXTINF directly; an option line in between means "no URL slot"
+    assert slots["beta"].url_start is None
+    assert slots["delta"].url_start is None
+
+
+def test_patch_urls_replaces_only_url_lines():
+    updated, changes = patch_urls(DEST, {"alpha": "https://new/alpha-longer.m3u8",
+                                         "gamma": "http://old/gamma.m3u8",
+                                         "delta": "https://new/delta.m3u8",
+                                         "missing": "https://new/x.m3u8"})
+    assert changes == [("alpha", "updated"), ("gamma", "same"), ("delta", "inserted")]
+    assert updated == DEST.replace("http://old/alpha.m3u8", "https://new/alpha-longer.m3u8") \
+        + "\nhttps://new/delta.m3u8"
+
+
+def test_patch_urls_without_changes_returns_same_text():
+    updated, changes = patch_urls(DEST, {"gamma": "http://old/gamma.m3u8"})
+    assert updated is DEST
+    assert changes == [("gamma", "same")]
+
+
+def test_custom_key_and_bytes_buffer():
+    slots = scan_slots(DEST.encode(), key=lambda ext: "A" if "Alpha" in ext else None)
+    assert [s.key for s in slots] == ["A"]
+
+
+def test_apply_edits_sorts_edits():
+    assert apply_edits("abcdef", [(4, 5, "E"), (0, 1, "AA")]) == "AAbcdEf"
+
+
+def open_index(path):
+    idx = M3UIndex(path)
+    return idx, idx.rebuilt
+
+
+def test_index_is_persisted_and_reused(tmp_path):
+    path = tmp_path / "list.m3u"
+    path.write_text(DEST, encoding="utf-8")
+    idx, rebuilt = open_index(path)
+    assert rebuilt and (tmp_path / "list.m3u.idx.json").exists()
+    assert idx.lookup("alpha") == [('#EXTINF:-1 tvg-id="a",Alpha', "http://old/alpha.m3u8")]
+
+    again, rebuilt = open_index(path)
+    assert not rebuilt
+    assert again.slots == idx.slots
+
+
+def test_index_rebuilds_when_content_hash_changes(tmp_path):
+    path = tmp_path / "list.m3u"
+    path.write_text(DEST, encoding="utf-8")
+    open_index(path)
+    # same size, different bytes, mtime forced back: only the hash can tell
+    st = path.stat()
+    path.write_text(DEST.replace("Alpha", "Alpho"), encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    idx, rebuilt = open_index(path)
+    assert rebuilt
+    assert "alpho" in idx.keys() and "alpha" not in idx.keys()
+
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2))   # touched only
+    assert not open_index(path)[1]
+
+
+def test_replace_urls_in_place_and_spliced_match_patch_urls(tmp_path):
+    path = tmp_path / "list.m3u"
+    path.write_text(DEST, encoding="utf-8")
+    idx = M3UIndex(path)
+    ino = path.stat().st_ino
+
+    same_len = {"gamma": "http://new/gamma.m3u8"}
+    assert idx.replace_urls(same_len) == [("gamma", "updated")]
+    expected = patch_urls(DEST, same_len)[0]
+    assert path.read_bytes().decode() == expected
+    assert path.stat().st_ino == ino                      # written in place
+
+    longer = {"alpha": "https://new/alpha-longer.m3u8", "delta": "https://new/delta.m3u8"}
+    assert idx.replace_urls(longer) == [("alpha", "updated"), ("delta", "inserted")]
+    expected = patch_urls(expected, longer)[0]
+    assert path.read_bytes().decode() == expected
+    # offsets were shifted, not rescanned, and still agree with a fresh scan
+    assert idx.slots == scan_slots(expected.encode())
+    reopened, rebuilt = open_index(path)
+    assert not rebuilt and reopened.lookup("delta") == [("#EXTINF:-1,Delta", "https://new/delta.m3u8")]
+
+
+def test_patch_local_playlists_skips_duplicate_titles(tmp_path):
+    playlist = tmp_path / "lista.m3u"
+    playlist.write_text("#EXTM3U\n#EXTINF:-1,One\nhttp://old/1\n#EXTINF:-1,Two\nhttp://old/2a\n"
+                        "#EXTINF:-1,Two\nhttp://old/2b\n#EXTINF:-1,Three\nhttp://old/3\n", encoding="utf-8")
+    source = tmp_path / "source.m3u"
+    source.write_text("#EXTM3U\n#EXTINF:-1,ONE\nhttp://new/1\n#EXTINF:-1,Two\nhttp://new/2\n"
+                      "#EXTINF:-1,Three\nhttp://new/3a\n#EXTINF:-1,Three\nhttp://new/3b\n"
+                      "#EXTINF:-1,Four\nhttp://new/4\n", encoding="utf-8")
+
+    assert patch_local_playlists.patch_playlists(str(source), [str(playlist)]) == 1
+    assert playlist.read_text(encoding="utf-8") == (
+        "#EXTM3U\n#EXTINF:-1,One\nhttp://new/1\n#EXTINF:-1,Two\nhttp://old/2a\n"
+        "#EXTINF:-1,Two\nhttp://old/2b\n#EXTINF:-1,Three\nhttp://old/3\n")
@@ -0,0 +1,63 @@
+# tests/test_m3u_stream.py
+# -*- coding: utf-8 -*-
+import io
+
+from m3u_stream import format_entry, iter_entries_from_text, iter_lines, iter_pairs, parse_extinf, write_entries
+
+PLAYLIST = """#EXTM3U
+#EXTINF:-1 tvg-id="tnt1" tvg-logo="https://l/x.png" group-title="UK, Sports",TNT Sports 1
+
+#EXTVLCOPT:http-referrer=https://ref/
+#KODIPROP:inputstream=adaptive
+
+https://cdn/tnt1.m3u8
+#EXTINF:-1,No URL channel
+#EXTINF:-1,Sky Sports Main Event
+http://cdn/sky.m3u8
+http://cdn/orphan.m3u8
+#EXTINF:-1,Last without URL
+"""
+
+
+def test_iter_pairs_pairs_extinf_with_next_url():
+    assert list(iter_pairs(PLAYLIST)) == [
+        ('#EXTINF:-1 tvg-id="tnt1" tvg-logo="https://l/x.png" group-title="UK, Sports",TNT Sports 1',
+         "https://cdn/tnt1.m3u8"),
+        ("#EXTINF:-1,No URL channel", None),
+        ("#EXTINF:-1,Sky Sports Main Event", "http://cdn/sky.m3u8"),
+        ("#EXTINF:-1,Last without URL", None),
+    ]
+
+
+def test_option_and_blank_lines_stay_attached_to_preceding_extinf():
+    first = next(iter_entries_from_text(PLAYLIST))
+    assert first.url == "https://cdn/tnt1.m3u8"
+    assert first.options == ("#EXTVLCOPT:http-referrer=https://ref/", "#KODIPROP:inputstream=adaptive")
+    assert format_entry(first) == (first.extinf + "\n#EXTVLCOPT:http-referrer=https://ref/\n"
+                                   "#KODIPROP:inputstream=adaptive\nhttps://cdn/tnt1.m3u8\n")
+
+
+def test_orphan_url_is_ignored():
+    assert "http://cdn/orphan.m3u8" not in [url for _, url in iter_pairs(PLAYLIST)]
+
+
+def test_parse_extinf_keeps_commas_inside_quotes():
+    duration, attrs, title = parse_extinf('#EXTINF:-1 tvg-id="a" group-title="UK, Sports",TNT Sports 1')
+    assert duration == "-1"
+    assert attrs == {"tvg-id": "a", "group-title": "UK, Sports"}
+    assert title == "TNT Sports 1"
+
+
+def test_write_entries_round_trips():
+    out = io.StringIO()
+    n = write_entries(iter_entries_from_text(PLAYLIST), out)
+    assert n == 4
+    assert list(iter_entries_from_text(out.getvalue())) == list(iter_entries_from_text(PLAYLIST))
+
+
+def test_iter_lines_matches_splitlines_without_copying_the_text():
+    text = "#EXTM3U\r\n#EXTINF:-1,A\r\n\r\nhttp://a\nlast"
+    assert list(iter_lines(text)) == text.split("\n")
+    assert list(iter_lines("a\n")) == ["a"]
+    assert list(iter_lines("")) == []
+    assert list(iter_pairs(text)) == [("#EXTINF:-1,A", "http://a")]
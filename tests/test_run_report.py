@@ -0,0 +1,39 @@
+# tests/test_run_report.py
+# -*- coding: utf-8 -*-
+import time
+from pathlib import Path
+
+import pytest
+
+from run_report import RunReport, counted
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("name", ["run_report.py", "m3u_stream.py"])
+def test_vendored_copies_match_m3u_update(name):
+    # scripts/ carries its own copy instead of importing across trees
+    assert (ROOT / "scripts" / name).read_bytes() == (ROOT / "m3u-update" / "scripts" / name).read_bytes()
+
+
+def test_counted_times_the_producer_not_the_consumer():
+    def slow_parse():
+        for i in range(3):
+            time.sleep(0.02)
+            yield i
+
+    report = RunReport("t")
+    st = report.get("parse", "src")
+    for _ in counted(slow_parse(), st):
+        time.sleep(0.05)
+    assert st.entries == 3 and st.calls == 1
+    assert 0.06 <= st.seconds < 0.15
+
+
+def test_counted_records_a_partial_pass():
+    report = RunReport("t")
+    st = report.get("parse", "src")
+    it = counted(iter(range(10)), st)
+    next(it)
+    it.close()
+    assert st.entries == 1 and st.calls == 1
@@ -0,0 +1,35 @@
+# tests/test_update_all.py
+# -*- coding: utf-8 -*-
+from fixtures import make_dest, make_source
+from m3u_stream import iter_pairs
+import update_all
+
+DEST_FILES = {
+    "pull_channels_and_update": "premierleague.m3u",
+    "pull_match_football_from_daddylive": "generalsports.m3u",
+    "update_dazn_pt": "dazn.m3u",
+    "update_bein_urls": "bein.m3u",
+}
+
+
+class Stats:
+    entries = 0
+
+
+def test_source_candidates_keep_only_wanted_pairs_in_order():
+    src = make_source(2000)
+    stats = Stats()
+    cands = update_all.source_candidates(src, update_all.DESTINATIONS, stats)
+    pairs = list(iter_pairs(src))
+    assert stats.entries == len(pairs)
+    assert 0 < len(cands) < len(pairs)
+    assert cands == [(e, u) for e, u in pairs if u and any(d.wanted(e) for d in update_all.DESTINATIONS)]
+
+
+def test_render_from_candidates_equals_render_from_full_source(capsys):
+    src = make_source(2000)
+    pairs = list(iter_pairs(src))
+    cands = update_all.source_candidates(src, update_all.DESTINATIONS)
+    for dest in update_all.DESTINATIONS:
+        dest_text = make_dest(DEST_FILES[dest.__name__], 200)
+        assert dest.render(cands, dest_text) == dest.render(pairs, dest_text), dest.__name__
@@ -0,0 +1,83 @@
+# tests/test_yallashoot_feed.py
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from yallashoot_feed import diff_matches, index_matches, load_snapshot, write_output
+
+
+def match(mid, **fields):
+    return {"id": mid, "home": mid.split("-")[0], "status": "NS", "result_text": "0 - 0", **fields}
+
+
+def output(*matches, date="2026-10-18"):
+    return {"date": date, "source_url": "https://example/", "matches": list(matches)}
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "today.json", tmp_path / "today.delta.json"
+
+
+def read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_diff_matches_added_removed_changed():
+    old = [match("A-B"), match("C-D"), match("E-F", channel="beIN 1")]
+    new = [match("A-B"), match("C-D", status="FT", result_text="2 - 1"), match("E-F"), match("G-H")]
+    added, removed, changed = diff_matches(old, new)
+    assert added == [match("G-H")]
+    assert removed == []
+    assert changed == {"C-D": {"status": "FT", "result_text": "2 - 1"}, "E-F": {"channel": None}}
+    assert diff_matches(new, old)[1] == ["G-H"]
+
+
+def test_repeated_ids_are_kept_apart():
+    assert list(index_matches([match("A-B"), match("A-B", status="FT"), match("A-B")])) == ["A-B", "A-B#2", "A-B#3"]
+
+
+def test_first_write_is_version_1_with_everything_added(paths):
+    path, delta_path = paths
+    assert write_output(output(match("A-B"), match("C-D")), path, delta_path)
+    assert read(path)["version"] == 1
+    delta = read(delta_path)
+    assert (delta["version"], delta["base_version"]) == (1, 0)
+    assert [m["id"] for m in delta["added"]] == ["A-B", "C-D"]
+    assert (delta["removed"], delta["changed"]) == ([], {})
+
+
+def test_change_writes_snapshot_and_delta(paths):
+    path, delta_path = paths
+    write_output(output(match("A-B"), match("C-D")), path, delta_path)
+    assert write_output(output(match("A-B", status="LIVE", result_text="1 - 0"), match("E-F")), path, delta_path)
+
+    snapshot = read(path)
+    assert snapshot["version"] == 2
+    assert [m["id"] for m in snapshot["matches"]] == ["A-B", "E-F"]
+    delta = read(delta_path)
+    assert (delta["version"], delta["base_version"], delta["date"]) == (2, 1, "2026-10-18")
+    assert [m["id"] for m in delta["added"]] == ["E-F"]
+    assert delta["removed"] == ["C-D"]
+    assert delta["changed"] == {"A-B": {"status": "LIVE", "result_text": "1 - 0"}}
+
+
+def test_no_change_writes_nothing(paths):
+    path, delta_path = paths
+    write_output(output(match("A-B")), path, delta_path)
+    before = path.stat().st_mtime_ns, delta_path.read_bytes()
+    delta_path.unlink()
+
+    assert write_output(output(match("A-B")), path, delta_path) is False
+    assert path.stat().st_mtime_ns == before[0]
+    assert not delta_path.exists()
+    assert read(path)["version"] == 1
+
+
+def test_new_day_with_same_matches_is_written(paths):
+    path, delta_path = paths
+    write_output(output(match("A-B")), path, delta_path)
+    assert write_output(output(match("A-B"), date="2026-10-19"), path, delta_path)
+    assert load_snapshot(path)["date"] == "2026-10-19"
+    assert read(delta_path)["changed"] == {}
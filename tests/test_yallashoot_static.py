@@ -0,0 +1,194 @@
+# tests/test_yallashoot_static.py
+# -*- coding: utf-8 -*-
+import datetime as dt
+import time
+
+import pytest
+
+from yallashoot_static import (BAGHDAD_TZ, baghdad_time, compare_cards, extract_cards_lxml, kickoff_at, known_status,
+                               needs_live_refresh, normalize_status, parse_instant, state_problem)
+
+UTC = dt.timezone.utc
+
+
+def card(home, away, time_html, home_img='<img src="https://x/h.png">', away_img='<img src="https://x/a.png">',
+         result="0 - 0", status="لم تبدأ"):
+    return (f'<div class="AY_Match"><div class="AY_Inner">'
+            f'<div class="MT_Team TM1"><div class="TM_Logo">{home_img}</div><div class="TM_Name">{home}</div></div>'
+            f'<div class="MT_Data">{time_html}<span class="MT_Result">{result}</span>'
+            f'<span class="MT_Stat">{status}</span></div>'
+            f'<div class="MT_Team TM2"><div class="TM_Logo">{away_img}</div><div class="TM_Name">{away}</div></div>'
+            f'</div><div class="MT_Info"><ul><li><span>beIN 1</span></li><li><span>X</span></li>'
+            f'<li><span>League</span></li></ul></div></div>')
+
+
+def page(*cards):
+    return "<html><body>" + "".join(cards) + "</body></html>"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1792350000", dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)),
+    ("1792350000000", dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)),
+    ("2026-10-18T19:00:00Z", dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)),
+    ("2026-10-18T21:00:00+02:00", dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)),
+])
+def test_parse_instant(value, expected):
+    assert parse_instant(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2026-10-18T19:00:00", "19:00", "", None, "tomorrow"])
+def test_parse_instant_rejects_wall_clock_values(value):
+    assert parse_instant(value) is None
+
+
+def test_baghdad_time_is_utc_plus_3():
+    assert baghdad_time(dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)) == "22:00"
+    assert baghdad_time(dt.datetime(2026, 10, 18, 22, 30, tzinfo=UTC)) == "01:30"
+
+
+def test_static_time_comes_from_the_attribute_not_the_text():
+    # server-rendered text in the server's zone (UTC here); the attribute pins the instant
+    html = page(card("A", "B", '<span class="MT_Time" data-start="2026-10-18T19:00:00Z">19:00</span>'),
+                card("C", "D", '<span class="MT_Time"><time datetime="1792353600">20:00</time></span>'))
+    assert [c["time_local"] for c in extract_cards_lxml(html)] == ["22:00", "23:00"]
+
+
+def test_static_time_unconfirmed_without_attribute():
+    html = page(card("A", "B", '<span class="MT_Time">19:00</span>'),
+                card("C", "D", '<span class="MT_Time" data-time="19:00">19:00</span>'))
+    assert [c["time_local"] for c in extract_cards_lxml(html)] == ["", ""]
+
+
+def test_attribute_of_a_sibling_card_is_not_borrowed():
+    html = page('<div class="AY_Inner"><div class="MT_Team TM1"><div class="TM_Name">A</div></div>'
+                '<div class="MT_Team TM2"><div class="TM_Name">B</div></div></div>'
+                '<div class="AY_Inner"><div class="MT_Team TM1"><div class="TM_Name">C</div></div>'
+                '<div class="MT_Team TM2"><div class="TM_Name">D</div></div>'
+                '<div data-start="1792350000"></div></div>')
+    assert [c["time_local"] for c in extract_cards_lxml(html)] == ["", "22:00"]
+
+
+def test_lazy_logo_attribute_beats_placeholder_src():
+    html = page(card("A", "B", '<span class="MT_Time" data-start="1792350000">x</span>',
+                     home_img='<img src="data:image/gif;base64,R0lGOD" data-src="https://x/real-h.png">',
+                     away_img='<img src="data:image/gif;base64,R0lGOD">'))
+    c = extract_cards_lxml(html)[0]
+    assert (c["home_logo"], c["away_logo"]) == ("https://x/real-h.png", "")
+    assert (c["home"], c["away"], c["channel"], c["competition"]) == ("A", "B", "beIN 1", "League")
+
+
+@pytest.mark.parametrize("text, known, published", [
+    ("انتهت المباراة", "FT", "FT"),
+    ("مباشر", "LIVE", "LIVE"),
+    ("الشوط الثاني", "LIVE", "LIVE"),
+    ("لم تبدأ بعد", "NS", "NS"),
+    ("", None, "NS"),
+    ("مؤجلة", None, "NS"),
+])
+def test_known_and_published_status(text, known, published):
+    assert known_status(text) == known
+    assert normalize_status(text) == published
+
+
+KICKOFF = '<span class="MT_Time" data-start="2026-10-18T19:00:00Z">x</span>'
+BEFORE = dt.datetime(2026, 10, 18, 21, 0, tzinfo=BAGHDAD_TZ)     # kick-off is 22:00 Baghdad
+AFTER = dt.datetime(2026, 10, 18, 22, 5, tzinfo=BAGHDAD_TZ)
+
+
+@pytest.mark.parametrize("result, status, now, trusted", [
+    ("0 - 0", "لم تبدأ", BEFORE, True),
+    ("", "لم تبدأ", BEFORE, True),
+    ("2 - 1", "انتهت المباراة", AFTER, True),
+    ("0 - 0", "لم تبدأ", AFTER, False),             # stale: the client would show it live by now
+    ("1 - 0", "مباشر", AFTER, False),               # live scores move client-side
+    ("", "", BEFORE, False),                         # empty status: filled in by the client
+    ("0 - 0", "قريباً", BEFORE, False),             # unknown text
+    ("", "انتهت المباراة", AFTER, False),           # finished without a score
+    ("--", "لم تبدأ", BEFORE, False),               # unknown result format
+])
+def test_state_problem(result, status, now, trusted):
+    c = extract_cards_lxml(page(card("A", "B", KICKOFF, result=result, status=status)))[0]
+    assert c["kickoff"] == dt.datetime(2026, 10, 18, 19, 0, tzinfo=UTC)
+    assert (state_problem(c, now) is None) == trusted
+
+
+def test_compare_cards_checks_status_and_result():
+    static = extract_cards_lxml(page(card("A", "B", KICKOFF, result="2 - 1", status="انتهت المباراة"),
+                                     card("C", "D", KICKOFF)))
+    browser = [dict(c, time_local="22:00") for c in static]
+    assert compare_cards(static, browser, "2026-10-18") == []
+
+    browser[0] = dict(browser[0], result_text="2 - 2")
+    browser[1] = dict(browser[1], status_text="مباشر")
+    problems = compare_cards(static, browser, "2026-10-18")
+    assert problems == ["A-B-2026-10-18: result_text '2 - 1' (static) != '2 - 2' (browser)",
+                        "C-D-2026-10-18: status_text 'لم تبدأ' (static) != 'مباشر' (browser)"]
+
+
+TODAY = "2026-10-18"
+
+
+def baghdad(day, hour, minute):
+    return dt.datetime(2026, 10, day, hour, minute, tzinfo=BAGHDAD_TZ)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("21:45", baghdad(18, 21, 45)),
+    ("9:45 م", baghdad(18, 21, 45)),
+    ("12:10 ص", baghdad(18, 0, 10)),
+    ("ends 25:00", None),
+    ("", None),
+])
+def test_kickoff_at_on_the_page_date(text, expected):
+    assert kickoff_at(text, TODAY) == expected
+
+
+@pytest.mark.parametrize("text, now, expected", [
+    ("00:30", baghdad(18, 23, 50), baghdad(19, 0, 30)),   # just after midnight: tomorrow's
+    ("23:45", baghdad(19, 0, 20), baghdad(18, 23, 45)),   # running past midnight: yesterday's
+    ("21:45", baghdad(18, 21, 0), baghdad(18, 21, 45)),
+])
+def test_kickoff_at_past_midnight(text, now, expected):
+    assert kickoff_at(text, TODAY, now) == expected
+
+
+@pytest.fixture
+def runner_tz(monkeypatch):
+    """Run with the machine clock in another zone (GitHub runners are UTC)."""
+    def set_tz(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+    yield set_tz
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize("zone", ["UTC", "America/New_York", "Asia/Tokyo"])
+def test_bare_time_is_baghdad_whatever_the_runner_zone(runner_tz, zone):
+    runner_tz(zone)
+    assert kickoff_at("21:45", TODAY).astimezone(UTC) == dt.datetime(2026, 10, 18, 18, 45, tzinfo=UTC)
+    # a naive "now" from the runner's clock is read in the runner's zone
+    now_local = baghdad(18, 21, 40).astimezone(UTC).astimezone().replace(tzinfo=None)
+    assert kickoff_at("21:45", TODAY, now_local) == baghdad(18, 21, 45)
+    assert needs_live_refresh({"status": "NS", "time_baghdad": "21:45"}, TODAY, now_local)
+
+
+def ns(time_baghdad):
+    return {"status": "NS", "time_baghdad": time_baghdad}
+
+
+@pytest.mark.parametrize("match, now, expected", [
+    ({"status": "LIVE", "time_baghdad": "18:00"}, baghdad(18, 23, 0), True),
+    ({"status": "FT", "time_baghdad": "21:45"}, baghdad(18, 21, 50), False),     # finished: never again
+    ({"status": "FT", "time_baghdad": "21:45"}, baghdad(18, 21, 40), False),
+    (ns("21:45"), baghdad(18, 21, 29), False),                                     # > LIVE_LEAD_MIN ahead
+    (ns("21:45"), baghdad(18, 21, 30), True),
+    (ns("21:45"), baghdad(18, 23, 0), True),                                       # late status update
+    (ns("21:45"), baghdad(19, 0, 46), False),                                      # given up after 3 h
+    (ns("00:30"), baghdad(18, 23, 50), False),                                     # tomorrow, 40 min ahead
+    (ns("00:30"), baghdad(19, 0, 20), True),                                       # past midnight
+    (ns("23:45"), baghdad(19, 0, 20), True),                                       # kicked off before midnight
+    (ns(""), baghdad(18, 21, 0), False),
+])
+def test_needs_live_refresh(match, now, expected):
+    assert needs_live_refresh(match, TODAY, now) is expected